@@ -1,45 +1,96 @@
 from aws_cdk import (
+    Duration,
     aws_apigateway as api
 )
 from aws_cdk.aws_lambda_python_alpha import PythonFunction
 
 from constructs import Construct
 
+# Every media type is binary, so that API Gateway decodes the base64 bodies of the
+# responses the handlers compress; the handlers decode base64 request bodies in turn
+BINARY_MEDIA_TYPES = ['*/*']
+
+# Request parameters that tell cached product reads apart; responses vary by
+# encoding, and a 304 may only answer a request with the same If-None-Match
+PRODUCT_QUERY_PARAMETERS = ['ids', 'category', 'sortBy', 'order', 'match', 'limit', 'cursor']
+CACHE_KEY_HEADERS = ['Accept-Encoding', 'If-None-Match']
+
 class MssApiGateway(Construct) :
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id)
 
-        self.createProductApi(kwargs["productFunction"])
+        self.createProductApi(kwargs["productFunction"], kwargs.get("productCacheTtl"))
         self.createBasketApi(kwargs["basketFunction"])
         self.createOrderApi(kwargs["orderFunction"])
 
-    def createProductApi(self, productFunction : PythonFunction):
+    def createProductApi(self, productFunction : PythonFunction, cacheTtl : Duration = None):
         # Product microservices api gateway
         # root name = product
 
         # GET /product
         # POST /product
 
+        # Many products by id, category or page
+        # GET /product?ids=a,b,c
+        # GET /product?category=phone&sortBy=price
+        # GET /product?limit=100&cursor=...
+
+        # Full-table export as ndjson, a page at a time: each response names the
+        # cursor of the next page in its X-Next-Cursor header, until the last
+        # GET /product/export?segments=8&limit=1000&cursor=...
+
+        # Many product updates, each conditional on the product's version
+        # PUT /product/bulk
+
         # Single product with id parameter
         # GET /product/{id}
         # PUT /product/{id}
         # DELETE /product/{id}
 
+        # With a cacheTtl, product reads are served from a stage cache for that long
         self.productApi = api.LambdaRestApi(self, 'productApi',
             rest_api_name='Product Service',
             handler=productFunction,
-            proxy=False
+            proxy=False,
+            binary_media_types=BINARY_MEDIA_TYPES,
+            deploy_options=api.StageOptions(
+                cache_cluster_enabled=True,
+                cache_cluster_size='0.5',
+                caching_enabled=True,
+                cache_ttl=cacheTtl,
+                method_options={
+                    '/product/export/GET': api.MethodDeploymentOptions(caching_enabled=False)
+                }
+            ) if cacheTtl else None
         )
         
         product = self.productApi.root.add_resource('product')
-        product.add_method('GET') # GET /product
+        self.addCachedGetMethod(product, productFunction,
+            [f'querystring.{name}' for name in PRODUCT_QUERY_PARAMETERS]) # GET /product
         product.add_method('POST') # POST / product
 
+        productExport = product.add_resource('export') # product/export
+        productExport.add_method('GET') # GET /product/export
+
+        productBulk = product.add_resource('bulk') # product/bulk
+        productBulk.add_method('PUT') # PUT /product/bulk
+            # expected request payload: { updates: [ { id: x, version: 1, price: 9.99 }, ... ] }
+
         singleProduct = product.add_resource('{id}') # product/{id}
-        singleProduct.add_method('GET') # GET /product/{id}
+        self.addCachedGetMethod(singleProduct, productFunction, ['path.id']) # GET /product/{id}
         singleProduct.add_method('PUT') # PUT /product/{id}
         singleProduct.add_method('DELETE') # DELETE /product/{id}
 
+    def addCachedGetMethod(self, resource : api.Resource, function : PythonFunction, parameters):
+        # GET method whose stage cache entries are keyed on the given
+        # request parameters, e.g. 'path.id', and the cache key headers
+        requestParameters = { f'method.request.{name}': name.startswith('path.') for name in parameters }
+        requestParameters.update({ f'method.request.header.{name}': False for name in CACHE_KEY_HEADERS })
+        resource.add_method('GET',
+            api.LambdaIntegration(function, cache_key_parameters=list(requestParameters)),
+            request_parameters=requestParameters
+        )
+
     def createBasketApi(self, basketFunction : PythonFunction):
         # Basket microservices api gateway
         # root name = basket
@@ -51,12 +102,18 @@ class MssApiGateway(Construct) :
         # GET /basket/{userName}
         # DELETE /basket/{userName}
 
+        # Single basket item
+        # POST /basket/{userName}/items
+        # DELETE /basket/{userName}/items/{productId}
+
         # POST /basket/checkout
+        # POST /basket/checkout/bulk
 
         self.basketApi = api.LambdaRestApi(self, 'basketApi',
             rest_api_name='Basket Service',
             handler=basketFunction,
-            proxy=False
+            proxy=False,
+            binary_media_types=BINARY_MEDIA_TYPES
         )
         
         basket = self.basketApi.root.add_resource('basket')
@@ -67,25 +124,57 @@ class MssApiGateway(Construct) :
         singleBasket.add_method('GET') # GET /basket/{userName}
         singleBasket.add_method('DELETE') # DELETE /basket/{userName}
 
+        basketItems = singleBasket.add_resource('items') # basket/{userName}/items
+        basketItems.add_method('POST') # POST /basket/{userName}/items
+            # expected request payload: { productId: 1, productName: x, quantity: 1, price: 9.99, color: x }
+
+        singleBasketItem = basketItems.add_resource('{productId}') # basket/{userName}/items/{productId}
+        singleBasketItem.add_method('DELETE') # DELETE /basket/{userName}/items/{productId}
+
         basketCheckout = basket.add_resource('checkout')
         basketCheckout.add_method('POST'); # POST /basket/checkout
             # expected request payload: { username: swn }
 
+        basketBulkCheckout = basketCheckout.add_resource('bulk')
+        basketBulkCheckout.add_method('POST') # POST /basket/checkout/bulk
+            # expected request payload: { checkouts: [ { username: swn }, ... ] }
+
     def createOrderApi(self, orderFunction : PythonFunction):
         # Order microservices api gateway
         # root name = order
 
         # GET /order
+        # GET /order?since=2024-01-01T00:00:00&until=...&limit=50 (recent orders of all users, newest first)
         # GET /order/{userName}
+        # GET /order/{userName}?from=2024-01-01&to=2024-12-31&limit=20&cursor=...
+
+        # Order count, lifetime spend and last order date of a user
+        # GET /order/{userName}/summary
+
+        # Full-table export as ndjson, a page at a time: each response names the
+        # cursor of the next page in its X-Next-Cursor header, until the last
+        # GET /order/export?segments=8&limit=1000&cursor=...
 
         self.orderApi = api.LambdaRestApi(self, 'orderApi',
             rest_api_name='Order Service',
             handler=orderFunction,
-            proxy=False
+            proxy=False,
+            binary_media_types=BINARY_MEDIA_TYPES
         )
         
         order = self.orderApi.root.add_resource('order')
-        order.add_method('GET') # GET /order
+        order.add_method('GET', request_parameters={
+            'method.request.querystring.since': False,
+            'method.request.querystring.until': False,
+            'method.request.querystring.limit': False,
+            'method.request.querystring.cursor': False
+        }) # GET /order
+
+        orderExport = order.add_resource('export') # order/export
+        orderExport.add_method('GET') # GET /order/export
 
         singleOrder = order.add_resource('{userName}') # order/{userName}
         singleOrder.add_method('GET') # GET /order/{userName}
+
+        orderSummary = singleOrder.add_resource('summary') # order/{userName}/summary
+        orderSummary.add_method('GET') # GET /order/{userName}/summary
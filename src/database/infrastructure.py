@@ -4,6 +4,9 @@ from aws_cdk import (
 )
 from constructs import Construct
 
+PRODUCT_CATEGORY_NAME_INDEX = 'categoryNameIndex'
+PRODUCT_CATEGORY_PRICE_INDEX = 'categoryPriceIndex'
+ORDER_DAY_INDEX = 'orderDayIndex'
 
 class MssDatabase(Construct):
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
@@ -12,6 +15,9 @@ class MssDatabase(Construct):
         self.productTable = self.create_product_table()
         self.basketTable = self.create_basket_table()
         self.orderTable = self.create_order_table()
+        self.orderSummaryTable = self.create_order_summary_table()
+        self.outboxTable = self.create_outbox_table()
+        self.idempotencyTable = self.create_idempotency_table()
 
     def create_product_table(self):
         productTable = db.Table(
@@ -24,6 +30,30 @@ class MssDatabase(Construct):
             removal_policy= RemovalPolicy.DESTROY,
             billing_mode= db.BillingMode.PAY_PER_REQUEST         
         )
+
+        # products of one category, sorted by name or by price
+        productTable.add_global_secondary_index(
+            index_name=PRODUCT_CATEGORY_NAME_INDEX,
+            partition_key=db.Attribute(
+                name="category",
+                type=db.AttributeType.STRING
+            ),
+            sort_key=db.Attribute(
+                name="name",
+                type=db.AttributeType.STRING
+            )
+        )
+        productTable.add_global_secondary_index(
+            index_name=PRODUCT_CATEGORY_PRICE_INDEX,
+            partition_key=db.Attribute(
+                name="category",
+                type=db.AttributeType.STRING
+            ),
+            sort_key=db.Attribute(
+                name="price",
+                type=db.AttributeType.NUMBER
+            )
+        )
         return productTable
 
     def create_basket_table(self):
@@ -54,4 +84,61 @@ class MssDatabase(Construct):
             removal_policy= RemovalPolicy.DESTROY,
             billing_mode= db.BillingMode.PAY_PER_REQUEST         
         )
+        # recent orders of all users, one partition per day of orderDate
+        orderTable.add_global_secondary_index(
+            index_name=ORDER_DAY_INDEX,
+            partition_key=db.Attribute(
+                name="orderDay",
+                type=db.AttributeType.STRING
+            ),
+            sort_key=db.Attribute(
+                name="orderDate",
+                type=db.AttributeType.STRING
+            )
+        )
         return orderTable
+
+    def create_order_summary_table(self):
+        # order count, lifetime spend and last order date of each user, kept up to date as orders are written
+        orderSummaryTable = db.Table(
+            self, 'orderSummary',
+            partition_key=db.Attribute(
+                name="userName",
+                type=db.AttributeType.STRING
+            ),
+            table_name= 'orderSummary',
+            removal_policy= RemovalPolicy.DESTROY,
+            billing_mode= db.BillingMode.PAY_PER_REQUEST         
+        )
+        return orderSummaryTable
+
+    def create_outbox_table(self):
+        # events waiting to be published, forwarded to the event bus from the table's stream
+        outboxTable = db.Table(
+            self, 'outbox',
+            partition_key=db.Attribute(
+                name="id",
+                type=db.AttributeType.STRING
+            ),
+            table_name= 'outbox',
+            stream=db.StreamViewType.NEW_IMAGE,
+            time_to_live_attribute='expiresAt',
+            removal_policy= RemovalPolicy.DESTROY,
+            billing_mode= db.BillingMode.PAY_PER_REQUEST         
+        )
+        return outboxTable
+
+    def create_idempotency_table(self):
+        # idempotency keys of the checkout events the order service has handled, expired after a while
+        idempotencyTable = db.Table(
+            self, 'idempotency',
+            partition_key=db.Attribute(
+                name="idempotencyKey",
+                type=db.AttributeType.STRING
+            ),
+            table_name= 'idempotency',
+            time_to_live_attribute='expiresAt',
+            removal_policy= RemovalPolicy.DESTROY,
+            billing_mode= db.BillingMode.PAY_PER_REQUEST         
+        )
+        return idempotencyTable
@@ -1,9 +1,11 @@
 from aws_cdk import (
+    Duration,
     aws_events as events,
     aws_events_targets as targets,
     aws_lambda as _lambda,
     aws_sqs as sqs
 )
+from aws_cdk.aws_lambda_event_sources import DynamoEventSource, SqsDlq
 from constructs import Construct
 
 class MssEventBus(Construct):
@@ -11,6 +13,7 @@ class MssEventBus(Construct):
         super().__init__(scope, id)
        
         publisher = kwargs["publisher"]
+        outbox_table = kwargs.get("outboxTable", None)
         target_queue = kwargs.get("targetQueue", None)
         target_function = kwargs.get("targetFunction", None)
 
@@ -36,6 +39,28 @@ class MssEventBus(Construct):
         publisher.add_environment("EVENT_SOURCE", checkout_basket_pattern.source[0] )
         publisher.add_environment("DETAIL_TYPE", checkout_basket_pattern.detail_type[0] )                          
 
+        if outbox_table:
+            # batches that still fail after every retry are recorded here rather than
+            # discarded, since their baskets were deleted when the entries were written;
+            # the messages name the stream records, whose outbox rows live as long
+            self.outbox_dead_letter_queue = sqs.Queue(self, "outboxDeadLetterQueue",
+                queue_name="OutboxDeadLetterQueue",
+                retention_period=Duration.days(14)
+            )
+
+            # the publisher forwards new outbox entries to the event bus
+            publisher.add_event_source( DynamoEventSource(
+                    outbox_table,
+                    starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+                    batch_size=100,
+                    retry_attempts=10,
+                    bisect_batch_on_error=True,
+                    on_failure=SqsDlq(self.outbox_dead_letter_queue),
+                    report_batch_item_failures=True,
+                    filters=[_lambda.FilterCriteria.filter({ "eventName": _lambda.FilterRule.is_equal("INSERT") })]
+                )
+            )
+
         if target_function:
             checkout_basket_rule.add_target(targets.LambdaFunction( target_function ))
         elif target_queue:
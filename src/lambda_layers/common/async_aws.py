@@ -0,0 +1,113 @@
+from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Dict, List
+
+import aws_clients
+import importlib.util
+import metrics
+import os
+
+# Routes with an async variant run it when aiobotocore is installed and ASYNC_IO is on;
+# otherwise every route runs synchronously. asyncio and aiobotocore are imported on first
+# use, so that handlers running synchronously do not pay for importing them at cold start.
+ASYNC_IO = os.getenv('ASYNC_IO', 'false').lower() == 'true' and importlib.util.find_spec('aiobotocore') is not None
+
+# The event loop and clients outlive an invocation, as the synchronous clients do,
+# so that a warm container reuses its connections
+_loop: Any = None
+_clients: Dict[str, Any] = {}
+_client_lock: Any = None
+_exit_stack = AsyncExitStack()
+
+
+def enabled() -> bool:
+    """
+    Returns:
+    bool: Whether routes should run their async variant.
+    """
+    return ASYNC_IO
+
+
+def run(awaitable: Awaitable) -> Any:
+    """
+    Run a coroutine to completion on the container's event loop.
+
+    Parameters:
+    awaitable: The coroutine, e.g. an async route function called with its event.
+
+    Returns:
+    The result of the coroutine.
+    """
+    import asyncio
+
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(awaitable)
+
+
+async def gather(*awaitables: Awaitable) -> List[Any]:
+    """
+    Returns:
+    list: The results of awaitables run concurrently, in the order given.
+    """
+    import asyncio
+    return await asyncio.gather(*awaitables)
+
+
+async def sleep(seconds: float) -> None:
+    """
+    Suspend the calling coroutine, e.g. to back off before a retry.
+    """
+    import asyncio
+    await asyncio.sleep(seconds)
+
+
+async def client(service_name: str) -> Any:
+    """
+    Create an aiobotocore client on first use and reuse it for the life of the container.
+
+    DynamoDB clients take and return plain python values, as the client of the boto3
+    table resource does, so that both paths share their request parameters.
+
+    Parameters:
+    service_name (str): The name of the aws service, e.g. 'dynamodb'.
+
+    Returns:
+    The aiobotocore client.
+    """
+    import asyncio
+
+    global _client_lock
+    if _client_lock is None:
+        _client_lock = asyncio.Lock()
+
+    async with _client_lock:
+        if service_name not in _clients:
+            from aiobotocore.config import AioConfig
+            from aiobotocore.session import get_session
+
+            service_client = await _exit_stack.enter_async_context(
+                get_session().create_client(service_name, config=AioConfig(**aws_clients.client_config_options())))
+            if service_name == 'dynamodb':
+                register_high_level_interface(service_client)
+            metrics.instrument_client(service_client)
+            _clients[service_name] = service_client
+    return _clients[service_name]
+
+
+def register_high_level_interface(service_client: Any) -> None:
+    """
+    Convert DynamoDB attribute values to and from python values around every call,
+    with the handlers boto3 registers on the client of its DynamoDB resource.
+
+    Parameters:
+    service_client: A DynamoDB client.
+    """
+    from boto3.dynamodb.transform import TransformationInjector, copy_dynamodb_params
+
+    injector = TransformationInjector()
+    events = service_client.meta.events
+    events.register('provide-client-params.dynamodb', copy_dynamodb_params)
+    events.register('before-parameter-build.dynamodb', injector.inject_condition_expressions)
+    events.register('before-parameter-build.dynamodb', injector.inject_attribute_value_input)
+    events.register('after-call.dynamodb', injector.inject_attribute_value_output)
@@ -0,0 +1,86 @@
+from functools import lru_cache
+from typing import Any, Dict
+
+import metrics
+import os
+
+
+def client_config_options() -> Dict[str, Any]:
+    """
+    The settings of the botocore configuration shared by every client and resource,
+    synchronous or not.
+
+    The defaults favour failing fast and retrying over waiting on a slow node;
+    each setting can be overridden through the CLIENT_* environment variables.
+
+    Returns:
+    dict: The keyword arguments of botocore.config.Config.
+    """
+    return {
+        'max_pool_connections': int(os.getenv('CLIENT_MAX_POOL_CONNECTIONS', '10')),
+        'connect_timeout': float(os.getenv('CLIENT_CONNECT_TIMEOUT', '1')),
+        'read_timeout': float(os.getenv('CLIENT_READ_TIMEOUT', '2')),
+        'tcp_keepalive': os.getenv('CLIENT_TCP_KEEPALIVE', 'true').lower() == 'true',
+        'retries': {
+            'mode': os.getenv('CLIENT_RETRY_MODE', 'standard'),
+            'max_attempts': int(os.getenv('CLIENT_MAX_ATTEMPTS', '3'))
+        }
+    }
+
+
+@lru_cache(maxsize=None)
+def client_config() -> Any:
+    """
+    Build the botocore configuration shared by every client and resource.
+
+    Returns:
+    botocore.config.Config: The client configuration.
+    """
+    from botocore.config import Config
+    return Config(**client_config_options())
+
+
+@lru_cache(maxsize=None)
+def resource(service_name: str) -> Any:
+    """
+    Create a boto3 resource on first use and reuse it for the life of the container.
+
+    boto3 is imported here rather than at module level, so that handlers which
+    never reach AWS do not pay for it during a cold start.
+
+    Parameters:
+    service_name (str): The name of the aws service, e.g. 'dynamodb'.
+
+    Returns:
+    The boto3 service resource.
+    """
+    import boto3
+    service_resource = boto3.resource(service_name, config=client_config())
+    metrics.instrument_client(service_resource.meta.client)
+    return service_resource
+
+
+@lru_cache(maxsize=None)
+def client(service_name: str) -> Any:
+    """
+    Create a boto3 client on first use and reuse it for the life of the container.
+
+    Parameters:
+    service_name (str): The name of the aws service, e.g. 'events'.
+
+    Returns:
+    The boto3 client.
+    """
+    import boto3
+    service_client = boto3.client(service_name, config=client_config())
+    metrics.instrument_client(service_client)
+    return service_client
+
+
+@lru_cache(maxsize=None)
+def table(table_name: str) -> Any:
+    """
+    Returns:
+    The DynamoDB table resource for a table name, created on first use.
+    """
+    return resource('dynamodb').Table(table_name)
@@ -0,0 +1,80 @@
+from typing import Any, Dict, List
+
+import async_aws
+import aws_clients
+import random
+import time
+
+BATCH_GET_CHUNK_SIZE = 100
+BATCH_GET_MAX_RETRIES = 5
+
+
+def batch_get_items(table_name: str, keys: List[Dict[str, Any]], consistent_read: bool = False) -> List[Dict[str, Any]]:
+    """
+    Read items by key with BatchGetItem, 100 keys per call, retrying unprocessed keys with backoff.
+
+    Parameters:
+    table_name (str): The name of the table to read from.
+    keys (list): The keys of the items to read.
+    consistent_read (bool): Whether to read the latest write of every item.
+
+    Returns:
+    list: The items that exist, in no particular order.
+    """
+    ddb_resource = aws_clients.resource('dynamodb')
+    items = []
+
+    for start in range(0, len(keys), BATCH_GET_CHUNK_SIZE):
+        request_items = {
+            table_name: {
+                'Keys': keys[start:start + BATCH_GET_CHUNK_SIZE],
+                'ConsistentRead': consistent_read
+            }
+        }
+
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+            response = ddb_resource.batch_get_item(RequestItems=request_items)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+        else:
+            raise RuntimeError(f'batch_get_items, keys still unprocessed after {BATCH_GET_MAX_RETRIES} retries')
+
+    return items
+
+
+async def batch_get_items_async(table_name: str, keys: List[Dict[str, Any]], consistent_read: bool = False) -> List[Dict[str, Any]]:
+    """
+    Read items by key with BatchGetItem like batch_get_items, but with every chunk
+    of 100 keys read concurrently.
+
+    Parameters:
+    table_name (str): The name of the table to read from.
+    keys (list): The keys of the items to read.
+    consistent_read (bool): Whether to read the latest write of every item.
+
+    Returns:
+    list: The items that exist, in no particular order.
+    """
+    ddb_client = await async_aws.client('dynamodb')
+
+    async def read_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        request_items = { table_name: { 'Keys': chunk, 'ConsistentRead': consistent_read } }
+        items = []
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            if attempt:
+                await async_aws.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+            response = await ddb_client.batch_get_item(RequestItems=request_items)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                return items
+        raise RuntimeError(f'batch_get_items_async, keys still unprocessed after {BATCH_GET_MAX_RETRIES} retries')
+
+    chunks = [keys[start:start + BATCH_GET_CHUNK_SIZE] for start in range(0, len(keys), BATCH_GET_CHUNK_SIZE)]
+    return [item for items in await async_aws.gather(*(read_chunk(chunk) for chunk in chunks)) for item in items]
@@ -0,0 +1,92 @@
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+import os
+import simplejson
+
+# orjson is used when installed and recent enough to embed Decimals verbatim
+# (orjson.Fragment); otherwise, or when JSON_BACKEND=simplejson, simplejson is used.
+try:
+    import orjson
+    if not hasattr(orjson, 'Fragment'):
+        orjson = None
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson and os.getenv('JSON_BACKEND', 'orjson') == 'orjson' else 'simplejson'
+
+
+def _simplejson_default(default: Optional[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    def encode(obj: Any) -> Any:
+        if isinstance(obj, (set, frozenset)):
+            return sorted(obj)
+        if default:
+            return default(obj)
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+    return encode
+
+
+def _orjson_default(default: Optional[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    def encode(obj: Any) -> Any:
+        if isinstance(obj, Decimal):
+            return orjson.Fragment(str(obj))
+        if isinstance(obj, (set, frozenset)):
+            return sorted(obj)
+        if default:
+            return default(obj)
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+    return encode
+
+
+_ORJSON_ENCODE = _orjson_default(None) if orjson else None
+_SIMPLEJSON_ENCODE = _simplejson_default(None)
+
+
+def dumps(obj: Any, sort_keys: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """
+    Serialize an object to compact json. Decimals are written as exact json numbers
+    and DynamoDB string, number and binary sets as sorted lists. Non-ascii text is
+    written as utf-8 rather than escaped, by either backend.
+
+    Documents orjson cannot encode, e.g. with integers beyond 64 bits, which DynamoDB
+    numbers can hold, are encoded by simplejson instead.
+
+    Parameters:
+    obj: The object to serialize.
+    sort_keys (bool): Whether to sort the keys of every json object.
+    default (callable): Converts objects of any other unsupported type.
+
+    Returns:
+    str: The json document.
+    """
+    if BACKEND == 'orjson':
+        try:
+            return orjson.dumps(
+                obj,
+                default=_orjson_default(default) if default else _ORJSON_ENCODE,
+                option=orjson.OPT_SORT_KEYS if sort_keys else 0
+            ).decode('utf-8')
+        except orjson.JSONEncodeError:
+            pass
+
+    return simplejson.dumps(
+        obj,
+        default=_simplejson_default(default) if default else _SIMPLEJSON_ENCODE,
+        sort_keys=sort_keys,
+        separators=(',', ':'),
+        ensure_ascii=False
+    )
+
+
+def loads(document: Any) -> Any:
+    """
+    Parse a json document, reading every non-integer number as a Decimal
+    so that it can be written to DynamoDB unchanged.
+
+    Parameters:
+    document (str): The json document.
+
+    Returns:
+    The parsed object.
+    """
+    return simplejson.loads(document, parse_float=Decimal)
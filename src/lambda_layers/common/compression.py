@@ -0,0 +1,123 @@
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+import base64
+import gzip
+import os
+
+# brotli is used when installed; otherwise only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+# Encodings in order of preference, when the client accepts several equally
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {
+    **({ 'br': lambda body: brotli.compress(body, quality=BROTLI_QUALITY) } if brotli else {}),
+    'gzip': lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL)
+}
+
+
+def header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """
+    Returns:
+    str: The value of a request header, whatever the case of its name, or None.
+    """
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def accepted_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Choose the encoding to compress a response with.
+
+    Parameters:
+    accept_encoding (str): The Accept-Encoding header of the request, e.g. 'gzip, br;q=0.9'.
+
+    Returns:
+    str: The supported encoding the client prefers, or None if it accepts none of them.
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        weight = 1.0
+        if params.strip().startswith('q='):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    candidates: List[str] = [
+        encoding for encoding in ENCODERS
+        if weights.get(encoding, weights.get('*', 0.0)) > 0
+    ]
+    return max(candidates, key=lambda encoding: weights.get(encoding, weights.get('*', 0.0)), default=None)
+
+
+def compress_response(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compress the body of an API Gateway response if it is large enough and the client accepts
+    a supported encoding. The compressed body is returned base64 encoded, for API Gateway to decode.
+
+    Parameters:
+    event (dict): The API Gateway request.
+    response (dict): The response object containing statusCode and body.
+
+    Returns:
+    dict: The response, compressed if worthwhile.
+    """
+    body = response.get('body')
+    if not isinstance(body, str) or response.get('isBase64Encoded'):
+        return response
+
+    encoding = accepted_encoding(header(event, 'accept-encoding'))
+    raw = body.encode('utf-8')
+    if encoding is None or len(raw) < COMPRESSION_MIN_SIZE:
+        return response
+
+    headers = dict(response.get('headers') or {})
+    headers.setdefault('Content-Type', 'application/json')
+    headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Accept-Encoding'
+    return {
+        **response,
+        'headers': headers,
+        'body': base64.b64encode(ENCODERS[encoding](raw)).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
+
+def http_encoding(handler: Callable[[Dict[str, Any], Any], Any]) -> Callable[[Dict[str, Any], Any], Any]:
+    """
+    Decorate a handler to compress its API Gateway responses, and to decode request bodies
+    that API Gateway passes on base64 encoded because every media type is treated as binary.
+    Events from other sources pass through untouched.
+
+    Parameters:
+    handler: The Lambda handler.
+
+    Returns:
+    The decorated handler.
+    """
+    @wraps(handler)
+    def encoded(event: Dict[str, Any], context: Any) -> Any:
+        if 'httpMethod' not in event:
+            return handler(event, context)
+
+        if event.get('isBase64Encoded') and event.get('body'):
+            event = { **event, 'body': base64.b64decode(event['body']).decode('utf-8'), 'isBase64Encoded': False }
+
+        response = handler(event, context)
+        return compress_response(event, response) if isinstance(response, dict) else response
+
+    return encoded
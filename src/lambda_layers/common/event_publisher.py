@@ -0,0 +1,83 @@
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import random
+import time
+
+MAX_ENTRIES_PER_CALL = 10
+MAX_BYTES_PER_CALL = 256 * 1024
+
+
+def entry_size(entry: Dict[str, Any]) -> int:
+    """
+    Returns:
+    int: The size of a PutEvents entry, as EventBridge counts it against the 256 KB limit.
+    """
+    size = 14 if entry.get('Time') else 0
+    for field in ('Source', 'DetailType', 'Detail'):
+        size += len(entry.get(field, '').encode('utf-8'))
+    size += sum(len(resource.encode('utf-8')) for resource in entry.get('Resources', []))
+    return size
+
+
+class BufferedEventPublisher:
+    """
+    Packs events into as few PutEvents calls as possible, up to 10 entries and 256 KB per call,
+    and retries only the entries that EventBridge reports as failed.
+
+    Each event is added under a key, and the outcome of every key is kept in failures:
+    after flush(), a key that is absent from failures was published.
+    """
+
+    def __init__(self, client: Any, max_retries: int = 3) -> None:
+        self.client = client
+        self.max_retries = max_retries
+        self.failures: Dict[Hashable, str] = {}
+        self.calls = 0
+        self._buffer: List[Tuple[Hashable, Dict[str, Any]]] = []
+        self._buffer_size = 0
+
+    def add(self, key: Hashable, entry: Dict[str, Any]) -> None:
+        """
+        Buffer one PutEvents entry, sending the buffer first if the entry would not fit.
+
+        Parameters:
+        key: Identifies the entry in failures.
+        entry (dict): The PutEvents entry.
+        """
+        size = entry_size(entry)
+        if size > MAX_BYTES_PER_CALL:
+            self.failures[key] = f'Entry of {size} bytes exceeds the {MAX_BYTES_PER_CALL} byte limit'
+            return
+
+        if len(self._buffer) == MAX_ENTRIES_PER_CALL or self._buffer_size + size > MAX_BYTES_PER_CALL:
+            self.flush()
+        self._buffer.append((key, entry))
+        self._buffer_size += size
+
+    def flush(self) -> None:
+        """
+        Send the buffered entries, retrying failed entries with backoff.
+        """
+        pending, self._buffer, self._buffer_size = self._buffer, [], 0
+        error: Optional[str] = None
+
+        for attempt in range(self.max_retries + 1):
+            if not pending:
+                return
+            if attempt:
+                time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+
+            self.calls += 1
+            response = self.client.put_events(Entries=[entry for _, entry in pending])
+            if not response.get('FailedEntryCount'):
+                return
+
+            failed = []
+            for (key, entry), result in zip(pending, response['Entries']):
+                if result.get('ErrorCode'):
+                    failed.append((key, entry))
+                    error = f"{result['ErrorCode']}: {result.get('ErrorMessage', '')}"
+            pending = failed
+
+        for key, _ in pending:
+            self.failures[key] = error
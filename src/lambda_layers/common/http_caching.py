@@ -0,0 +1,59 @@
+from functools import wraps
+from typing import Any, Callable, Dict
+
+from compression import header
+
+import hashlib
+
+
+def etag(body: str) -> str:
+    """
+    Returns:
+    str: A weak entity tag of a response body, the same for every byte-identical body.
+    Weak, because the body may be sent compressed in different encodings.
+    """
+    return 'W/"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def matches(if_none_match: str, tag: str) -> bool:
+    """
+    Returns:
+    bool: Whether an If-None-Match header matches an entity tag, comparing weakly.
+    """
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or tag[2:] in (candidate[2:] if candidate.startswith('W/') else candidate for candidate in candidates)
+
+
+def conditional_get(max_age: int) -> Callable:
+    """
+    Decorate a handler to tag its successful GET responses with an ETag and Cache-Control,
+    and to answer 304 Not Modified when the request's If-None-Match names the same ETag.
+    Responses that already carry a Cache-Control, e.g. the pages of an export, are left as they are.
+
+    Parameters:
+    max_age (int): The seconds for which clients and caches may reuse a response without asking again.
+
+    Returns:
+    The decorator.
+    """
+    cache_control = f'public, max-age={max_age}'
+
+    def decorator(handler: Callable[[Dict[str, Any], Any], Any]) -> Callable[[Dict[str, Any], Any], Any]:
+        @wraps(handler)
+        def conditional(event: Dict[str, Any], context: Any) -> Any:
+            response = handler(event, context)
+            if (event.get('httpMethod') != 'GET' or not isinstance(response, dict)
+                    or response.get('statusCode') != 200 or not isinstance(response.get('body'), str)
+                    or any(name.lower() == 'cache-control' for name in response.get('headers') or {})):
+                return response
+
+            tag = etag(response['body'])
+            headers = { 'ETag': tag, 'Cache-Control': cache_control }
+            if_none_match = header(event, 'if-none-match')
+            if if_none_match and matches(if_none_match, tag):
+                return { 'statusCode': 304, 'headers': headers, 'body': '' }
+            return { **response, 'headers': { **(response.get('headers') or {}), **headers } }
+
+        return conditional
+
+    return decorator
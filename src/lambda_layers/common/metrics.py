@@ -0,0 +1,210 @@
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+import codec
+import os
+import re
+import sys
+import threading
+import time
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'MicroservicesSample')
+
+# Embedded Metric Format accepts at most 100 values per metric
+MAX_VALUES_PER_METRIC = 100
+
+# The services whose calls are timed, and the prefix of their metric names
+INSTRUMENTED_SERVICES = {
+    'dynamodb': 'DynamoDB',
+    'events': 'EventBridge'
+}
+
+# The routes of the events that deliver batches of records
+RECORD_SOURCES = {
+    'aws:sqs': 'sqs',
+    'aws:dynamodb': 'dynamodb-stream'
+}
+
+
+class MemorySink:
+    """
+    Keeps the metric records in memory, e.g. for a benchmark to assert on.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[Dict[str, Any]] = []
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+
+
+def stdout_sink(record: Dict[str, Any]) -> None:
+    """
+    Write a metric record as one log line, which CloudWatch turns into metrics.
+    """
+    sys.stdout.write(codec.dumps(record) + '\n')
+    sys.stdout.flush()
+
+
+sink: Callable[[Dict[str, Any]], None] = stdout_sink
+
+
+def set_sink(new_sink: Callable[[Dict[str, Any]], None]) -> None:
+    """
+    Send metric records to another sink than stdout.
+
+    Parameters:
+    new_sink: Called with each metric record.
+    """
+    global sink
+    sink = new_sink
+
+
+class Invocation:
+    """
+    The metrics of one invocation. Calls from worker threads are added under a lock.
+    """
+
+    def __init__(self, service: str, route: str) -> None:
+        self.service = service
+        self.route = route
+        self.durations: Dict[str, List[float]] = { prefix: [] for prefix in INSTRUMENTED_SERVICES.values() }
+        self.consumed_capacity: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def add_call(self, prefix: str, duration_ms: float, consumed_capacity: Any) -> None:
+        with self.lock:
+            self.durations[prefix].append(duration_ms)
+            for capacity in consumed_capacity if isinstance(consumed_capacity, list) else [consumed_capacity]:
+                if capacity:
+                    table_name = capacity.get('TableName', '')
+                    self.consumed_capacity[table_name] = self.consumed_capacity.get(table_name, 0) + float(capacity.get('CapacityUnits', 0))
+
+    def record(self, duration_ms: float, error: bool) -> Dict[str, Any]:
+        """
+        Returns:
+        dict: The invocation's metrics as an Embedded Metric Format record, dimensioned by service and route.
+        """
+        values = {
+            'Duration': (duration_ms, 'Milliseconds'),
+            'Errors': (int(error), 'Count'),
+            'ConsumedCapacity': (sum(self.consumed_capacity.values()), 'Count')
+        }
+        for prefix, durations in self.durations.items():
+            values[f'{prefix}Calls'] = (len(durations), 'Count')
+            if durations:
+                values[f'{prefix}Duration'] = (durations[:MAX_VALUES_PER_METRIC], 'Milliseconds')
+
+        return {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['service', 'route']],
+                    'Metrics': [{ 'Name': name, 'Unit': unit } for name, (_, unit) in values.items()]
+                }]
+            },
+            'service': self.service,
+            'route': self.route,
+            'consumedCapacityByTable': self.consumed_capacity,
+            **{ name: value for name, (value, _) in values.items() }
+        }
+
+
+# The invocation in progress; a container handles one invocation at a time
+_current: Optional[Invocation] = None
+
+
+def route_of(event: Dict[str, Any]) -> str:
+    """
+    Name the route an event was sent to, without the values of its path parameters,
+    so that every request to a route shares its metrics.
+
+    Parameters:
+    event (dict): The event triggering the Lambda function.
+
+    Returns:
+    str: e.g. 'GET /product/{id}', 'sqs', 'dynamodb-stream' or 'eventbridge'.
+    """
+    if 'Records' in event:
+        source = event['Records'][0].get('eventSource') if event['Records'] else None
+        return RECORD_SOURCES.get(source, 'records')
+    if 'detail-type' in event:
+        return 'eventbridge'
+
+    path = event.get('resource')
+    if not path:
+        path = event.get('path') or '/'
+        for name, value in (event.get('pathParameters') or {}).items():
+            path = re.sub(f'/{re.escape(str(value))}(?=/|$)', f'/{{{name}}}', path, count=1)
+    return f"{event.get('httpMethod', '')} {path}".strip()
+
+
+def instrument(service: str) -> Callable:
+    """
+    Decorate a handler to emit the duration, errors, aws calls and DynamoDB consumed
+    capacity of each invocation as one Embedded Metric Format record.
+
+    Parameters:
+    service (str): The name of the service, used as a dimension.
+
+    Returns:
+    The decorator.
+    """
+    def decorator(handler: Callable[[Dict[str, Any], Any], Any]) -> Callable[[Dict[str, Any], Any], Any]:
+        if not METRICS_ENABLED:
+            return handler
+
+        @wraps(handler)
+        def instrumented(event: Dict[str, Any], context: Any) -> Any:
+            global _current
+            _current = invocation = Invocation(service, route_of(event))
+            started = time.perf_counter()
+            error = True
+            try:
+                response = handler(event, context)
+                error = isinstance(response, dict) and response.get('statusCode', 200) >= 500
+                return response
+            finally:
+                _current = None
+                sink(invocation.record((time.perf_counter() - started) * 1000, error))
+
+        return instrumented
+
+    return decorator
+
+
+def instrument_client(client: Any) -> None:
+    """
+    Time every call a DynamoDB or EventBridge client makes, and ask DynamoDB to return
+    the capacity each operation consumed.
+
+    Parameters:
+    client: A botocore client, e.g. the client of a boto3 resource.
+    """
+    service_name = client.meta.service_model.service_name
+    if not METRICS_ENABLED or service_name not in INSTRUMENTED_SERVICES:
+        return
+    prefix = INSTRUMENTED_SERVICES[service_name]
+    event_service = client.meta.service_model.service_id.hyphenize()
+
+    def before_parameter_build(params: Dict[str, Any], model: Any, **kwargs: Any) -> None:
+        if 'ReturnConsumedCapacity' in model.input_shape.members:
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+    def before_call(context: Dict[str, Any], **kwargs: Any) -> None:
+        context['metrics_started'] = time.perf_counter()
+
+    def after_call(context: Dict[str, Any], parsed: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        invocation = _current
+        if invocation is not None and 'metrics_started' in context:
+            duration_ms = (time.perf_counter() - context.pop('metrics_started')) * 1000
+            invocation.add_call(prefix, duration_ms, (parsed or {}).get('ConsumedCapacity'))
+
+    events = client.meta.events
+    if service_name == 'dynamodb':
+        events.register(f'before-parameter-build.{event_service}', before_parameter_build)
+    events.register(f'before-call.{event_service}', before_call)
+    events.register(f'after-call.{event_service}', after_call)
+    events.register(f'after-call-error.{event_service}', after_call)
@@ -0,0 +1,130 @@
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+import base64
+import codec
+import os
+
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '100'))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '1000'))
+
+
+class Page(NamedTuple):
+    """
+    One page of items read from DynamoDB, plus the cursor for the next page.
+    """
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Turn a DynamoDB LastEvaluatedKey into an opaque, url-safe cursor.
+
+    Parameters:
+    last_evaluated_key (dict): The LastEvaluatedKey of a scan or query response.
+
+    Returns:
+    str: The cursor, or None if there are no more pages.
+    """
+    if not last_evaluated_key:
+        return None
+    raw = codec.dumps(last_evaluated_key).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Turn a cursor produced by encode_cursor back into an ExclusiveStartKey.
+
+    Parameters:
+    cursor (str): The cursor received from the client.
+
+    Returns:
+    dict: The ExclusiveStartKey to resume the scan or query from.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        start_key = codec.loads(raw)
+    except Exception:
+        raise ValueError(f'Invalid cursor: "{cursor}"')
+
+    if not isinstance(start_key, dict) or not start_key:
+        raise ValueError(f'Invalid cursor: "{cursor}"')
+    return start_key
+
+
+def page_params(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the Limit/ExclusiveStartKey parameters for a scan or query
+    from the '?limit=' and '?cursor=' query parameters of a request.
+
+    Parameters:
+    event (dict): The api gateway event.
+
+    Returns:
+    dict: Parameters to pass on to scan() or query().
+    """
+    query_params = event.get('queryStringParameters') or {}
+
+    try:
+        limit = int(query_params.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError(f'limit must be an integer: "{query_params["limit"]}"')
+    if limit < 1:
+        raise ValueError(f'limit must be positive: "{limit}"')
+
+    params = { 'Limit': min(limit, MAX_PAGE_SIZE) }
+    if query_params.get('cursor'):
+        params['ExclusiveStartKey'] = decode_cursor(query_params['cursor'])
+    return params
+
+
+def read_page(response: Dict[str, Any]) -> Page:
+    """
+    Wrap a scan or query response in a Page.
+
+    Parameters:
+    response (dict): The response of scan() or query().
+
+    Returns:
+    Page: The items of the response and the cursor for the next page.
+    """
+    return Page(response.get('Items', []), encode_cursor(response.get('LastEvaluatedKey')))
+
+
+def iter_page_body(message: str, page: Page) -> Iterator[str]:
+    """
+    Encode a response body holding a page of items, one item at a time,
+    so that the page is never serialized as a single document.
+
+    Parameters:
+    message (str): The message to include in the response body.
+    page (Page): The page of items.
+
+    Returns:
+    Iterator[str]: The chunks of the encoded response body.
+    """
+    yield '{"message":'
+    yield codec.dumps(message)
+    yield ',"body":['
+    for index, item in enumerate(page.items):
+        if index:
+            yield ','
+        yield codec.dumps(item)
+    yield '],"nextCursor":'
+    yield codec.dumps(page.next_cursor)
+    yield '}'
+
+
+def encode_page_body(message: str, page: Page) -> str:
+    """
+    Encode a response body holding a page of items.
+
+    Parameters:
+    message (str): The message to include in the response body.
+    page (Page): The page of items.
+
+    Returns:
+    str: The encoded response body.
+    """
+    return ''.join(iter_page_body(message, page))
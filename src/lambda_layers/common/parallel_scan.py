@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+from pagination import encode_cursor, page_params
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import async_aws
+import aws_clients
+import codec
+import math
+import os
+
+DEFAULT_TOTAL_SEGMENTS = int(os.getenv('EXPORT_SEGMENTS', '4'))
+# Every segment is scanned at once, each on a pooled connection of the client
+MAX_TOTAL_SEGMENTS = aws_clients.client_config_options()['max_pool_connections']
+
+# The response header naming the cursor of the next page of an export
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class ExportPage(NamedTuple):
+    """
+    The position of one page of a segmented export: the number of segments the table
+    is split into, and the start key of each segment still to be read, or None for a
+    segment not read yet. Up to limit items are read from all segments together.
+    """
+    total_segments: int
+    start_keys: Dict[int, Optional[Dict[str, Any]]]
+    limit: int
+
+
+def total_segments_param(event: Dict[str, Any]) -> int:
+    """
+    Read the number of scan segments from the '?segments=' query parameter.
+
+    Parameters:
+    event (dict): The api gateway event.
+
+    Returns:
+    int: The number of segments to scan in parallel.
+    """
+    query_params = event.get('queryStringParameters') or {}
+
+    try:
+        total_segments = int(query_params.get('segments', DEFAULT_TOTAL_SEGMENTS))
+    except ValueError:
+        raise ValueError(f'segments must be an integer: "{query_params["segments"]}"')
+    if not 1 <= total_segments <= MAX_TOTAL_SEGMENTS:
+        raise ValueError(f'segments must be between 1 and {MAX_TOTAL_SEGMENTS}: "{total_segments}"')
+    return total_segments
+
+
+def export_page_param(event: Dict[str, Any]) -> ExportPage:
+    """
+    Read the page of an export from the '?segments=', '?limit=' and '?cursor=' query parameters.
+    A cursor, from the previous page, carries the segments itself.
+
+    Parameters:
+    event (dict): The api gateway event.
+
+    Returns:
+    ExportPage: The page to read.
+    """
+    # the cursor of an export decodes as any other, into the start position
+    params = page_params(event)
+    limit, position = params['Limit'], params.get('ExclusiveStartKey')
+    if position is None:
+        total_segments = total_segments_param(event)
+        return ExportPage(total_segments, dict.fromkeys(range(total_segments)), limit)
+
+    cursor = event['queryStringParameters']['cursor']
+    try:
+        total_segments = int(position['totalSegments'])
+        start_keys = { int(segment): start_key for segment, start_key in position['startKeys'].items() }
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ValueError(f'Invalid cursor: "{cursor}"')
+    if (not 1 <= total_segments <= MAX_TOTAL_SEGMENTS or not start_keys
+            or any(not 0 <= segment < total_segments or not isinstance(start_key, dict) for segment, start_key in start_keys.items())):
+        raise ValueError(f'Invalid cursor: "{cursor}"')
+    return ExportPage(total_segments, start_keys, limit)
+
+
+def next_export_cursor(page: ExportPage, next_keys: Dict[int, Dict[str, Any]]) -> Optional[str]:
+    """
+    Returns:
+    str: The cursor of the page after one whose unfinished segments stopped at next_keys,
+    or None if every segment has been read.
+    """
+    if not next_keys:
+        return None
+    return encode_cursor({ 'totalSegments': page.total_segments, 'startKeys': { str(segment): key for segment, key in next_keys.items() } })
+
+
+def segment_scan_params(page: ExportPage, segment: int, scan_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Returns:
+    dict: The parameters of the scan of one segment of a page, which reads its share of the page's limit.
+    """
+    params = dict(scan_params or {}, Segment=segment, TotalSegments=page.total_segments,
+                  Limit=math.ceil(page.limit / len(page.start_keys)))
+    if page.start_keys[segment]:
+        params['ExclusiveStartKey'] = page.start_keys[segment]
+    return params
+
+
+def scan_segments(table: Any, page: ExportPage, scan_params: Optional[Dict[str, Any]] = None) -> Tuple[List[List[Dict[str, Any]]], Dict[int, Dict[str, Any]]]:
+    """
+    Read one page of a segmented scan, with one scan call per unfinished segment, each on its own thread.
+
+    Parameters:
+    table: The DynamoDB table resource to scan.
+    page (ExportPage): The page to read.
+    scan_params (dict): Extra parameters passed on to every scan() call.
+
+    Returns:
+    tuple: The items read from each segment, and the start keys of the segments not finished yet.
+    """
+    segments = list(page.start_keys)
+    with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+        responses = list(executor.map(lambda segment: table.scan(**segment_scan_params(page, segment, scan_params)), segments))
+    return scanned_segments(segments, responses)
+
+
+async def scan_segments_async(table_name: str, page: ExportPage, scan_params: Optional[Dict[str, Any]] = None) -> Tuple[List[List[Dict[str, Any]]], Dict[int, Dict[str, Any]]]:
+    """
+    Read one page of a segmented scan like scan_segments, with the segments read concurrently on the async client.
+
+    Parameters:
+    table_name (str): The name of the table to scan.
+    page (ExportPage): The page to read.
+    scan_params (dict): Extra parameters passed on to every scan() call.
+
+    Returns:
+    tuple: The items read from each segment, and the start keys of the segments not finished yet.
+    """
+    ddb_client = await async_aws.client('dynamodb')
+    segments = list(page.start_keys)
+    responses = await async_aws.gather(*(
+        ddb_client.scan(TableName=table_name, **segment_scan_params(page, segment, scan_params)) for segment in segments
+    ))
+    return scanned_segments(segments, responses)
+
+
+def scanned_segments(segments: List[int], responses: List[Dict[str, Any]]) -> Tuple[List[List[Dict[str, Any]]], Dict[int, Dict[str, Any]]]:
+    """
+    Returns:
+    tuple: The items of the scan responses of segments, and the start keys of the segments not finished yet.
+    """
+    return (
+        [response.get('Items', []) for response in responses],
+        { segment: response['LastEvaluatedKey'] for segment, response in zip(segments, responses) if 'LastEvaluatedKey' in response }
+    )
+
+
+def ndjson_response(pages: Iterable[List[Dict[str, Any]]], next_cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Returns:
+    dict: The response object containing statusCode, headers and the pages of items as an ndjson body,
+    with the cursor of the next page, if any, in the X-Next-Cursor header.
+    """
+    # a page of an export is read once, and is stale as soon as the table changes
+    headers = { 'Content-Type': 'application/x-ndjson', 'Cache-Control': 'no-store' }
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': ''.join(iter_ndjson(pages))
+    }
+
+
+def iter_ndjson(pages: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """
+    Encode pages of items as newline-delimited json, one chunk per page.
+
+    Parameters:
+    pages (Iterable[list]): The pages of items, e.g. from scan_segments.
+
+    Returns:
+    Iterator[str]: One chunk of json lines per non-empty page.
+    """
+    for items in pages:
+        if items:
+            yield ''.join(codec.dumps(item) + '\n' for item in items)
@@ -0,0 +1,98 @@
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Pattern, Tuple
+from urllib.parse import unquote
+
+import async_aws
+import re
+
+# A path parameter of a template, e.g. {userName}
+PARAMETER = re.compile(r'\{(\w+)\}')
+
+
+class Route(NamedTuple):
+    """
+    A route of an API: requests with the method and a path matching the template,
+    e.g. 'GET' '/product/{id}', are handled by the function.
+
+    The function is called with the event. Its result becomes the body of the response,
+    unless the route is raw, when it is the whole response. A route may also have an
+    async variant of its function, which runs its independent aws calls concurrently.
+    """
+    method: str
+    template: str
+    function: Callable[[Dict[str, Any]], Any]
+    raw: bool = False
+    async_function: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+
+    def invoke(self, event: Dict[str, Any]) -> Any:
+        """
+        Call the route's function, or run its async variant if it has one and asyncio is enabled.
+
+        Parameters:
+        event (dict): The event, as returned by Router.match.
+
+        Returns:
+        The result of the function.
+        """
+        if self.async_function is not None and async_aws.enabled():
+            return async_aws.run(self.async_function(event))
+        return self.function(event)
+
+
+class Router:
+    """
+    A route table, compiled once when the handler module is imported.
+
+    API Gateway names the template it matched in the event's resource, which is looked
+    up directly. Events without one, e.g. from a local gateway, are matched on their path:
+    static paths directly, then templates by precompiled patterns, most specific first.
+    """
+
+    def __init__(self, routes: List[Route]) -> None:
+        self.routes = routes
+        self.by_template: Dict[Tuple[str, str], Route] = {}
+        self.patterns: Dict[str, List[Tuple[Pattern, Route]]] = {}
+
+        for route in routes:
+            self.by_template[(route.method, route.template)] = route
+            if PARAMETER.search(route.template):
+                pattern = re.compile('^' + PARAMETER.sub(r'(?P<\1>[^/]+)', route.template) + '/?$')
+                self.patterns.setdefault(route.method, []).append((pattern, route))
+
+        # /basket/{userName}/items before /basket/{userName}/{anything}
+        for patterns in self.patterns.values():
+            patterns.sort(key=lambda entry: len(PARAMETER.findall(entry[1].template)))
+
+    def match(self, event: Dict[str, Any]) -> Tuple[Route, Dict[str, Any]]:
+        """
+        Find the route of an API Gateway event.
+
+        Parameters:
+        event (dict): The event, with httpMethod and resource or path.
+
+        Returns:
+        tuple: The route, and the event with the path parameters the route names.
+        """
+        method = event.get('httpMethod')
+        route = self.by_template.get((method, event.get('resource')))
+        if route:
+            return route, event
+
+        path = event.get('path') or '/'
+        route = self.by_template.get((method, path.rstrip('/') or '/'))
+        if route:
+            return route, event
+
+        for pattern, route in self.patterns.get(method, []):
+            found = pattern.match(path)
+            if found:
+                parameters = { name: unquote(value) for name, value in found.groupdict().items() }
+                return route, { **event, 'resource': route.template, 'pathParameters': { **(event.get('pathParameters') or {}), **parameters } }
+
+        raise ValueError(f"Unsupported route: \"{method} {path}\"")
+
+    def templates(self, prefix: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Returns:
+        list: The (method, template) pairs of the routes, e.g. for a local gateway to serve.
+        """
+        return [(route.method, route.template) for route in self.routes if not prefix or route.template.startswith(prefix)]
@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+from typing import Any
+
+import codec
+import logging
+import os
+import random
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.01'))
+LOG_MAX_PAYLOAD = int(os.getenv('LOG_MAX_PAYLOAD', '2048'))
+
+_invocation = {
+    'requestId': None,
+    'sampled': False
+}
+
+
+class LazyJson:
+    """
+    Defers json serialization of a log argument until the record is actually emitted.
+
+    Payloads are cut off at LOG_MAX_PAYLOAD characters, except on sampled invocations.
+    """
+    __slots__ = ('payload',)
+
+    def __init__(self, payload: Any) -> None:
+        self.payload = payload
+
+    def __str__(self) -> str:
+        encoded = codec.dumps(self.payload, default=str)
+        if _invocation['sampled'] or len(encoded) <= LOG_MAX_PAYLOAD:
+            return encoded
+        return f'{encoded[:LOG_MAX_PAYLOAD]}...<{len(encoded) - LOG_MAX_PAYLOAD} more characters>'
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each log record as a single json line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'service': os.getenv('AWS_LAMBDA_FUNCTION_NAME'),
+            'requestId': _invocation['requestId'],
+            'sampled': _invocation['sampled'],
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            line['exception'] = self.formatException(record.exc_info)
+        return codec.dumps(line, default=str)
+
+
+def setup_logger() -> logging.Logger:
+    """
+    Configure the root logger to write json lines at LOG_LEVEL.
+
+    Returns:
+    logging.Logger: The root logger.
+    """
+    logger = logging.getLogger()
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+    for handler in logger.handlers:
+        handler.setFormatter(JsonFormatter())
+    logger.setLevel(LOG_LEVEL)
+
+    # keep sampled invocations from logging every aws sdk request
+    for sdk_logger in ('boto3', 'botocore', 'urllib3'):
+        logging.getLogger(sdk_logger).setLevel(logging.WARNING)
+    return logger
+
+
+def start_invocation(context: Any) -> None:
+    """
+    Tag the log lines of a new invocation with its request id, and decide whether
+    to sample it. Sampled invocations log at DEBUG with full payloads.
+
+    Parameters:
+    context: The context in which the Lambda function is called.
+    """
+    _invocation['requestId'] = getattr(context, 'aws_request_id', None)
+    _invocation['sampled'] = random.random() < LOG_SAMPLE_RATE
+    logging.getLogger().setLevel(logging.DEBUG if _invocation['sampled'] else LOG_LEVEL)
@@ -0,0 +1,34 @@
+from typing import Any, Dict, List
+
+import async_aws
+import aws_clients
+
+
+def transact_write(actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Run TransactWriteItems with actions written in the style of the boto3 table resource,
+    i.e. with plain python values in their Item, Key and ExpressionAttributeValues.
+
+    The client of the DynamoDB resource converts these values to and from DynamoDB
+    attribute values itself, as the table resource does.
+
+    Parameters:
+    actions (list): Up to 100 actions, e.g. { 'Put': { 'TableName': ..., 'Item': {...} } }.
+
+    Returns:
+    dict: The TransactWriteItems response.
+    """
+    return aws_clients.resource('dynamodb').meta.client.transact_write_items(TransactItems=actions)
+
+
+async def transact_write_async(actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Run TransactWriteItems with the same actions as transact_write, on the async client.
+
+    Parameters:
+    actions (list): Up to 100 actions, e.g. { 'Put': { 'TableName': ..., 'Item': {...} } }.
+
+    Returns:
+    dict: The TransactWriteItems response.
+    """
+    return await (await async_aws.client('dynamodb')).transact_write_items(TransactItems=actions)
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import time
+
+_MISSING = object()
+
+
+class TtlCache:
+    """
+    A bounded, least-recently-used cache whose entries expire after a fixed time to live.
+
+    It lives for as long as the lambda container stays warm, so it must only hold
+    data that is safe to serve up to ttl seconds stale.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for a key, counting a hit or a miss.
+
+        Parameters:
+        key: The cache key.
+        default: Returned when the key is not cached or has expired.
+
+        Returns:
+        The cached value, or default.
+        """
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        return default
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for a key, calling load() and caching its result on a miss.
+
+        Parameters:
+        key: The cache key.
+        load (callable): Reads the value when it is not cached.
+
+        Returns:
+        The cached or freshly loaded value.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = load()
+            self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Cache a value, evicting the least recently used entries beyond max_size.
+
+        Parameters:
+        key: The cache key.
+        value: The value to cache.
+        """
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> None:
+        """
+        Drop every entry whose key matches a predicate.
+
+        Parameters:
+        predicate (callable): Returns True for the keys to drop.
+        """
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+        dict: The size of the cache and its hit, miss and eviction counters.
+        """
+        return {
+            'size': len(self._entries),
+            'maxSize': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
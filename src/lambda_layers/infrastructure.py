@@ -10,9 +10,19 @@ class MssLambdaLayers(Construct):
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id)
 
-        self.boto3Layer = _lambda_python.PythonLayerVersion(
-            self, 'Boto3Layer',
-            entry=os.path.join(os.path.dirname(__file__) + '/boto3'),
+        # modules shared by all lambda runtimes; boto3 itself comes with the runtime
+        self.commonLayer = _lambda_python.PythonLayerVersion(
+            self, 'CommonLayer',
+            entry=os.path.join(os.path.dirname(__file__) + '/common'),
             compatible_runtimes=[_lambda.Runtime.PYTHON_3_10],
-            layer_version_name="Boto3Layer"
-        )
\ No newline at end of file
+            layer_version_name="CommonLayer"
+        )
+
+        # aiobotocore for the async variants of the routes, built only when they are
+        # enabled, since it brings its own pinned botocore along
+        self.asyncLayer = _lambda_python.PythonLayerVersion(
+            self, 'AsyncLayer',
+            entry=os.path.join(os.path.dirname(__file__) + '/aio'),
+            compatible_runtimes=[_lambda.Runtime.PYTHON_3_10],
+            layer_version_name="AsyncLayer"
+        ) if kwargs.get("asyncIo", False) else None
@@ -0,0 +1,93 @@
+from types import ModuleType
+from typing import Any, Dict
+
+import codec
+import importlib.util
+import os
+import sys
+
+RUNTIMES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = ('product', 'basket', 'order')
+# The service consuming the checkout events delivered by the queue or the event bus
+EVENT_SERVICE = 'order'
+# The settings of a service are prefixed with its name, e.g. PRODUCT__DYNAMODB_TABLE_NAME
+SETTINGS_SEPARATOR = '__'
+
+
+def import_file(name: str, path: str) -> ModuleType:
+    """
+    Returns:
+    module: The module in a file, imported under the given name.
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_service(service: str) -> ModuleType:
+    """
+    Import the index module of a service, as its own function would, next to the other services.
+
+    Every service has an index and a ddb_client module, so they are imported under the
+    service's name; and while they read their settings, the service's prefixed settings
+    are in the environment under their usual names.
+
+    Parameters:
+    service (str): The name of the service, e.g. 'product'.
+
+    Returns:
+    module: The index module of the service.
+    """
+    prefix = service.upper() + SETTINGS_SEPARATOR
+    settings = { name[len(prefix):]: value for name, value in os.environ.items() if name.startswith(prefix) }
+    saved = { name: os.environ.get(name) for name in settings }
+    os.environ.update(settings)
+    try:
+        service_dir = os.path.join(RUNTIMES_DIR, service)
+        # the index imports its ddb_client by that name
+        sys.modules['ddb_client'] = import_file(f'{service}_ddb_client', os.path.join(service_dir, 'ddb_client.py'))
+        return import_file(f'{service}_index', os.path.join(service_dir, 'index.py'))
+    finally:
+        del sys.modules['ddb_client']
+        for name, value in saved.items():
+            if value is None:
+                del os.environ[name]
+            else:
+                os.environ[name] = value
+
+
+# Imported once, when a container starts
+services = { service: load_service(service) for service in SERVICES }
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Entry point for the AWS Lambda function serving the product, basket and order APIs,
+    and the checkout events of the order service, in one warm container.
+
+    Each request is passed on to the handler of the service named by the first segment
+    of its path, which routes, instruments and encodes it as in its own function.
+
+    Parameters:
+    event (dict): The event triggering the Lambda function.
+    context: The context in which the Lambda function is called.
+
+    Returns:
+    dict: The response of the service's handler.
+    """
+    if 'httpMethod' not in event:
+        return services[EVENT_SERVICE].handler(event, context)
+
+    path = event.get('resource') or event.get('path') or '/'
+    service = services.get(path.strip('/').split('/')[0])
+    if service is None:
+        return {
+            'statusCode': 500,
+            'body': codec.dumps({
+                'message': "Failed to perform operation",
+                'errorMsg': f"Unsupported route: \"{event.get('httpMethod')} {path}\""
+            })
+        }
+    return service.handler(event, context)
@@ -1,7 +1,21 @@
-import boto3
+import aws_clients
 import os
 
-# Access DynamoDB table
-ddb_resource = boto3.resource('dynamodb')
-basket_table = ddb_resource.Table(os.getenv('DYNAMODB_TABLE_NAME'))
-basket_key = os.getenv('PRIMARY_KEY')
\ No newline at end of file
+basket_key = os.getenv('PRIMARY_KEY')
+outbox_table_name = os.getenv('OUTBOX_TABLE_NAME')
+
+# Table names are read at import, so that services sharing a function can each set their own
+basket_table_name = os.getenv('DYNAMODB_TABLE_NAME')
+
+# Access DynamoDB table, connecting on first use rather than at import
+_lazy_attributes = {
+    'ddb_resource': lambda: aws_clients.resource('dynamodb'),
+    'basket_table': lambda: aws_clients.table(basket_table_name)
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = globals()[name] = _lazy_attributes[name]()
+    return value
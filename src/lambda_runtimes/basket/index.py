@@ -1,22 +1,37 @@
+from batch_get import batch_get_items, batch_get_items_async
 from botocore.exceptions import ClientError
-from decimal import Decimal
-from typing import Any, Dict
-
+from compression import http_encoding
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from metrics import instrument
+from pagination import Page, encode_page_body, page_params, read_page
+from routing import Route, Router
+from structured_logging import LazyJson, setup_logger, start_invocation
+from transactions import transact_write, transact_write_async
+from typing import Any, Dict, List, Tuple
+
+import async_aws
+import codec
 import ddb_client as db
-import event_bridge_client as eb
-import logging
-import os
-import simplejson as json
+import uuid
 
-logger = logging.getLogger()
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+logger = setup_logger()
 
 GET = "GET"
 POST = "POST"
 DELETE = "DELETE"
-CHECKOUT_PATH = "/basket/checkout"
+BULK_CHECKOUT_MAX = 100
+BULK_CHECKOUT_WORKERS = 10
+PRODUCT_KEY = "productId"
+ITEM_UPDATE_MAX_ATTEMPTS = 3
+# as long as the outbox's dead-letter queue keeps the records that failed to publish
+OUTBOX_RETENTION = timedelta(days=14)
+IDEMPOTENCY_KEY = 'idempotencyKey'
 
 
+@instrument('basket')
+@http_encoding
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Entry point for the AWS Lambda function.
@@ -28,41 +43,22 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns:
     dict: The response object containing statusCode and body.
     """   
-    logger.info("request: %s", json.dumps(event))
+    start_invocation(context)
+    logger.info("request: %s", LazyJson(event))
 
     try:
-        body = None
-        http_method = event.get('httpMethod')
-        
-        if http_method == GET:
-            if event.get('pathParameters') and db.basket_key in event['pathParameters']:
-                body = get_basket(event['pathParameters'][db.basket_key])
-            else:
-                body = get_all_baskets()
-
-        elif http_method == POST:
-            if event.get('path') == CHECKOUT_PATH:
-                body = checkout_basket(event)
-            else:
-                body = create_basket(event)
-
-        elif http_method == DELETE:
-            if event.get('pathParameters') and db.basket_key in event['pathParameters']:
-                body = delete_basket(event['pathParameters'][db.basket_key])
-            else:
-                raise ValueError(f"{db.basket_key} must be specified on a DELETE request")
-
-        else:
-            raise ValueError(f"Unsupported route: \"{http_method}\"")
+        route, event = router.match(event)
+        body = route.invoke(event)
 
+        message = f'Successfully finished operation: "{route.method}"'
         response = {
             'statusCode': 200,
-            'body': json.dumps({
-                'message': f'Successfully finished operation: "{http_method}"',
+            'body': encode_page_body(message, body) if isinstance(body, Page) else codec.dumps({
+                'message': message,
                 'body': body
             })
         }
-        logger.info("response: %s", json.dumps(response))
+        logger.info("response: %s", LazyJson(response))
         return response
     
     except ClientError as e:
@@ -70,30 +66,42 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         logger.error("Client Error: %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': codec.dumps({
                 'message': "Failed to perform operation",
                 'errorMsg': error_msg
             })
         }  
     
+    except ValueError as e:
+        error_msg = str(e)
+        logger.error("Invalid request: %s", error_msg)
+        return {
+            'statusCode': 400,
+            'body': codec.dumps({
+                'message': "Failed to perform operation",
+                'errorMsg': error_msg
+            })
+        }
+
     except Exception as e:
         error_msg = str(e)
         logger.error("Exception: %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': codec.dumps({
                 'message': "Failed to perform operation",
                 'errorMsg': error_msg
             })
         }
 
 
-def get_basket(user_name: str) -> Dict[str, Any]:
+def get_basket(user_name: str, consistent_read: bool = False) -> Dict[str, Any]:
     """
     Retrieve a basket for a given user.
 
     Parameters:
     user_name (str): The username whose basket is to be retrieved.
+    consistent_read (bool): Whether to read the latest write of the basket.
 
     Returns:
     dict: A dictionary representing the basket.
@@ -101,29 +109,34 @@ def get_basket(user_name: str) -> Dict[str, Any]:
     logger.debug('get_basket, user_name: %s', user_name)
 
     params = {
-        'Key': { db.basket_key: user_name }
+        'Key': { db.basket_key: user_name },
+        'ConsistentRead': consistent_read
     }
     response = db.basket_table.get_item(**params)      
     item = response.get('Item')
     
-    logger.debug('get_basket, result: %s', json.dumps(item))       
+    logger.debug('get_basket, result: %s', LazyJson(item))       
     return item if item else {}
 
 
-def get_all_baskets() -> Dict[str,Any]:
+def get_all_baskets(event: Dict[str,Any]) -> Page:
     """
-    Retrieve all baskets.
+    Retrieve one page of all baskets.
+
+    Parameters:
+    event (dict): The event with optional '?limit=' and '?cursor=' query parameters.
 
     Returns:
-    dict: A dictionary containing all baskets.
+    Page: The baskets on this page and the cursor for the next page.
     """
     logger.debug("get_all_baskets")
 
-    response = db.basket_table.scan()      
-    items = response.get('Items', {})
+    params = page_params(event)
+    response = db.basket_table.scan(**params)      
+    page = read_page(response)
     
-    logger.debug('get_all_baskets, result: %s', json.dumps(items)) 
-    return items
+    logger.debug('get_all_baskets, count: %d, next_cursor: %s', len(page.items), page.next_cursor) 
+    return page
 
 
 def create_basket(event: Dict[str,Any]) -> Dict[str,Any]:
@@ -138,15 +151,26 @@ def create_basket(event: Dict[str,Any]) -> Dict[str,Any]:
     """    
     logger.debug('create_basket')
 
-    basket_request = json.loads(event['body'], parse_float=Decimal)
-    logger.debug('create_basket, request: %s', json.dumps(basket_request))
+    basket_request = codec.loads(event['body'])
+    logger.debug('create_basket, request: %s', LazyJson(basket_request))
+
+    items = basket_request.get('items') or []
+    if not isinstance(items, list):
+        raise ValueError(f'items should be a list: "{items}"')
+    for item in items:
+        validate_basket_item(item)
+    # productIds is a set, so it cannot tell two items of the same product apart
+    product_ids = [item[PRODUCT_KEY] for item in items]
+    if len(set(product_ids)) < len(product_ids):
+        duplicates = sorted({ product_id for product_id in product_ids if product_ids.count(product_id) > 1 })
+        raise ValueError(f'Products should appear in a basket once: "{", ".join(duplicates)}"')
 
     params = {
-        'Item': basket_request
+        'Item': { **basket_request, **basket_totals(items) }
     }
     create_result = db.basket_table.put_item(**params)       
 
-    logger.debug('create_basket, result: %s', json.dumps(create_result))      
+    logger.debug('create_basket, result: %s', LazyJson(create_result))      
     return create_result
 
 
@@ -167,10 +191,185 @@ def delete_basket(user_name: str) -> Dict[str,Any]:
     }
     delete_result = db.basket_table.delete_item(**params)       
 
-    logger.debug('delete_basket, result: %s', json.dumps(delete_result)) 
+    logger.debug('delete_basket, result: %s', LazyJson(delete_result)) 
     return delete_result
 
 
+def validate_basket_item(item: Any) -> None:
+    """
+    Check that an item of a request can be kept in a basket: it names a product and has a numeric price.
+
+    Parameters:
+    item: The item, as decoded from the request body.
+    """
+    if not isinstance(item, dict) or not item.get(PRODUCT_KEY) or 'price' not in item:
+        raise ValueError(f'{PRODUCT_KEY} and price should exist in item: "{item}"')
+    try:
+        price = Decimal(str(item['price']))
+    except InvalidOperation:
+        price = None
+    if price is None or not price.is_finite():
+        raise ValueError(f'price should be a number in item: "{item}"')
+
+
+def basket_totals(items: List[Dict[str,Any]]) -> Dict[str,Any]:
+    """
+    Compute the attributes a basket keeps up to date alongside its items, so that items
+    can be added and removed one at a time.
+
+    Parameters:
+    items (list): The items in the basket.
+
+    Returns:
+    dict: The basket's totalPrice and, unless the basket is empty, the set of its productIds.
+    """
+    totals = { 'totalPrice': sum(Decimal(str(item['price'])) for item in items) }
+    product_ids = { item[PRODUCT_KEY] for item in items if item.get(PRODUCT_KEY) }
+    if product_ids:
+        totals['productIds'] = product_ids
+    return totals
+
+
+def add_basket_item(user_name: str, event: Dict[str,Any]) -> Dict[str,Any]:
+    """
+    Add one item to a basket with UpdateItem, creating the basket if it does not exist,
+    without rewriting the items already in the basket.
+
+    The write is conditional on the product not being in the basket yet. Baskets written
+    before totalPrice and productIds were maintained have them filled in first.
+
+    Parameters:
+    user_name (str): The username whose basket the item is added to.
+    event (dict): The event whose body holds the item.
+
+    Returns:
+    dict: The result of the update operation.
+    """
+    logger.debug('add_basket_item, user_name: %s', user_name)
+
+    item = codec.loads(event.get('body') or '{}')
+    logger.debug('add_basket_item, request: %s', LazyJson(item))
+    validate_basket_item(item)
+
+    params = {
+        'Key': { db.basket_key: user_name },
+        'UpdateExpression': 'SET #items = list_append(if_not_exists(#items, :empty), :item), '
+                            'totalPrice = if_not_exists(totalPrice, :zero) + :price '
+                            'ADD productIds :productIds',
+        'ConditionExpression': 'NOT contains(productIds, :productId) '
+                               'AND ((attribute_exists(totalPrice) AND attribute_exists(productIds)) '
+                               'OR attribute_not_exists(#items) OR size(#items) = :none)',
+        'ExpressionAttributeNames': { '#items': 'items' },
+        'ExpressionAttributeValues': {
+            ':item': [item],
+            ':empty': [],
+            ':zero': Decimal(0),
+            ':none': 0,
+            ':price': Decimal(str(item['price'])),
+            ':productId': item[PRODUCT_KEY],
+            ':productIds': { item[PRODUCT_KEY] }
+        }
+    }
+
+    for _ in range(ITEM_UPDATE_MAX_ATTEMPTS):
+        try:
+            update_result = db.basket_table.update_item(**params)
+            logger.debug('add_basket_item, result: %s', LazyJson(update_result))
+            return update_result
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+        basket = get_basket(user_name, consistent_read=True)
+        if any(basket_item.get(PRODUCT_KEY) == item[PRODUCT_KEY] for basket_item in basket.get('items', [])):
+            raise ValueError(f'Product "{item[PRODUCT_KEY]}" is already in the basket of user "{user_name}"')
+        backfill_basket_totals(basket)
+
+    raise ValueError(f'Basket for user "{user_name}" was changed while adding an item')
+
+
+def remove_basket_item(user_name: str, product_id: str) -> Dict[str,Any]:
+    """
+    Remove one item from a basket with UpdateItem, without rewriting the remaining items.
+
+    Items are stored as a list, so the item's position is read first, and the write is
+    conditional on the basket still holding the same number of items with the product at
+    that position. The totals are set from the remaining items, which also fills them in
+    on baskets written before they were maintained.
+
+    Parameters:
+    user_name (str): The username whose basket the item is removed from.
+    product_id (str): The product to remove.
+
+    Returns:
+    dict: The result of the update operation.
+    """
+    logger.debug('remove_basket_item, user_name: %s, product_id: %s', user_name, product_id)
+
+    for _ in range(ITEM_UPDATE_MAX_ATTEMPTS):
+        response = db.basket_table.get_item(
+            Key={ db.basket_key: user_name },
+            ProjectionExpression='#items',
+            ExpressionAttributeNames={ '#items': 'items' },
+            ConsistentRead=True
+        )
+        items = response.get('Item', {}).get('items', [])
+        index = next((i for i, item in enumerate(items) if item.get(PRODUCT_KEY) == product_id), None)
+        if index is None:
+            raise ValueError(f'Product "{product_id}" is not in the basket of user "{user_name}"')
+
+        # an empty set cannot be stored, so the last item takes productIds with it
+        totals = basket_totals(items[:index] + items[index + 1:])
+        params = {
+            'Key': { db.basket_key: user_name },
+            'UpdateExpression': (f'REMOVE #items[{index}]' + ('' if 'productIds' in totals else ', productIds')
+                                 + ' SET ' + ', '.join(f'{name} = :{name}' for name in totals)),
+            'ConditionExpression': f'#items[{index}].{PRODUCT_KEY} = :productId AND size(#items) = :size',
+            'ExpressionAttributeNames': { '#items': 'items' },
+            'ExpressionAttributeValues': {
+                **{ f':{name}': value for name, value in totals.items() },
+                ':productId': product_id,
+                ':size': len(items)
+            }
+        }
+        try:
+            update_result = db.basket_table.update_item(**params)
+            logger.debug('remove_basket_item, result: %s', LazyJson(update_result))
+            return update_result
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    raise ValueError(f'Basket for user "{user_name}" was changed while removing an item')
+
+
+def backfill_basket_totals(basket: Dict[str,Any]) -> None:
+    """
+    Fill in the totals of a basket written before they were maintained, or whose
+    productIds were lost. Does nothing if the basket was changed since it was read.
+
+    Parameters:
+    basket (dict): The basket, as it was read.
+    """
+    if not basket.get('items') or ('totalPrice' in basket and 'productIds' in basket):
+        return
+    logger.debug('backfill_basket_totals, user_name: %s', basket[db.basket_key])
+
+    totals = basket_totals(basket['items'])
+    params = {
+        'Key': { db.basket_key: basket[db.basket_key] },
+        'UpdateExpression': 'SET ' + ', '.join(f'{name} = :{name}' for name in totals),
+        'ConditionExpression': '#items = :items',
+        'ExpressionAttributeNames': { '#items': 'items' },
+        'ExpressionAttributeValues': { ':items': basket['items'], **{ f':{name}': value for name, value in totals.items() } }
+    }
+    try:
+        db.basket_table.update_item(**params)
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
 def checkout_basket(event: Dict[str,Any]) -> Dict[str,Any]:
     """
     Checkout a basket for a given user.
@@ -184,25 +383,137 @@ def checkout_basket(event: Dict[str,Any]) -> Dict[str,Any]:
     logger.debug('checkout_basket')
 
     event_body = event.get('body', '{}')
-    checkout_request = json.loads(event_body, parse_float=Decimal)
-    logger.debug('checkout_basket, request: %s', json.dumps(checkout_request))
+    checkout_request = codec.loads(event_body)
+    logger.debug('checkout_basket, request: %s', LazyJson(checkout_request))
     
     if not checkout_request or not checkout_request.get(db.basket_key):
         raise ValueError(f'{db.basket_key} should exist in checkoutRequest: "{checkout_request}"')
     user_name = checkout_request.get(db.basket_key)
 
-    basket = get_basket(user_name)
+    basket = get_basket(user_name, consistent_read=True)
     if not basket:
         raise ValueError(f'No basket found for user "{user_name}"')
     
-    checkout_payload = prepare_order_payload(checkout_request, basket)
-    published_event = publish_checkout_basket_event(checkout_payload)
-    delete_basket(user_name)
+    checkout_payload = prepare_order_payload(checkout_request, dict(basket))
+    published_event = publish_checkout_basket_event(checkout_payload, basket)
 
-    logger.debug('checkout_basket, result: %s', json.dumps(published_event))
+    logger.debug('checkout_basket, result: %s', LazyJson(published_event))
     return published_event
 
-    
+
+def bulk_checkout_baskets(event: Dict[str,Any]) -> List[Dict[str,Any]]:
+    """
+    Checkout the baskets of many users, reading all baskets with BatchGetItem and
+    running their checkout transactions concurrently. One basket failing to check out
+    does not stop the others.
+
+    Parameters:
+    event (dict): The event whose body holds { "checkouts": [ checkoutRequest, ... ] }.
+
+    Returns:
+    list: The outcome of each checkout, in request order.
+    """
+    logger.debug('bulk_checkout_baskets')
+
+    checkout_requests, keys = bulk_checkout_requests(event)
+    baskets = {
+        basket[db.basket_key]: basket
+        for basket in batch_get_items(db.basket_table_name, keys, consistent_read=True)
+    }
+
+    def checkout(checkout_request: Dict[str,Any]) -> Dict[str,Any]:
+        user_name = checkout_request[db.basket_key]
+        try:
+            basket = checked_out_basket(baskets, user_name)
+            checkout_payload = prepare_order_payload(checkout_request, dict(basket))
+            published_event = publish_checkout_basket_event(checkout_payload, basket)
+            return { db.basket_key: user_name, 'status': 'checkedOut', **published_event }
+        except Exception as e:
+            return checkout_failure(user_name, e)
+
+    with ThreadPoolExecutor(max_workers=min(BULK_CHECKOUT_WORKERS, len(checkout_requests))) as executor:
+        results = list(executor.map(checkout, checkout_requests))
+
+    logger.debug('bulk_checkout_baskets, result: %s', LazyJson(results))
+    return results
+
+
+async def bulk_checkout_baskets_async(event: Dict[str,Any]) -> List[Dict[str,Any]]:
+    """
+    Checkout the baskets of many users like bulk_checkout_baskets, with the chunks of
+    baskets read and all checkout transactions run concurrently on the async client.
+    """
+    logger.debug('bulk_checkout_baskets_async')
+
+    checkout_requests, keys = bulk_checkout_requests(event)
+    baskets = {
+        basket[db.basket_key]: basket
+        for basket in await batch_get_items_async(db.basket_table_name, keys, consistent_read=True)
+    }
+
+    async def checkout(checkout_request: Dict[str,Any]) -> Dict[str,Any]:
+        user_name = checkout_request[db.basket_key]
+        try:
+            basket = checked_out_basket(baskets, user_name)
+            checkout_payload = prepare_order_payload(checkout_request, dict(basket))
+            published_event = await publish_checkout_basket_event_async(checkout_payload, basket)
+            return { db.basket_key: user_name, 'status': 'checkedOut', **published_event }
+        except Exception as e:
+            return checkout_failure(user_name, e)
+
+    results = await async_aws.gather(*map(checkout, checkout_requests))
+
+    logger.debug('bulk_checkout_baskets_async, result: %s', LazyJson(results))
+    return results
+
+
+def bulk_checkout_requests(event: Dict[str,Any]) -> Tuple[List[Dict[str,Any]], List[Dict[str,Any]]]:
+    """
+    Read and validate the checkout requests of a bulk checkout.
+
+    Parameters:
+    event (dict): The event whose body holds { "checkouts": [ checkoutRequest, ... ] }.
+
+    Returns:
+    tuple: The checkout requests, and the keys of their baskets.
+    """
+    checkout_requests = codec.loads(event.get('body') or '{}').get('checkouts')
+    if not isinstance(checkout_requests, list) or not checkout_requests:
+        raise ValueError('checkouts should be a non-empty list of checkout requests')
+    if len(checkout_requests) > BULK_CHECKOUT_MAX:
+        raise ValueError(f'At most {BULK_CHECKOUT_MAX} baskets can be checked out at once')
+    for checkout_request in checkout_requests:
+        if not isinstance(checkout_request, dict) or not checkout_request.get(db.basket_key):
+            raise ValueError(f'{db.basket_key} should exist in checkoutRequest: "{checkout_request}"')
+
+    user_names = list(dict.fromkeys(checkout_request[db.basket_key] for checkout_request in checkout_requests))
+    if len(user_names) != len(checkout_requests):
+        raise ValueError(f'Each {db.basket_key} can be checked out only once per request')
+
+    return checkout_requests, [{ db.basket_key: user_name } for user_name in user_names]
+
+
+def checked_out_basket(baskets: Dict[str,Dict[str,Any]], user_name: str) -> Dict[str,Any]:
+    """
+    Returns:
+    dict: The basket of a user in a bulk checkout, which must exist.
+    """
+    basket = baskets.get(user_name)
+    if not basket:
+        raise ValueError(f'No basket found for user "{user_name}"')
+    return basket
+
+
+def checkout_failure(user_name: str, error: Exception) -> Dict[str,Any]:
+    """
+    Returns:
+    dict: The outcome of a checkout of a bulk checkout that failed.
+    """
+    error_msg = error.response["Error"]["Message"] if isinstance(error, ClientError) else str(error)
+    logger.error("Failed to checkout basket: %s, user_name: %s", error_msg, user_name)
+    return { db.basket_key: user_name, 'status': 'failed', 'errorMsg': error_msg }
+
+
 def prepare_order_payload(checkout_request: Dict[str,Any], basket: Dict[str,Any]) -> Dict[str,Any]:
     """
     Prepare the payload for order creation.
@@ -219,38 +530,133 @@ def prepare_order_payload(checkout_request: Dict[str,Any], basket: Dict[str,Any]
     if not ('items' in basket and isinstance(basket['items'], list) and basket['items']):
         raise ValueError( f'Basket should contain a list of items: "{basket}"')
     
-    total_price = sum(Decimal(str(item['price'])) for item in basket['items'])
-    checkout_request['totalPrice'] = total_price
+    # totalPrice is maintained as items are added and removed; only older baskets need summing
+    if 'totalPrice' not in basket:
+        basket['totalPrice'] = basket_totals(basket['items'])['totalPrice']
+    basket.pop('productIds', None)
     checkout_request.update(basket)
-    logger.debug('Successfully prepared order payload: %s', json.dumps(checkout_request))
+    logger.debug('Successfully prepared order payload: %s', LazyJson(checkout_request))
 
     return checkout_request
        
     
-def publish_checkout_basket_event(checkout_payload: Dict[str,Any]) -> Dict[str,Any]:
+def publish_checkout_basket_event(checkout_payload: Dict[str,Any], basket: Dict[str,Any]) -> Dict[str,Any]:
     """
-    Publish the checkout event to the event bus.
+    Publish the checkout event through the outbox table, in the same transaction that deletes the basket.
+
+    The outbox publisher forwards the event to the event bus from the outbox table's stream.
+    The transaction fails if the basket was changed or checked out since it was read.
 
     Parameters:
     checkout_payload (dict): The payload for the checkout event
+    basket (dict): The basket being checked out, as it was read.
 
     Returns:
-    dict: The result of the event publish operation.
+    dict: The id of the outbox entry holding the event.
     """   
-    logger.info('publish_checkout_basket_event, payload: %s', json.dumps(checkout_payload))
-
-    response = eb.client.put_events(
-        Entries=[
-            {
-                'Source': eb.event_source,
-                'Resources': [],
-                'Detail': json.dumps(checkout_payload),
-                'DetailType': eb.detail_type,
-                'EventBusName': eb.event_busname
-            }
-        ]
-    )
+    actions, response = checkout_transaction(checkout_payload, basket)
+    try:
+        transact_write(actions)
+    except ClientError as e:
+        raise checkout_error(e, basket)
 
-    logger.debug('publish_checkout_basket_event, response: %s', json.dumps(response))
+    logger.debug('publish_checkout_basket_event, response: %s', LazyJson(response))
     return response
 
+
+async def publish_checkout_basket_event_async(checkout_payload: Dict[str,Any], basket: Dict[str,Any]) -> Dict[str,Any]:
+    """
+    Publish the checkout event like publish_checkout_basket_event, on the async client.
+    """
+    actions, response = checkout_transaction(checkout_payload, basket)
+    try:
+        await transact_write_async(actions)
+    except ClientError as e:
+        raise checkout_error(e, basket)
+
+    logger.debug('publish_checkout_basket_event_async, response: %s', LazyJson(response))
+    return response
+
+
+def checkout_transaction(checkout_payload: Dict[str,Any], basket: Dict[str,Any]) -> Tuple[List[Dict[str,Any]], Dict[str,Any]]:
+    """
+    Build the transaction deleting a basket and putting its checkout event into the outbox table.
+
+    Parameters:
+    checkout_payload (dict): The payload for the checkout event
+    basket (dict): The basket being checked out, as it was read.
+
+    Returns:
+    tuple: The actions of the transaction, and the response once it succeeds.
+    """
+    # the outbox entry id doubles as the idempotency key, so that the order service
+    # writes one order however many times the event is delivered
+    entry_id = str(uuid.uuid4())
+    checkout_payload[IDEMPOTENCY_KEY] = entry_id
+    logger.info('publish_checkout_basket_event, payload: %s', LazyJson(checkout_payload))
+
+    now = datetime.now(timezone.utc)
+    outbox_entry = {
+        'id': entry_id,
+        'detail': codec.dumps(checkout_payload),
+        'createdAt': now.isoformat(),
+        'expiresAt': int((now + OUTBOX_RETENTION).timestamp())
+    }
+
+    actions = [
+        {
+            'Delete': {
+                'TableName': db.basket_table_name,
+                'Key': { db.basket_key: basket[db.basket_key] },
+                'ConditionExpression': '#items = :items',
+                'ExpressionAttributeNames': { '#items': 'items' },
+                'ExpressionAttributeValues': { ':items': basket['items'] }
+            }
+        },
+        {
+            'Put': {
+                'TableName': db.outbox_table_name,
+                'Item': outbox_entry,
+                # a repeated key would overwrite an entry that may already be published
+                'ConditionExpression': 'attribute_not_exists(#id)',
+                'ExpressionAttributeNames': { '#id': 'id' }
+            }
+        }
+    ]
+    return actions, { 'outboxEntryId': outbox_entry['id'] }
+
+
+def checkout_error(error: ClientError, basket: Dict[str,Any]) -> Exception:
+    """
+    Returns:
+    Exception: The error to raise for a failed checkout transaction.
+    """
+    if error.response['Error']['Code'] == 'TransactionCanceledException':
+        # the reasons are in the order of the actions: the basket's Delete, then the outbox Put
+        codes = [reason.get('Code', 'None') for reason in error.response.get('CancellationReasons', [])]
+        if codes[1:2] == ['ConditionalCheckFailed'] and codes[0] != 'ConditionalCheckFailed':
+            return ValueError(f'Checkout of the basket of user "{basket[db.basket_key]}" repeats an {IDEMPOTENCY_KEY} already in the outbox')
+        return ValueError(f'Basket for user "{basket[db.basket_key]}" was changed or checked out during checkout')
+    return error
+
+
+def path_user_name(event: Dict[str,Any]) -> str:
+    """
+    Returns:
+    str: The user name in the path of a request.
+    """
+    return event['pathParameters'][db.basket_key]
+
+
+# Compiled once, when a container starts
+router = Router([
+    Route(GET, '/basket', get_all_baskets),
+    Route(GET, '/basket/{userName}', lambda event: get_basket(path_user_name(event))),
+    Route(POST, '/basket', create_basket),
+    Route(POST, '/basket/{userName}/items', lambda event: add_basket_item(path_user_name(event), event)),
+    Route(POST, '/basket/checkout', checkout_basket),
+    Route(POST, '/basket/checkout/bulk', bulk_checkout_baskets, async_function=bulk_checkout_baskets_async),
+    Route(DELETE, '/basket/{userName}', lambda event: delete_basket(path_user_name(event))),
+    Route(DELETE, '/basket/{userName}/items/{productId}',
+        lambda event: remove_basket_item(path_user_name(event), event['pathParameters'][PRODUCT_KEY]))
+])
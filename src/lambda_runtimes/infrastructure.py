@@ -1,68 +1,195 @@
 import os
 
+from typing import List
+
 from aws_cdk import (
+        Duration,
         aws_lambda as _lambda,
         aws_lambda_python_alpha as _lambda_python
 )
 from aws_cdk.aws_dynamodb import (Table)
+from src.database.infrastructure import (
+        PRODUCT_CATEGORY_NAME_INDEX,
+        PRODUCT_CATEGORY_PRICE_INDEX,
+        ORDER_DAY_INDEX
+)
 from constructs import Construct
 
 class MssLambdaRuntimes(Construct):
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id)  
 
-        self.productFunction = self.create_product_function(kwargs["productTable"], kwargs["boto3Layer"])
-        self.basketFunction = self.create_basket_function(kwargs["basketTable"], kwargs["boto3Layer"])
-        self.orderFunction = self.create_order_function(kwargs["orderTable"], kwargs["boto3Layer"])
+        layers = [kwargs["commonLayer"]]
+        asyncIo = kwargs.get("asyncIo", False)
+        if asyncIo:
+            layers.append(kwargs["asyncLayer"])
+        self.logSampleRate = kwargs.get("logSampleRate", "0.01")
+        # a batch of 100 queued orders, written with retries and backoff, outlasts the default 3 seconds
+        self.orderTimeout = kwargs.get("orderTimeout", Duration.seconds(30))
+
+        # botocore settings shared by the dynamodb and eventbridge clients of every function
+        self.clientEnvironment = {
+            'CLIENT_MAX_POOL_CONNECTIONS': '25',
+            'CLIENT_CONNECT_TIMEOUT': '1',
+            'CLIENT_READ_TIMEOUT': '2',
+            'CLIENT_TCP_KEEPALIVE': 'true',
+            'CLIENT_RETRY_MODE': 'standard',
+            'CLIENT_MAX_ATTEMPTS': '3',
+            # routes with independent calls run them concurrently on aiobotocore clients,
+            # when the async layer is attached; otherwise they fan out on threads
+            'ASYNC_IO': 'true' if asyncIo else 'false',
+            **kwargs.get("clientConfig", {})
+        }
+
+        if kwargs.get("singleFunction", False):
+            # one function serves the product, basket and order APIs, so that a
+            # low-traffic environment keeps one warm container rather than three
+            self.apiFunction = self.create_api_function(kwargs["productTable"], kwargs["basketTable"], kwargs["outboxTable"],
+                kwargs["orderTable"], kwargs["orderSummaryTable"], kwargs["idempotencyTable"], layers,
+                kwargs.get("apiLogLevel", "INFO"))
+            self.productFunction = self.basketFunction = self.orderFunction = self.apiFunction
+        else:
+            self.productFunction = self.create_product_function(kwargs["productTable"], layers,
+                kwargs.get("productLogLevel", "INFO"))
+            self.basketFunction = self.create_basket_function(kwargs["basketTable"], kwargs["outboxTable"], layers,
+                kwargs.get("basketLogLevel", "INFO"))
+            self.orderFunction = self.create_order_function(kwargs["orderTable"], kwargs["orderSummaryTable"],
+                kwargs["idempotencyTable"], layers,
+                kwargs.get("orderLogLevel", "INFO"))
+        self.outboxFunction = self.create_outbox_function(layers,
+            kwargs.get("outboxLogLevel", "INFO"))
+
+    def product_environment(self, productTable: Table):
+        return { 'DYNAMODB_TABLE_NAME': productTable.table_name, 
+                 'PRIMARY_KEY': productTable.schema().partition_key.name,
+                 'CATEGORY_NAME_INDEX': PRODUCT_CATEGORY_NAME_INDEX,
+                 'CATEGORY_PRICE_INDEX': PRODUCT_CATEGORY_PRICE_INDEX,
+                 'PRODUCT_CACHE_SIZE': '1000',
+                 'PRODUCT_CACHE_TTL': '30',
+                 'PRODUCT_MAX_AGE': '30' }
 
-    def create_product_function(self, productTable: Table, layer: _lambda.ILayerVersion):
+    def basket_environment(self, basketTable: Table, outboxTable: Table):
+        return { 'DYNAMODB_TABLE_NAME': basketTable.table_name, 
+                 'PRIMARY_KEY': basketTable.schema().partition_key.name,
+                 'OUTBOX_TABLE_NAME': outboxTable.table_name }
+
+    def order_environment(self, orderTable: Table, orderSummaryTable: Table, idempotencyTable: Table):
+        return { 'DYNAMODB_TABLE_NAME': orderTable.table_name, 
+                 'PARTITION_KEY': orderTable.schema().partition_key.name, 
+                 'SORT_KEY': orderTable.schema().sort_key.name,
+                 'ORDER_SUMMARY_TABLE_NAME': orderSummaryTable.table_name,
+                 'ORDER_DAY_INDEX': ORDER_DAY_INDEX,
+                 'IDEMPOTENCY_TABLE_NAME': idempotencyTable.table_name }
+
+    def create_product_function(self, productTable: Table, layers: List[_lambda.ILayerVersion], logLevel: str):
         productFunction = _lambda_python.PythonFunction(
             self, 'productLambdaFunction',
             runtime=_lambda.Runtime.PYTHON_3_10,
             index='index.py',
             handler='handler',
             entry=os.path.join(os.path.dirname(__file__) + '/product'),
-            environment={ 'DYNAMODB_TABLE_NAME': productTable.table_name, 
-                         'PRIMARY_KEY': productTable.schema().partition_key.name,
-                         'LOG_LEVEL': 'DEBUG' },
-            layers=[layer],
+            environment={ **self.product_environment(productTable),
+                         'EXPORT_SEGMENTS': '8',
+                         'LOG_LEVEL': logLevel,
+                         'LOG_SAMPLE_RATE': self.logSampleRate,
+                         **self.clientEnvironment },
+            layers=layers,
             function_name="ProductFunction"
         )
 
         productTable.grant_read_write_data(productFunction)
         return productFunction
     
-    def create_basket_function(self, basketTable: Table, layer: _lambda.ILayerVersion):
+    def create_basket_function(self, basketTable: Table, outboxTable: Table, layers: List[_lambda.ILayerVersion], logLevel: str):
         basketFunction = _lambda_python.PythonFunction(
             self, 'basketLambdaFunction',
             runtime=_lambda.Runtime.PYTHON_3_10,
             index='index.py',
             handler='handler',
             entry=os.path.join(os.path.dirname(__file__) + '/basket'),
-            environment={ 'DYNAMODB_TABLE_NAME': basketTable.table_name, 
-                         'PRIMARY_KEY': basketTable.schema().partition_key.name,
-                         'LOG_LEVEL': 'DEBUG' },
-            layers=[layer],
+            environment={ **self.basket_environment(basketTable, outboxTable),
+                         'LOG_LEVEL': logLevel,
+                         'LOG_SAMPLE_RATE': self.logSampleRate,
+                         **self.clientEnvironment },
+            layers=layers,
             function_name="BasketFunction"
         )
 
         basketTable.grant_read_write_data(basketFunction)
+        outboxTable.grant_write_data(basketFunction)
         return basketFunction
 
-    def create_order_function(self, orderTable: Table, layer: _lambda.ILayerVersion):
+    def create_order_function(self, orderTable: Table, orderSummaryTable: Table, idempotencyTable: Table, layers: List[_lambda.ILayerVersion], logLevel: str):
         orderFunction = _lambda_python.PythonFunction(
             self, 'orderLambdaFunction',
             runtime=_lambda.Runtime.PYTHON_3_10,
             index='index.py',
             handler='handler',
             entry=os.path.join(os.path.dirname(__file__) + '/order'),
-            environment={ 'DYNAMODB_TABLE_NAME': orderTable.table_name, 
-                         'PARTITION_KEY': orderTable.schema().partition_key.name, 
-                         'SORT_KEY': orderTable.schema().sort_key.name,
-                         'LOG_LEVEL': 'DEBUG' },
-            layers=[layer],
+            environment={ **self.order_environment(orderTable, orderSummaryTable, idempotencyTable),
+                         'EXPORT_SEGMENTS': '8',
+                         'LOG_LEVEL': logLevel,
+                         'LOG_SAMPLE_RATE': self.logSampleRate,
+                         **self.clientEnvironment },
+            layers=layers,
+            timeout=self.orderTimeout,
             function_name="OrderFunction"
         )
 
         orderTable.grant_read_write_data(orderFunction)
+        orderSummaryTable.grant_read_write_data(orderFunction)
+        idempotencyTable.grant_write_data(orderFunction)
         return orderFunction
+
+    def create_api_function(self, productTable: Table, basketTable: Table, outboxTable: Table,
+            orderTable: Table, orderSummaryTable: Table, idempotencyTable: Table, layers: List[_lambda.ILayerVersion], logLevel: str):
+        # each service reads its own settings, prefixed with its name, e.g. PRODUCT__DYNAMODB_TABLE_NAME
+        serviceEnvironments = {
+            'PRODUCT': self.product_environment(productTable),
+            'BASKET': self.basket_environment(basketTable, outboxTable),
+            'ORDER': self.order_environment(orderTable, orderSummaryTable, idempotencyTable)
+        }
+        apiFunction = _lambda_python.PythonFunction(
+            self, 'apiLambdaFunction',
+            runtime=_lambda.Runtime.PYTHON_3_10,
+            index='api/index.py',
+            handler='handler',
+            entry=os.path.dirname(__file__),
+            bundling=_lambda_python.BundlingOptions(asset_excludes=['infrastructure.py', '__pycache__', 'outbox']),
+            environment={ **{ f'{service}__{name}': value
+                              for service, environment in serviceEnvironments.items()
+                              for name, value in environment.items() },
+                         'EXPORT_SEGMENTS': '8',
+                         'LOG_LEVEL': logLevel,
+                         'LOG_SAMPLE_RATE': self.logSampleRate,
+                         **self.clientEnvironment },
+            layers=layers,
+            # it consumes the order queue too
+            timeout=self.orderTimeout,
+            function_name="ApiFunction"
+        )
+
+        productTable.grant_read_write_data(apiFunction)
+        basketTable.grant_read_write_data(apiFunction)
+        outboxTable.grant_write_data(apiFunction)
+        orderTable.grant_read_write_data(apiFunction)
+        orderSummaryTable.grant_read_write_data(apiFunction)
+        idempotencyTable.grant_write_data(apiFunction)
+        return apiFunction
+
+    def create_outbox_function(self, layers: List[_lambda.ILayerVersion], logLevel: str):
+        # the event bus and the outbox table's stream are wired up by MssEventBus
+        outboxFunction = _lambda_python.PythonFunction(
+            self, 'outboxLambdaFunction',
+            runtime=_lambda.Runtime.PYTHON_3_10,
+            index='index.py',
+            handler='handler',
+            entry=os.path.join(os.path.dirname(__file__) + '/outbox'),
+            environment={ 'LOG_LEVEL': logLevel,
+                         'LOG_SAMPLE_RATE': self.logSampleRate,
+                         **self.clientEnvironment },
+            layers=layers,
+            function_name="OutboxFunction"
+        )
+
+        return outboxFunction
@@ -1,8 +1,28 @@
-import boto3
+import aws_clients
 import os
 
-# Access DynamoDB table
-ddb_resource = boto3.resource('dynamodb')
-order_table = ddb_resource.Table(os.getenv('DYNAMODB_TABLE_NAME'))
 user_name = os.getenv('PARTITION_KEY')
-order_date = os.getenv('SORT_KEY')
\ No newline at end of file
+order_date = os.getenv('SORT_KEY')
+
+# Global secondary index on the day of the order date, sorted by order date
+order_day_index = os.getenv('ORDER_DAY_INDEX')
+
+# Table names are read at import, so that services sharing a function can each set their own
+order_table_name = os.getenv('DYNAMODB_TABLE_NAME')
+summary_table_name = os.getenv('ORDER_SUMMARY_TABLE_NAME')
+idempotency_table_name = os.getenv('IDEMPOTENCY_TABLE_NAME')
+
+# Access DynamoDB table, connecting on first use rather than at import
+_lazy_attributes = {
+    'ddb_resource': lambda: aws_clients.resource('dynamodb'),
+    'order_table': lambda: aws_clients.table(order_table_name),
+    'summary_table': lambda: aws_clients.table(summary_table_name),
+    'idempotency_table': lambda: aws_clients.table(idempotency_table_name)
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = globals()[name] = _lazy_attributes[name]()
+    return value
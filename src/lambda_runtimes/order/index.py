@@ -1,18 +1,48 @@
 from botocore.exceptions import ClientError
-from datetime import datetime, timezone
-from typing import Any, Dict, List
-
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from compression import http_encoding
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from metrics import instrument
+from pagination import Page, encode_page_body, page_params, read_page
+from parallel_scan import export_page_param, ndjson_response, next_export_cursor, scan_segments, scan_segments_async
+from routing import Route, Router
+from structured_logging import LazyJson, setup_logger, start_invocation
+from transactions import transact_write
+from ttl_cache import TtlCache
+from typing import Any, Dict, List, Optional, Tuple
+
+import async_aws
+import codec
 import ddb_client as db
-import logging
 import os
-import simplejson as json
+import random
+import time
 
-logger = logging.getLogger()
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+logger = setup_logger()
 
 GET = "GET"
-
-
+ORDER_DAY_KEY = "orderDay"
+RECENT_ORDERS_MAX_DAYS = int(os.getenv('RECENT_ORDERS_MAX_DAYS', '31'))
+RECENT_ORDERS_WORKERS = 8
+IDEMPOTENCY_KEY = "idempotencyKey"
+IDEMPOTENCY_RETENTION = timedelta(days=int(os.getenv('IDEMPOTENCY_RETENTION_DAYS', '7')))
+ORDER_WRITE_WORKERS = 10
+ORDER_WRITE_MAX_ATTEMPTS = 3
+# Cancellation reasons of items that did not fail themselves, and may succeed in another transaction
+RETRYABLE_CANCELLATION_CODES = ('None', 'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded')
+
+# Idempotency keys of the orders this container has written or found written. A redelivered
+# event found here is dropped without a call to DynamoDB; the table remains the authority.
+recent_idempotency_keys = TtlCache(
+    max_size=int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000')),
+    ttl=IDEMPOTENCY_RETENTION.total_seconds()
+)
+
+
+@instrument('order')
+@http_encoding
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Entry point for the AWS Lambda function.
@@ -23,13 +53,17 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     Returns on syncthronous invocation:
     dict: The response object containing statusCode and body.
+
+    Returns on invocation from SQS:
+    dict: The batchItemFailures to be redelivered.
     """
  
-    logger.info("request: %s", json.dumps(event))
+    start_invocation(context)
+    logger.info("request: %s", LazyJson(event))
 
     if 'Records' in event:
         try:
-            sqs_invocation(event)
+            return sqs_invocation(event)
 
         except ClientError as e:
             logger.error("Client Error: %s", e.response["Error"]["Message"])
@@ -53,15 +87,20 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     else:
         try:
-            body = api_gateway_invocation(event) 
+            route, event = router.match(event)
+            if route.raw:
+                return route.invoke(event)
+            body = route.invoke(event)
+
+            message = 'Successfully finished operation'
             response = {
                 'statusCode': 200,
-                'body': json.dumps({
-                    'message': 'Successfully finished operation',
+                'body': encode_page_body(message, body) if isinstance(body, Page) else codec.dumps({
+                    'message': message,
                     'body': body
                 })
             }
-            logger.info("response: %s", json.dumps(response))
+            logger.info("response: %s", LazyJson(response))
             return response
 
         except ClientError as e:
@@ -69,7 +108,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             logger.error("Client Error: %s", error_msg)
             return {
                 'statusCode': 500,
-                'body': json.dumps({
+                'body': codec.dumps({
                     'message': "Failed to perform operation",
                     'errorMsg': error_msg
                 })
@@ -80,69 +119,192 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             logger.error("Exception: %s", error_msg)
             return {
                 'statusCode': 500,
-                'body': json.dumps({
+                'body': codec.dumps({
                     'message': "Failed to perform operation",
                     'errorMsg': error_msg
                 })
             }
 
 
-def sqs_invocation(event: List[Dict[str, Any]]) -> None:
+def sqs_invocation(event: Dict[str, Any]) -> Dict[str, Any]:
     """
     Handle async invocation from SQS.
 
+    Each order is written in one transaction with its idempotency key and the update
+    of its user's summary; only the messages whose orders could not be parsed or
+    written are reported back for redelivery.
+
     Parameters:
     event (dict): A list of sqs messages containing orders.
+
+    Returns:
+    dict: The batchItemFailures, listing the message ids to be redelivered.
     """
     logger.debug('sqs_invocation')
+
+    orders = {}
+    failed_message_ids = []
     for record in event.get('Records', []):
-        logger.debug(f'Record: {record}')
+        logger.debug('Record: %s', record.get('messageId'))
+        try:
+            checkoutEventRequest = codec.loads(record.get("body", "{}"))
+            orders[record['messageId']] = prepare_order(checkoutEventRequest.get("detail", {}))
+        except Exception as e:
+            logger.error("Exception: %s, messageId: %s", str(e), record.get('messageId'))
+            failed_message_ids.append(record.get('messageId'))
 
-        checkoutEventRequest = json.loads(record.get("body", {}))
-        create_order(checkoutEventRequest.get("detail", {})) 
+    failed_message_ids.extend(write_orders(orders))
 
+    logger.debug('sqs_invocation, records: %d, failed: %d', len(event.get('Records', [])), len(failed_message_ids))
+    return {
+        'batchItemFailures': [{ 'itemIdentifier': message_id } for message_id in failed_message_ids]
+    }
 
-def event_bridge_invocation(event: Dict[str, Any]) -> None:
+
+def write_orders(orders: Dict[str, Dict[str, Any]]) -> List[str]:
     """
-    Handle async invocation from EventBridge.
+    Write orders with write_order, dropping the orders of redelivered checkout events
+    and duplicates within the batch. The orders of different users are written in
+    parallel; those of one user one after the other, since each updates the user's summary.
 
     Parameters:
-    event (dict): The event containing order data.
+    orders (dict): The orders to write, keyed by the id of the message that carried them.
+
+    Returns:
+    list: The ids of the messages whose orders were not written and should be redelivered.
     """
-    logger.debug('event_bridge_invocation')
-    create_order(event.get("detail", {}))
+    new_orders, seen = {}, set()
+    for message_id, order in orders.items():
+        key = order.get(IDEMPOTENCY_KEY)
+        if key is None or (key not in seen and recent_idempotency_keys.get(key) is None):
+            new_orders[message_id] = order
+        seen.add(key)
+
+    users = defaultdict(list)
+    for message_id, order in new_orders.items():
+        users[order[db.user_name]].append(message_id)
+
+    def write(message_ids: List[str]) -> List[str]:
+        failed = []
+        for message_id in message_ids:
+            try:
+                write_order(new_orders[message_id])
+            except ClientError as e:
+                logger.error("Failed to write order: %s, messageId: %s", e.response["Error"]["Message"], message_id)
+                failed.append(message_id)
+        return failed
+
+    failed_message_ids = []
+    if users:
+        with ThreadPoolExecutor(max_workers=min(ORDER_WRITE_WORKERS, len(users))) as executor:
+            for failed in executor.map(write, users.values()):
+                failed_message_ids.extend(failed)
+
+    logger.debug('write_orders, orders: %d, new: %d, failed: %d', len(orders), len(new_orders), len(failed_message_ids))
+    return failed_message_ids
+
+
+def write_order(order: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Write an order in one transaction with the update of its user's summary and, if it
+    has an idempotency key, the record of the key, cancelled if the key is recorded already.
+    The key and the summary thus change if and only if the order is written, whenever the
+    function fails, so that a redelivery is neither lost nor counted twice.
 
+    Parameters:
+    order (dict): The order.
+
+    Returns:
+    dict: The result of the transaction, or None if the order's key was recorded before.
+    """
+    key = order.get(IDEMPOTENCY_KEY)
+    now = datetime.now(timezone.utc)
+    actions = [{ 'Put': { 'TableName': db.order_table.name, 'Item': order } }]
+    if key is not None:
+        actions.append({
+            'Put': {
+                'TableName': db.idempotency_table.name,
+                'Item': { IDEMPOTENCY_KEY: key, 'expiresAt': int((now + IDEMPOTENCY_RETENTION).timestamp()) },
+                # expired keys linger until DynamoDB deletes them
+                'ConditionExpression': 'attribute_not_exists(#key) OR expiresAt < :now',
+                'ExpressionAttributeNames': { '#key': IDEMPOTENCY_KEY },
+                'ExpressionAttributeValues': { ':now': int(now.timestamp()) }
+            }
+        })
 
-def api_gateway_invocation(event: Dict[str, Any]) -> Dict[str, Any]: 
+    attempt, advances_last_order = 0, True
+    while True:
+        try:
+            result = transact_write(actions + [order_summary_update(order, advances_last_order)])
+            break
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            # the reasons are in the order of the actions
+            codes = [reason.get('Code', 'None') for reason in e.response.get('CancellationReasons', [])]
+            if key is not None and codes[1:2] == ['ConditionalCheckFailed']:
+                recent_idempotency_keys.put(key, True)
+                return None
+            if codes[-1:] == ['ConditionalCheckFailed'] and advances_last_order:
+                # a later order of the user was summarized first
+                advances_last_order = False
+                continue
+
+            attempt += 1
+            if attempt == ORDER_WRITE_MAX_ATTEMPTS or any(code not in RETRYABLE_CANCELLATION_CODES for code in codes):
+                raise
+            time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** attempt)))
+
+    if key is not None:
+        recent_idempotency_keys.put(key, True)
+    return result
+
+
+def order_summary_update(order: Dict[str, Any], advances_last_order: bool = True) -> Dict[str, Any]:
     """
-    Handle sync invocation from ApiGateway.
+    Build the transaction action adding an order to its user's summary with atomic counters,
+    creating the summary if needed.
+
+    lastOrderDate only moves forward: the update is conditional on the order being the
+    user's latest, and without advances_last_order the counters are added without it.
 
     Parameters:
-    event (dict): The event containing order data.
+    order (dict): The order.
+    advances_last_order (bool): Whether to set lastOrderDate to the order's date.
 
     Returns:
-    dict: The result of the operation.
-    """    
-    logger.debug('api_gateway_invocation') 
+    dict: The Update action.
+    """
+    update = {
+        'TableName': db.summary_table.name,
+        'Key': { db.user_name: order[db.user_name] },
+        'UpdateExpression': 'ADD orderCount :count, totalSpend :total SET firstOrderDate = if_not_exists(firstOrderDate, :date)',
+        'ExpressionAttributeValues': {
+            ':count': 1,
+            ':total': Decimal(str(order.get('totalPrice', 0))),
+            ':date': order[db.order_date]
+        }
+    }
+    if advances_last_order:
+        update['UpdateExpression'] += ', lastOrderDate = :date'
+        update['ConditionExpression'] = 'attribute_not_exists(lastOrderDate) OR lastOrderDate < :date'
+    return { 'Update': update }
 
-    http_method = event.get('httpMethod')
-    body = None
-    
-    if http_method == GET:
-        if event.get('pathParameters') and db.order_date in event['pathParameters']:
-            body = get_order(event['pathParameters'][db.order_date])
-        else:
-            body = get_all_orders()
 
-    else:
-        raise ValueError(f"Unsupported route: \"{http_method}\"")
-    
-    return body
+def event_bridge_invocation(event: Dict[str, Any]) -> None:
+    """
+    Handle async invocation from EventBridge.
+
+    Parameters:
+    event (dict): The event containing order data.
+    """
+    logger.debug('event_bridge_invocation')
+    create_order(event.get("detail", {}))
 
 
 def create_order(basket_checkout_request: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Create a new order.
+    Create a new order, unless its checkout event was handled before.
 
     Parameters:
     event (dict): order data.
@@ -152,64 +314,331 @@ def create_order(basket_checkout_request: Dict[str, Any]) -> Dict[str, Any]:
     """
     logger.debug("create_order")
 
-    now = datetime.now(timezone.utc)
-    basket_checkout_request["orderDate"] = now.isoformat()
-    logger.info('create_order, request: %s', json.dumps(basket_checkout_request))
+    order = prepare_order(basket_checkout_request)
+    logger.info('create_order, request: %s', LazyJson(order))
 
-    params = {
-        'Item': basket_checkout_request
-    }
-    create_result = db.order_table.put_item(**params)       
+    key = order.get(IDEMPOTENCY_KEY)
+    create_result = write_order(order) if key is None or recent_idempotency_keys.get(key) is None else None
+    if create_result is None:
+        logger.info('create_order, duplicate: %s', key)
+        return {}
 
-    logger.debug('create_order, result: %s', json.dumps(create_result))      
+    logger.debug('create_order, result: %s', LazyJson(create_result))      
     return create_result
 
 
-def get_order(event: Dict[str, Any]) -> Dict[str, Any]:
+def get_order_summary(user_name: str) -> Dict[str, Any]:
     """
-    Retrieve an order for a given user name and order date.
+    Retrieve the order count, lifetime spend and first and last order dates of a user.
 
     Parameters:
-    event: A dictionary representing the order request.
+    user_name (str): The username whose summary is to be retrieved.
 
     Returns:
-    dict: A dictionary representing the order.
+    dict: The summary, with zero counts for a user who has not ordered.
+    """
+    logger.debug('get_order_summary, user_name: %s', user_name)
+
+    response = db.summary_table.get_item(Key={ db.user_name: user_name })
+    summary = response.get('Item') or { db.user_name: user_name, 'orderCount': 0, 'totalSpend': 0 }
+
+    logger.debug('get_order_summary, result: %s', LazyJson(summary))
+    return summary
+
+
+def prepare_order(basket_checkout_request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a checked out basket into an order item.
+
+    Parameters:
+    basket_checkout_request (dict): order data.
+
+    Returns:
+    dict: The order item to write.
+    """
+    if not basket_checkout_request.get(db.user_name):
+        raise ValueError(f'{db.user_name} should exist in order: "{basket_checkout_request}"')
+
+    now = datetime.now(timezone.utc)
+    basket_checkout_request["orderDate"] = now.isoformat()
+    # the day bucket of the order date index
+    basket_checkout_request[ORDER_DAY_KEY] = now.date().isoformat()
+    return basket_checkout_request
+
+
+def get_order(event: Dict[str, Any]) -> Page:
+    """
+    Retrieve one page of the orders of a given user, newest first.
+
+    Parameters:
+    event: A dictionary representing the order request, with optional '?from=' and '?to='
+    orderDate bounds (inclusive, ISO 8601 dates or times, a date standing for the whole day),
+    '?orderDate=' for a single order, '?order=asc' for oldest first, and '?limit=' and
+    '?cursor=' query parameters.
+
+    Returns:
+    Page: The orders on this page and the cursor for the next page.
     """
     logger.debug('get_order')
 
-    if not db.user_name in event.get("pathParameters", {}):
+    if not db.user_name in (event.get("pathParameters") or {}):
         raise ValueError("Path must include user name")
-    if not db.order_date in event.get("queryStringParameters", {}):
-        raise ValueError(f"Query parameters must include {order_date}")
-    
+    query_params = event.get("queryStringParameters") or {}
+
     user_name = event["pathParameters"][db.user_name]
-    order_date = event["queryStringParameters"][db.order_date]                                  
-    params = {
-        'KeyConditionExpression': { f"{db.user_name} = ':user_name' and {db.order_date} = ':order_date'" },
-        'ExpressionAttributeValues': {
-            ":user_name": { "S": user_name },
-            ":order_date": { "S": order_date }
-       }
+    key_condition = '#user_name = :user_name'
+    expression_attribute_values = { ':user_name': user_name }
+
+    if query_params.get(db.order_date):
+        key_condition += ' AND #order_date = :order_date'
+        expression_attribute_values[':order_date'] = query_params[db.order_date]
+    elif query_params.get('from') and query_params.get('to'):
+        key_condition += ' AND #order_date BETWEEN :from AND :to'
+        expression_attribute_values[':from'] = order_date_bound(query_params['from'])
+        expression_attribute_values[':to'] = order_date_bound(query_params['to'], end_of_day=True)
+    elif query_params.get('from'):
+        key_condition += ' AND #order_date >= :from'
+        expression_attribute_values[':from'] = order_date_bound(query_params['from'])
+    elif query_params.get('to'):
+        key_condition += ' AND #order_date <= :to'
+        expression_attribute_values[':to'] = order_date_bound(query_params['to'], end_of_day=True)
+
+    params = page_params(event)
+    params.update({
+        'KeyConditionExpression': key_condition,
+        'ExpressionAttributeNames': { '#user_name': db.user_name },
+        'ExpressionAttributeValues': expression_attribute_values,
+        'ScanIndexForward': query_params.get('order') == 'asc'
+    })
+    if '#order_date' in key_condition:
+        params['ExpressionAttributeNames']['#order_date'] = db.order_date
+
+    response = db.order_table.query(**params)     
+    page = read_page(response)
+
+    logger.debug('get_order, count: %d, next_cursor: %s', len(page.items), page.next_cursor)
+    return page
+
+
+def order_date_bound(value: str, end_of_day: bool = False) -> str:
+    """
+    Turn an orderDate bound of a request into the format orders are stored with,
+    a UTC isoformat time, so that the two compare correctly as strings.
+
+    Parameters:
+    value (str): An ISO 8601 date or time; a time without an offset is read as UTC.
+    end_of_day (bool): Whether a date stands for the last moment of that day, as in
+    an inclusive upper bound, rather than for its start.
+
+    Returns:
+    str: The bound, e.g. '2024-12-31T23:59:59.999999+00:00'.
+    """
+    try:
+        if len(value) == len('YYYY-MM-DD'):
+            bound = datetime.combine(date.fromisoformat(value), (datetime.max if end_of_day else datetime.min).time())
+        else:
+            bound = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        raise ValueError(f'{db.order_date} bounds must be ISO 8601 dates or times: "{value}"')
+
+    if bound.tzinfo is None:
+        bound = bound.replace(tzinfo=timezone.utc)
+    return bound.astimezone(timezone.utc).isoformat()
+
+
+def export_orders(event: Dict[str,Any]) -> Dict[str,Any]:
+    """
+    Export one page of all orders as newline-delimited json, scanning the table's segments in parallel.
+    Requesting each page with the cursor in the X-Next-Cursor header of the last, until a page has none,
+    exports the whole table without any one response outgrowing the limits of a Lambda response.
+
+    Parameters:
+    event (dict): The event with optional '?segments=', '?limit=' and '?cursor=' query parameters.
+
+    Returns:
+    dict: The response object containing statusCode, headers and the ndjson body.
+    """
+    page = export_page_param(event)
+    logger.info('export_orders, total_segments: %d, segments: %d', page.total_segments, len(page.start_keys))
+
+    items, next_keys = scan_segments(db.order_table, page)
+    response = ndjson_response(items, next_export_cursor(page, next_keys))
+
+    logger.debug('export_orders, size: %d', len(response['body']))
+    return response
+
+
+async def export_orders_async(event: Dict[str,Any]) -> Dict[str,Any]:
+    """
+    Export one page of all orders like export_orders, scanning the segments concurrently on the async client.
+    """
+    page = export_page_param(event)
+    logger.info('export_orders_async, total_segments: %d, segments: %d', page.total_segments, len(page.start_keys))
+
+    items, next_keys = await scan_segments_async(db.order_table_name, page)
+    response = ndjson_response(items, next_export_cursor(page, next_keys))
+
+    logger.debug('export_orders_async, size: %d', len(response['body']))
+    return response
+
+
+def get_recent_orders(event: Dict[str,Any]) -> List[Dict[str, Any]]:
+    """
+    Retrieve the most recent orders of all users, newest first, by querying the order
+    date index for each day since the given time, all days in parallel.
+
+    Parameters:
+    event (dict): The event with a '?since=' orderDate lower bound and optional '?until='
+    upper bound (both inclusive, ISO 8601 dates or times, a date standing for the whole day),
+    and an optional '?limit=' query parameter.
+
+    Returns:
+    list: Up to limit orders, newest first.
+    """
+    since, until, limit, days = recent_orders_window(event)
+    logger.info('get_recent_orders, since: %s, until: %s, limit: %d', since, until, limit)
+
+    def query_day(day: str) -> List[Dict[str, Any]]:
+        params = order_day_query(day, since, until, limit)
+        items = []
+        while len(items) < limit:
+            response = db.order_table.query(**params)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return items[:limit]
+
+    with ThreadPoolExecutor(max_workers=min(RECENT_ORDERS_WORKERS, len(days))) as executor:
+        orders = [order for day_orders in executor.map(query_day, days) for order in day_orders]
+
+    logger.debug('get_recent_orders, days: %d, count: %d', len(days), len(orders))
+    return newest_orders(orders, limit)
+
+
+async def get_recent_orders_async(event: Dict[str,Any]) -> List[Dict[str, Any]]:
+    """
+    Retrieve the most recent orders of all users like get_recent_orders, querying all days concurrently.
+    """
+    since, until, limit, days = recent_orders_window(event)
+    logger.info('get_recent_orders_async, since: %s, until: %s, limit: %d', since, until, limit)
+    client = await async_aws.client('dynamodb')
+
+    async def query_day(day: str) -> List[Dict[str, Any]]:
+        params = order_day_query(day, since, until, limit)
+        items = []
+        while len(items) < limit:
+            response = await client.query(TableName=db.order_table_name, **params)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return items[:limit]
+
+    orders = [order for day_orders in await async_aws.gather(*map(query_day, days)) for order in day_orders]
+
+    logger.debug('get_recent_orders_async, days: %d, count: %d', len(days), len(orders))
+    return newest_orders(orders, limit)
+
+
+def recent_orders_window(event: Dict[str,Any]) -> Tuple[str, str, int, List[str]]:
+    """
+    Read the time window of a request for recent orders.
+
+    Parameters:
+    event (dict): The event with the query parameters of get_recent_orders.
+
+    Returns:
+    tuple: The since and until bounds in the stored orderDate format, the limit, and the
+    days of the window, newest first.
+    """
+    query_params = event['queryStringParameters']
+    since = order_date_bound(query_params['since'])
+    until = order_date_bound(query_params['until'], end_of_day=True) if query_params.get('until') else datetime.now(timezone.utc).isoformat()
+    limit = page_params(event)['Limit']
+
+    first_day, last_day = date.fromisoformat(since[:10]), date.fromisoformat(until[:10])
+    days = [(last_day - timedelta(days=offset)).isoformat() for offset in range((last_day - first_day).days + 1)]
+    if not days:
+        raise ValueError(f'since must not be after until: "{since}", "{until}"')
+    if len(days) > RECENT_ORDERS_MAX_DAYS:
+        raise ValueError(f'since must be within {RECENT_ORDERS_MAX_DAYS} days of until: "{since}", "{until}"')
+    return since, until, limit, days
+
+
+def order_day_query(day: str, since: str, until: str, limit: int) -> Dict[str, Any]:
+    """
+    Returns:
+    dict: The parameters querying the order date index for the orders of one day within the window, newest first.
+    """
+    return {
+        'IndexName': db.order_day_index,
+        'KeyConditionExpression': '#order_day = :day AND #order_date BETWEEN :since AND :until',
+        'ExpressionAttributeNames': { '#order_day': ORDER_DAY_KEY, '#order_date': db.order_date },
+        'ExpressionAttributeValues': { ':day': day, ':since': since, ':until': until },
+        'ScanIndexForward': False,
+        'Limit': limit
     }
 
-    response = db.product_table.query(**params)     
-    items = response.get('Items', [])       
 
-    logger.debug('get_order, return: %s', json.dumps(items))
-    return items
+def newest_orders(orders: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """
+    Returns:
+    list: Up to limit of the orders, newest first.
+    """
+    orders.sort(key=lambda order: order[db.order_date], reverse=True)
+    return orders[:limit]
+
+
+def list_orders(event: Dict[str,Any]) -> Any:
+    """
+    Retrieve the recent orders of all users if a '?since=' query parameter is given, otherwise one page of all orders.
+
+    Parameters:
+    event (dict): The event with the query parameters of get_recent_orders or get_all_orders.
+
+    Returns:
+    The orders.
+    """
+    if (event.get('queryStringParameters') or {}).get('since'):
+        return get_recent_orders(event)
+    return get_all_orders(event)
+
+
+async def list_orders_async(event: Dict[str,Any]) -> Any:
+    """
+    Retrieve orders like list_orders, querying the days of recent orders concurrently.
+    A page of all orders is read by a single scan, as in list_orders.
+    """
+    if (event.get('queryStringParameters') or {}).get('since'):
+        return await get_recent_orders_async(event)
+    return list_orders(event)
 
 
-def get_all_orders() -> Dict[str,Any]:
+def get_all_orders(event: Dict[str,Any]) -> Page:
     """
-    Retrieve all orders.
+    Retrieve one page of all orders.
+
+    Parameters:
+    event (dict): The event with optional '?limit=' and '?cursor=' query parameters.
 
     Returns:
-    dict: A dictionary containing all orders.
+    Page: The orders on this page and the cursor for the next page.
     """
     logger.debug("get_all_orders")
 
-    response = db.order_table.scan()      
-    items = response.get('Items', [])
+    params = page_params(event)
+    response = db.order_table.scan(**params)      
+    page = read_page(response)
     
-    logger.debug('get_all_orders, result: %s', json.dumps(items)) 
-    return items
+    logger.debug('get_all_orders, count: %d, next_cursor: %s', len(page.items), page.next_cursor) 
+    return page
+
+
+# Compiled once, when a container starts
+router = Router([
+    Route(GET, '/order', list_orders, async_function=list_orders_async),
+    Route(GET, '/order/export', export_orders, raw=True, async_function=export_orders_async),
+    Route(GET, '/order/{userName}', get_order),
+    Route(GET, '/order/{userName}/summary', lambda event: get_order_summary(event['pathParameters'][db.user_name]))
+])
@@ -0,0 +1,18 @@
+import aws_clients
+import os
+
+event_busname = os.getenv("EVENT_BUSNAME")
+event_source = os.getenv("EVENT_SOURCE")
+detail_type = os.getenv("DETAIL_TYPE")  
+
+# Access EventBridge, connecting on first use rather than at import
+_lazy_attributes = {
+    'client': lambda: aws_clients.client('events')
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = globals()[name] = _lazy_attributes[name]()
+    return value
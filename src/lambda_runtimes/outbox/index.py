@@ -0,0 +1,82 @@
+from botocore.exceptions import ClientError
+from event_publisher import BufferedEventPublisher
+from metrics import instrument
+from structured_logging import LazyJson, setup_logger, start_invocation
+from typing import Any, Dict, List, Tuple
+
+import event_bridge_client as eb
+
+logger = setup_logger()
+
+PUT_EVENTS_MAX_RETRIES = 3
+
+
+@instrument('outbox')
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Entry point for the AWS Lambda function, invoked with batches of records
+    from the outbox table's stream.
+
+    Parameters:
+    event (dict): The DynamoDB stream records of new outbox entries.
+    context: The context in which the Lambda function is called.
+
+    Returns:
+    dict: The batchItemFailures, naming the first record that was not published.
+    """
+    start_invocation(context)
+    logger.info("request: %s records", len(event.get('Records', [])))
+
+    try:
+        entries = [
+            (record['dynamodb']['SequenceNumber'], record['dynamodb']['NewImage']['detail']['S'])
+            for record in event.get('Records', [])
+            if record.get('eventName') == 'INSERT'
+        ]
+        failed_sequence_numbers = publish_outbox_entries(entries)
+
+    except ClientError as e:
+        logger.error("Client Error: %s", e.response["Error"]["Message"])
+        raise
+
+    except Exception as e:
+        logger.error("Exception: %s", str(e))
+        raise
+
+    # Lambda retries a stream batch from the first failed record onwards
+    response = {
+        'batchItemFailures': [{ 'itemIdentifier': sequence_number } for sequence_number in failed_sequence_numbers[:1]]
+    }
+    logger.info("response: %s", LazyJson(response))
+    return response
+
+
+def publish_outbox_entries(entries: List[Tuple[str, str]]) -> List[str]:
+    """
+    Publish outbox entries to the event bus through a buffered publisher, which packs
+    up to 10 entries and 256 KB into each PutEvents call and retries only failed entries.
+
+    Parameters:
+    entries (list): (sequence number, event detail) pairs, in stream order.
+
+    Returns:
+    list: The sequence numbers of the entries that were not published, in stream order.
+    """
+    logger.debug('publish_outbox_entries, count: %d', len(entries))
+
+    publisher = BufferedEventPublisher(eb.client, max_retries=PUT_EVENTS_MAX_RETRIES)
+    for sequence_number, detail in entries:
+        publisher.add(sequence_number, {
+            'Source': eb.event_source,
+            'Resources': [],
+            'Detail': detail,
+            'DetailType': eb.detail_type,
+            'EventBusName': eb.event_busname
+        })
+    publisher.flush()
+
+    for sequence_number, error in publisher.failures.items():
+        logger.error("Failed to publish outbox entry: %s, sequence number: %s", error, sequence_number)
+
+    logger.debug('publish_outbox_entries, calls: %d, failed: %d', publisher.calls, len(publisher.failures))
+    return [sequence_number for sequence_number, _ in entries if sequence_number in publisher.failures]
@@ -1,7 +1,26 @@
-import boto3
+import aws_clients
 import os
 
-# Access DynamoDB table
-ddb_resource = boto3.resource('dynamodb')
-product_table = ddb_resource.Table(os.getenv('DYNAMODB_TABLE_NAME'))
-product_key = os.getenv('PRIMARY_KEY')
\ No newline at end of file
+product_key = os.getenv('PRIMARY_KEY')
+
+# Global secondary indexes on category, keyed by the attribute they sort on
+category_indexes = {
+    'name': os.getenv('CATEGORY_NAME_INDEX'),
+    'price': os.getenv('CATEGORY_PRICE_INDEX')
+}
+
+# Table names are read at import, so that services sharing a function can each set their own
+product_table_name = os.getenv('DYNAMODB_TABLE_NAME')
+
+# Access DynamoDB table, connecting on first use rather than at import
+_lazy_attributes = {
+    'ddb_resource': lambda: aws_clients.resource('dynamodb'),
+    'product_table': lambda: aws_clients.table(product_table_name)
+}
+
+
+def __getattr__(name: str):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = globals()[name] = _lazy_attributes[name]()
+    return value
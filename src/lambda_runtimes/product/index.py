@@ -1,22 +1,53 @@
+from batch_get import batch_get_items, batch_get_items_async
 from botocore.exceptions import ClientError
+from compression import http_encoding
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import Any, Dict
-
+from http_caching import conditional_get
+from metrics import instrument
+from pagination import Page, encode_page_body, page_params, read_page
+from parallel_scan import export_page_param, ndjson_response, next_export_cursor, scan_segments, scan_segments_async
+from routing import Route, Router
+from structured_logging import LazyJson, setup_logger, start_invocation
+from transactions import transact_write
+from ttl_cache import TtlCache
+from typing import Any, Dict, List, Optional, Tuple
+
+import codec
 import ddb_client as db
-import logging
 import os
-import simplejson as json
+import random
+import time
 import uuid
 
-logger = logging.getLogger()
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+logger = setup_logger()
 
 GET = "GET"
 POST = "POST"
 PUT = "PUT"
 DELETE = "DELETE"
-
-
+BATCH_GET_MAX_IDS = 500
+VERSION_KEY = "version"
+BULK_UPDATE_MAX_ITEMS = 1000
+BULK_UPDATE_CHUNK_SIZE = 100
+BULK_UPDATE_WORKERS = 10
+BULK_UPDATE_MAX_ATTEMPTS = 3
+# Cancellation reasons of items that did not fail themselves, and may succeed in another transaction
+RETRYABLE_CANCELLATION_CODES = ('None', 'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded')
+
+# How long clients and the API Gateway cache may reuse a product response
+PRODUCT_MAX_AGE = int(os.getenv('PRODUCT_MAX_AGE', '30'))
+
+# Survives across invocations of a warm container
+product_cache = TtlCache(
+    max_size=int(os.getenv('PRODUCT_CACHE_SIZE', '1000')),
+    ttl=float(os.getenv('PRODUCT_CACHE_TTL', '30'))
+)
+
+
+@instrument('product')
+@http_encoding
+@conditional_get(max_age=PRODUCT_MAX_AGE)
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Entry point for the AWS Lambda function.
@@ -28,43 +59,25 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns:
     dict: The response object containing statusCode and body.
     """
-    logger.info("request: %s", json.dumps(event))
+    start_invocation(context)
+    logger.info("request: %s", LazyJson(event))
 
     try:
-        body = None
-        http_method = event.get('httpMethod')
-        
-        if http_method == GET:
-            if event.get('queryStringParameters'):
-                body = get_product_by_category(event)
-            elif event.get('pathParameters') and db.product_key in event['pathParameters']:
-                body = get_product(event['pathParameters'][db.product_key])
-            else:
-                body = get_all_products()
-
-        elif http_method == POST:
-            body = create_product(event)
-
-        elif http_method == DELETE:
-            if event.get('pathParameters') and db.product_key in event['pathParameters']:
-                body = delete_product(event['pathParameters'][db.product_key])
-            else:
-                raise ValueError(f"{db.product_key} must be specified on a DELETE request")
- 
-        elif http_method == PUT:
-            body = update_product(event)
-
-        else:
-            raise ValueError(f"Unsupported route: \"{http_method}\"")
+        route, event = router.match(event)
+        if route.raw:
+            return route.invoke(event)
+        body = route.invoke(event)
 
+        message = f'Successfully finished operation: "{route.method}"'
         response = {
             'statusCode': 200,
-            'body': json.dumps({
-                'message': f'Successfully finished operation: "{http_method}"',
+            'body': encode_page_body(message, body) if isinstance(body, Page) else codec.dumps({
+                'message': message,
                 'body': body
             })
         }
-        logger.info("response: %s", json.dumps(response))
+        logger.info("response: %s", LazyJson(response))
+        logger.info("product_cache: %s", LazyJson(product_cache.stats()))
         return response
         
     except ClientError as e:
@@ -72,7 +85,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         logger.error("Client Error: %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': codec.dumps({
                 'message': "Failed to perform operation",
                 'errorMsg': error_msg
             })
@@ -83,7 +96,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         logger.error("Exception: %s", error_msg)
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': codec.dumps({
                 'message': "Failed to perform operation",
                 'errorMsg': error_msg
             })
@@ -102,30 +115,174 @@ def get_product(product_id: str) -> Dict[str, Any]:
     """
     logger.debug('get_product, product_id: %s', product_id)
 
-    params = {
-        'Key': { db.product_key: product_id }
-    }
-    response = db.product_table.get_item(**params)       
-    item = response.get('Item', {})
+    def load() -> Dict[str, Any]:
+        params = {
+            'Key': { db.product_key: product_id }
+        }
+        response = db.product_table.get_item(**params)       
+        return response.get('Item', {})
+
+    item = product_cache.get_or_load(('product', product_id), load)
 
-    logger.debug('get_product, result: %s', json.dumps(item))       
+    logger.debug('get_product, result: %s', LazyJson(item))       
     return item
 
 
-def get_all_products() -> Dict[str,Any]:
+def list_products(event: Dict[str,Any]) -> Any:
+    """
+    Retrieve products by id, by category or one page of all products, depending on the query parameters.
+
+    Parameters:
+    event (dict): The event with optional '?ids=' or '?category=' query parameters.
+
+    Returns:
+    The products.
+    """
+    query_params = event.get('queryStringParameters') or {}
+    if 'ids' in query_params:
+        return get_products_by_ids(query_params['ids'])
+    elif 'category' in query_params:
+        return get_product_by_category(event)
+    return get_all_products(event)
+
+
+async def list_products_async(event: Dict[str,Any]) -> Any:
+    """
+    Retrieve products like list_products, reading products by id concurrently.
+    A category or page is read by a single query or scan, as in list_products.
+    """
+    query_params = event.get('queryStringParameters') or {}
+    if 'ids' in query_params:
+        return await get_products_by_ids_async(query_params['ids'])
+    return list_products(event)
+
+
+def get_all_products(event: Dict[str,Any]) -> Page:
     """
-    Retrieve all products.
+    Retrieve one page of all products.
+
+    Parameters:
+    event (dict): The event with optional '?limit=' and '?cursor=' query parameters.
 
     Returns:
-    dict: A dictionary containing all products.
+    Page: The products on this page and the cursor for the next page.
     """
     logger.debug("get_all_products")
 
-    response = db.product_table.scan()      
-    items = response.get('Items', {})
+    params = page_params(event)
+    cache_key = ('page', params['Limit'], codec.dumps(params.get('ExclusiveStartKey'), sort_keys=True))
+    page = product_cache.get_or_load(cache_key, lambda: read_page(db.product_table.scan(**params)))
     
-    logger.debug('get_all_products, result: %s', json.dumps(items)) 
-    return items
+    logger.debug('get_all_products, count: %d, next_cursor: %s', len(page.items), page.next_cursor) 
+    return page
+
+
+def get_products_by_ids(ids: str) -> List[Dict[str, Any]]:
+    """
+    Retrieve many products at once, from the product cache where possible
+    and with BatchGetItem, 100 keys per call, for the rest.
+
+    Parameters:
+    ids (str): A comma-separated list of product ids.
+
+    Returns:
+    list: The products that exist, in the order their ids were requested.
+    """
+    product_ids, products, missing_ids = cached_products(ids)
+    fetched = batch_get_items(db.product_table_name, [{ db.product_key: product_id } for product_id in missing_ids])
+    return fetched_products(product_ids, products, missing_ids, fetched)
+
+
+async def get_products_by_ids_async(ids: str) -> List[Dict[str, Any]]:
+    """
+    Retrieve many products at once like get_products_by_ids, reading the chunks of
+    100 keys concurrently.
+    """
+    product_ids, products, missing_ids = cached_products(ids)
+    fetched = await batch_get_items_async(db.product_table_name, [{ db.product_key: product_id } for product_id in missing_ids])
+    return fetched_products(product_ids, products, missing_ids, fetched)
+
+
+def cached_products(ids: str) -> Tuple[List[str], Dict[str, Any], List[str]]:
+    """
+    Parse a comma-separated list of product ids and look them up in the product cache.
+
+    Parameters:
+    ids (str): A comma-separated list of product ids.
+
+    Returns:
+    tuple: The distinct product ids, the cached products by id, and the ids to fetch.
+    """
+    product_ids = list(dict.fromkeys(product_id.strip() for product_id in ids.split(',') if product_id.strip()))
+    logger.debug('get_products_by_ids, count: %d', len(product_ids))
+
+    if not product_ids:
+        raise ValueError('ids must contain at least one product id')
+    if len(product_ids) > BATCH_GET_MAX_IDS:
+        raise ValueError(f'ids must contain at most {BATCH_GET_MAX_IDS} product ids: "{len(product_ids)}"')
+
+    products = {}
+    missing_ids = []
+    for product_id in product_ids:
+        item = product_cache.get(('product', product_id))
+        if item is None:
+            missing_ids.append(product_id)
+        elif item:
+            products[product_id] = item
+    return product_ids, products, missing_ids
+
+
+def fetched_products(product_ids: List[str], products: Dict[str, Any], missing_ids: List[str],
+        fetched: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Cache the fetched products, and those found missing, and merge them with the cached ones.
+
+    Returns:
+    list: The products that exist, in the order their ids were requested.
+    """
+    for item in fetched:
+        products[item[db.product_key]] = item
+    for product_id in missing_ids:
+        product_cache.put(('product', product_id), products.get(product_id, {}))
+
+    logger.debug('get_products_by_ids, found: %d, fetched: %d', len(products), len(missing_ids))
+    return [products[product_id] for product_id in product_ids if product_id in products]
+
+
+def export_products(event: Dict[str,Any]) -> Dict[str,Any]:
+    """
+    Export one page of all products as newline-delimited json, scanning the table's segments in parallel.
+    Requesting each page with the cursor in the X-Next-Cursor header of the last, until a page has none,
+    exports the whole table without any one response outgrowing the limits of a Lambda response.
+
+    Parameters:
+    event (dict): The event with optional '?segments=', '?limit=' and '?cursor=' query parameters.
+
+    Returns:
+    dict: The response object containing statusCode, headers and the ndjson body.
+    """
+    page = export_page_param(event)
+    logger.info('export_products, total_segments: %d, segments: %d', page.total_segments, len(page.start_keys))
+
+    items, next_keys = scan_segments(db.product_table, page)
+    response = ndjson_response(items, next_export_cursor(page, next_keys))
+
+    logger.debug('export_products, size: %d', len(response['body']))
+    return response
+
+
+async def export_products_async(event: Dict[str,Any]) -> Dict[str,Any]:
+    """
+    Export one page of all products like export_products, scanning the segments concurrently on the async client.
+    """
+    page = export_page_param(event)
+    logger.info('export_products_async, total_segments: %d, segments: %d', page.total_segments, len(page.start_keys))
+
+    items, next_keys = await scan_segments_async(db.product_table_name, page)
+    response = ndjson_response(items, next_export_cursor(page, next_keys))
+
+    logger.debug('export_products_async, size: %d', len(response['body']))
+    return response
 
 
 def create_product(event: Dict[str,Any]) -> Dict[str,Any]:
@@ -140,17 +297,19 @@ def create_product(event: Dict[str,Any]) -> Dict[str,Any]:
     """   
     logger.debug('create_product')
 
-    product_request = json.loads(event['body'], parse_float=Decimal)
+    product_request = codec.loads(event['body'])
     product_id = str(uuid.uuid4())
     product_request[db.product_key] = product_id
-    logger.info('create_product, request: %s', json.dumps(product_request))
+    product_request[VERSION_KEY] = 1
+    logger.info('create_product, request: %s', LazyJson(product_request))
 
     params = {
         'Item': product_request
     }
     create_result = db.product_table.put_item(**params)       
+    invalidate_product(product_id)
 
-    logger.debug('create_product, result: %s', json.dumps(create_result))      
+    logger.debug('create_product, result: %s', LazyJson(create_result))      
     return create_result
 
 
@@ -170,67 +329,252 @@ def delete_product(product_id: Dict[str,Any]) -> Dict[str,Any]:
         'Key': { db.product_key: product_id }
     }
     delete_result = db.product_table.delete_item(**params)   
+    invalidate_product(product_id)
 
-    logger.debug('delete_product, result: %s', json.dumps(delete_result)) 
+    logger.debug('delete_product, result: %s', LazyJson(delete_result)) 
     return delete_result
 
 
 def update_product(event: Dict[str,Any]) -> Dict[str,Any]:
     """
-    Updaste a product.
+    Update a product. If the request holds the product's version, the update
+    only succeeds if the product is still at that version.
 
     Parameters:
     event (dict): The event containing new product data.
 
     Returns:
-    dict: The result of the create operation.
+    dict: The result of the update operation.
     """
     logger.debug('update_product')
 
-    request_body = json.loads(event['body'], parse_float=Decimal)
-    logger.debug('update_product, request: %s', json.dumps(request_body))
+    request_body = codec.loads(event['body'])
+    logger.debug('update_product, request: %s', LazyJson(request_body))
+
+    product_id = event['pathParameters'][db.product_key]
+    params = product_update_params(product_id, request_body, request_body.get(VERSION_KEY))
+    try:
+        update_result = db.product_table.update_item(**params)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            raise ValueError(f'Product "{product_id}" is not at version {request_body[VERSION_KEY]}')
+        raise
+    invalidate_product(product_id)
+    
+    logger.debug('update_result, result: %s', LazyJson(update_result)) 
+    return update_result
+
+
+def product_update_params(product_id: str, changes: Dict[str,Any], expected_version: Optional[int] = None) -> Dict[str,Any]:
+    """
+    Build the parameters of an update that sets the given attributes and increments the product's version.
+
+    Parameters:
+    product_id (str): The id of the product to update.
+    changes (dict): The attributes to set. The id and version in it are ignored.
+    expected_version (int): If given, the version the product must be at for the update to succeed.
+    Products written before versions were kept are at version 0.
 
-    obj_keys = list(request_body.keys())      
-    update_expression = "SET " + ", ".join([f"#key{index} = :value{index}" for index in range(len(obj_keys))])
-    expression_attribute_names = {f"#key{index}": key for index, key in enumerate(obj_keys)}
-    expression_attribute_values = {f":value{index}": {'S': value} if isinstance(value, str) else {'N': str(value)} for index, (key, value) in enumerate(request_body.items())}
+    Returns:
+    dict: The Key, UpdateExpression, ConditionExpression and expression attributes of the update.
+    """
+    changes = { key: value for key, value in changes.items() if key not in (db.product_key, VERSION_KEY) }
+    if not changes:
+        raise ValueError(f'Update of product "{product_id}" should change at least one attribute')
 
     params = {
-        'Key': { db.product_key: event['pathParameters'][db.product_key] },
-        'UpdateExpression': update_expression,
-        'ExpressionAttributeNames': expression_attribute_names,
-        'ExpressionAttributeValues': expression_attribute_values
+        'Key': { db.product_key: product_id },
+        'UpdateExpression': "SET " + ", ".join(f"#key{index} = :value{index}" for index in range(len(changes)))
+                            + " ADD #version :one",
+        'ExpressionAttributeNames': { '#version': VERSION_KEY, **{ f"#key{index}": key for index, key in enumerate(changes) } },
+        'ExpressionAttributeValues': { ':one': 1, **{ f":value{index}": value for index, value in enumerate(changes.values()) } }
     }
-    update_result = db.product_table.update_item(**params)
-    
-    logger.debug('update_result, result: %s', json.dumps(update_result)) 
-    return update_result
+
+    if expected_version is not None:
+        if (isinstance(expected_version, bool) or not isinstance(expected_version, (int, Decimal))
+                or expected_version < 0 or expected_version != int(expected_version)):
+            raise ValueError(f'{VERSION_KEY} of product "{product_id}" should be a non-negative integer: "{expected_version}"')
+        if expected_version == 0:
+            params['ConditionExpression'] = 'attribute_exists(#id) AND attribute_not_exists(#version)'
+            params['ExpressionAttributeNames']['#id'] = db.product_key
+        else:
+            params['ConditionExpression'] = '#version = :version'
+            params['ExpressionAttributeValues'][':version'] = expected_version
+    return params
+
+
+def bulk_update_products(event: Dict[str,Any]) -> List[Dict[str,Any]]:
+    """
+    Update many products at once, in transactions of up to 100 products run in parallel.
+    Every update is conditional on the product's version, and is reported on separately:
+    a product that changed since it was read does not stop the other updates.
+
+    Parameters:
+    event (dict): The event whose body holds { "updates": [ { "id": ..., "version": ..., <attributes> }, ... ] }.
+
+    Returns:
+    list: The outcome of each update, in request order: 'updated' with the new version,
+    'conflict' if the product was not at the expected version, or 'failed'.
+    """
+    logger.debug('bulk_update_products')
+
+    updates = codec.loads(event.get('body') or '{}').get('updates')
+    if not isinstance(updates, list) or not updates:
+        raise ValueError('updates should be a non-empty list of product updates')
+    if len(updates) > BULK_UPDATE_MAX_ITEMS:
+        raise ValueError(f'At most {BULK_UPDATE_MAX_ITEMS} products can be updated at once')
+    for update in updates:
+        if not isinstance(update, dict) or not update.get(db.product_key) or VERSION_KEY not in update:
+            raise ValueError(f'{db.product_key} and {VERSION_KEY} should exist in update: "{update}"')
+    if len({ update[db.product_key] for update in updates }) != len(updates):
+        raise ValueError(f'Each {db.product_key} can be updated only once per request')
+    # every update is checked before the first transaction, so that a bad one fails the request as a whole
+    for update in updates:
+        product_update_params(update[db.product_key], update, update[VERSION_KEY])
+
+    chunks = [updates[start:start + BULK_UPDATE_CHUNK_SIZE] for start in range(0, len(updates), BULK_UPDATE_CHUNK_SIZE)]
+    try:
+        with ThreadPoolExecutor(max_workers=min(BULK_UPDATE_WORKERS, len(chunks))) as executor:
+            results = [result for chunk_results in executor.map(transact_product_updates, chunks) for result in chunk_results]
+    finally:
+        # other transactions may have committed even if one of them raised
+        invalidate_product(*(update[db.product_key] for update in updates))
+
+    logger.info('bulk_update_products, count: %d, updated: %d', len(results),
+                sum(result['status'] == 'updated' for result in results))
+    return results
+
+
+def transact_product_updates(updates: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
+    """
+    Apply up to 100 product updates in one transaction. When the transaction is cancelled,
+    the updates that caused it are reported and the rest are retried without them, after
+    a backoff if the cancellation was caused by contention.
+
+    Parameters:
+    updates (list): The product updates, each with an id and the expected version.
+
+    Returns:
+    list: The outcome of each update, in the order given.
+    """
+    results = {}
+    pending = updates
+
+    for attempt in range(BULK_UPDATE_MAX_ATTEMPTS):
+        actions, buildable = [], []
+        for update in pending:
+            try:
+                params = product_update_params(update[db.product_key], update, update[VERSION_KEY])
+            except ValueError as e:
+                results[update[db.product_key]] = { 'status': 'failed', 'errorMsg': str(e) }
+                continue
+            actions.append({ 'Update': { 'TableName': db.product_table.name, **params } })
+            buildable.append(update)
+        pending = buildable
+        if not pending:
+            break
+
+        try:
+            transact_write(actions)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                error_msg = e.response['Error']['Message']
+                logger.error("Client Error: %s", error_msg)
+                for update in pending:
+                    results[update[db.product_key]] = { 'status': 'failed', 'errorMsg': error_msg }
+                pending = []
+                continue
+
+            retry = []
+            for update, reason in zip(pending, e.response.get('CancellationReasons', [])):
+                code = reason.get('Code', 'None')
+                if code in RETRYABLE_CANCELLATION_CODES:
+                    retry.append(update)
+                elif code == 'ConditionalCheckFailed':
+                    results[update[db.product_key]] = { 'status': 'conflict', 'errorMsg': f'Product is not at version {update[VERSION_KEY]}' }
+                else:
+                    results[update[db.product_key]] = { 'status': 'failed', 'errorMsg': reason.get('Message', code) }
+            pending = retry
+            # updates that were only cancelled along with others are retried at once
+            codes = [reason.get('Code', 'None') for reason in e.response.get('CancellationReasons', [])]
+            contended = any(code != 'None' and code in RETRYABLE_CANCELLATION_CODES for code in codes)
+            if pending and contended and attempt + 1 < BULK_UPDATE_MAX_ATTEMPTS:
+                time.sleep(random.uniform(0, min(1.0, 0.05 * 2 ** (attempt + 1))))
+            continue
+
+        for update in pending:
+            results[update[db.product_key]] = { 'status': 'updated', VERSION_KEY: Decimal(update[VERSION_KEY]) + 1 }
+        pending = []
+
+    for update in pending:
+        results[update[db.product_key]] = { 'status': 'failed', 'errorMsg': 'Transaction was cancelled repeatedly' }
+
+    return [{ db.product_key: update[db.product_key], **results[update[db.product_key]] } for update in updates]
     
 
-def get_product_by_category(event: Dict[str,Any]) -> Dict[str,Any]:
+def invalidate_product(*product_ids: str) -> None:
+    """
+    Drop products, and every cached page of products, from the product cache.
+
+    Parameters:
+    product_ids (str): The ids of the products that were written.
+    """
+    written = set(product_ids)
+    product_cache.invalidate(lambda key: key[0] == 'page' or (key[0] == 'product' and key[1] in written))
+
+
+def get_product_by_category(event: Dict[str,Any]) -> Page:
     """
-    Get products belonging to a specified cateogry.
+    Get one page of products belonging to a specified category.
+
+    By default this queries the category index, ordered by '?sortBy=name' (the default)
+    or '?sortBy=price', ascending unless '?order=desc'. '?match=contains' falls back to
+    a filtered scan that matches any category containing the given text.
 
     Parameters:
-    event (dict): The event with a '?category=' query parameter.
+    event (dict): The event with a '?category=' query parameter, and optional
+    '?sortBy=', '?order=', '?match=', '?limit=' and '?cursor=' query parameters.
 
     Returns:
-    dict: The products belonging to the specified category
+    Page: The products on this page and the cursor for the next page.
     """
     logger.debug('get_product_by_category')
 
-    if 'category' not in event['queryStringParameters']:
+    query_params = event['queryStringParameters']
+    if 'category' not in query_params:
         raise ValueError('Query parameters on url must contain "category"')
-    category = event['queryStringParameters']['category']
+    category = query_params['category']
     logger.info('get_product_by_category, category:%s', category) 
 
-    params = {
-        'FilterExpression': 'contains (category, :category)',
-        'ExpressionAttributeValues': { ':category': category }
-    }
-
-    response = db.product_table.scan(**params)     
-    items = response.get('Items', [])       
-
-    logger.debug('get_product_by_category, return: %s', json.dumps(items))
-    return items
+    params = page_params(event)
+    if query_params.get('match') == 'contains':
+        params['FilterExpression'] = 'contains (category, :category)'
+        params['ExpressionAttributeValues'] = { ':category': category }
+        response = db.product_table.scan(**params)
+
+    else:
+        sort_by = query_params.get('sortBy', 'name')
+        if sort_by not in db.category_indexes:
+            raise ValueError(f'sortBy must be one of {list(db.category_indexes)}: "{sort_by}"')
+        params['IndexName'] = db.category_indexes[sort_by]
+        params['KeyConditionExpression'] = 'category = :category'
+        params['ExpressionAttributeValues'] = { ':category': category }
+        params['ScanIndexForward'] = query_params.get('order', 'asc') != 'desc'
+        response = db.product_table.query(**params)
+
+    page = read_page(response)
+
+    logger.debug('get_product_by_category, count: %d, next_cursor: %s', len(page.items), page.next_cursor)
+    return page
+
+
+# Compiled once, when a container starts
+router = Router([
+    Route(GET, '/product', list_products, async_function=list_products_async),
+    Route(GET, '/product/export', export_products, raw=True, async_function=export_products_async),
+    Route(GET, '/product/{id}', lambda event: get_product(event['pathParameters'][db.product_key])),
+    Route(POST, '/product', create_product),
+    Route(PUT, '/product/bulk', bulk_update_products),
+    Route(PUT, '/product/{id}', update_product),
+    Route(DELETE, '/product/{id}', lambda event: delete_product(event['pathParameters'][db.product_key]))
+])
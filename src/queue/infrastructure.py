@@ -10,11 +10,14 @@ class MssQueues(Construct):
         super().__init__(scope, id)
 
         self.order_queue = sqs.Queue(self, "orderQueue",
-            queue_name="OrderQueue"
+            queue_name="OrderQueue",
+            visibility_timeout=kwargs.get("visibilityTimeout", None)
         )
 
         kwargs["consumer"].add_event_source( SqsEventSource(
                 self.order_queue,
-                batch_size=3
+                batch_size=kwargs.get("batchSize", 10),
+                max_batching_window=kwargs.get("maxBatchingWindow", None),
+                report_batch_item_failures=kwargs.get("reportBatchItemFailures", True)
             )
-        )
\ No newline at end of file
+        )
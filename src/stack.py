@@ -1,4 +1,5 @@
 from aws_cdk import (
+    Duration,
     Stack
 )
 from constructs import Construct
@@ -15,18 +16,34 @@ class MicroservicesSampleStack(Stack):
         super().__init__(scope, construct_id, **kwargs)
 
         database = MssDatabase(self, "Database")
-        lambda_layers = MssLambdaLayers(self, "LambdaLayers")
+        # cdk deploy -c asyncIo=true runs the fan-out routes on aiobotocore clients
+        asyncIo = self.node.try_get_context("asyncIo") in (True, "true")
+        lambda_layers = MssLambdaLayers(self, "LambdaLayers", asyncIo=asyncIo)
         lambda_runtimes = MssLambdaRuntimes(self, "LambdaRuntimes", 
             productTable=database.productTable, 
             basketTable=database.basketTable,
             orderTable=database.orderTable,
-            boto3Layer=lambda_layers.boto3Layer)
+            orderSummaryTable=database.orderSummaryTable,
+            idempotencyTable=database.idempotencyTable,
+            outboxTable=database.outboxTable,
+            commonLayer=lambda_layers.commonLayer,
+            asyncLayer=lambda_layers.asyncLayer,
+            asyncIo=asyncIo,
+            # cdk deploy -c singleFunction=true serves all three APIs from one function
+            singleFunction=self.node.try_get_context("singleFunction") in (True, "true"))
+        maxBatchingWindow = Duration.seconds(2)
         queues = MssQueues(self, "Queues",
-            consumer=lambda_runtimes.orderFunction)
+            consumer=lambda_runtimes.orderFunction,
+            batchSize=100,
+            maxBatchingWindow=maxBatchingWindow,
+            # as Lambda recommends, so that a batch is not redelivered while a retry of it still runs
+            visibilityTimeout=Duration.seconds(6 * lambda_runtimes.orderTimeout.to_seconds() + maxBatchingWindow.to_seconds()),
+            reportBatchItemFailures=True)
         MssApiGateway(self, "ApiGateway", 
             productFunction=lambda_runtimes.productFunction,
             basketFunction=lambda_runtimes.basketFunction,
             orderFunction=lambda_runtimes.orderFunction)
         MssEventBus(self, "EventBus",
-            publisher=lambda_runtimes.basketFunction,
+            publisher=lambda_runtimes.outboxFunction,
+            outboxTable=database.outboxTable,
             targetQueue=queues.order_queue)
@@ -0,0 +1,149 @@
+"""
+Cold-start benchmark for the product, basket and order handlers.
+
+Each sample runs in a fresh python process, so module imports and aws client
+construction are paid exactly as on a lambda cold start. DynamoDB is served by a
+local moto server, so no aws account is needed:
+
+    python -m tests.benchmarks.cold_start --samples 20 --budget-ms 800
+
+Exits with a non-zero status if the p99 of import plus first invocation of any
+handler exceeds the budget.
+"""
+from typing import Dict, List
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+
+import boto3
+import simplejson as json
+from moto.server import ThreadedMotoServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RUNTIMES = os.path.join(ROOT, 'src', 'lambda_runtimes')
+COMMON_LAYER = os.path.join(ROOT, 'src', 'lambda_layers', 'common')
+
+AWS_ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'benchmark',
+    'AWS_SECRET_ACCESS_KEY': 'benchmark'
+}
+
+SERVICES = {
+    'product': {
+        'environment': { 'DYNAMODB_TABLE_NAME': 'product', 'PRIMARY_KEY': 'id' },
+        'key_schema': [('id', 'HASH')],
+        'event': { 'httpMethod': 'GET', 'path': '/product/p1', 'pathParameters': { 'id': 'p1' } }
+    },
+    'basket': {
+        'environment': { 'DYNAMODB_TABLE_NAME': 'basket', 'PRIMARY_KEY': 'userName' },
+        'key_schema': [('userName', 'HASH')],
+        'event': { 'httpMethod': 'GET', 'path': '/basket/swn', 'pathParameters': { 'userName': 'swn' } }
+    },
+    'order': {
+        'environment': { 'DYNAMODB_TABLE_NAME': 'order', 'PARTITION_KEY': 'userName', 'SORT_KEY': 'orderDate' },
+        'key_schema': [('userName', 'HASH'), ('orderDate', 'RANGE')],
+        'event': { 'httpMethod': 'GET', 'path': '/order/swn', 'pathParameters': { 'userName': 'swn' } }
+    }
+}
+
+# Runs in the fresh process; prints the timings of one cold start as json
+COLD_START = '''
+import json, sys, time
+sys.path[:0] = [sys.argv[1], sys.argv[2]]
+started = time.perf_counter()
+import index
+imported = time.perf_counter()
+response = index.handler(json.loads(sys.argv[3]), None)
+invoked = time.perf_counter()
+assert response['statusCode'] == 200, response
+print(json.dumps({ 'import_ms': (imported - started) * 1000, 'first_invocation_ms': (invoked - imported) * 1000 }))
+'''
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    """
+    Returns:
+    float: The nearest-rank percentile of the samples.
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))]
+
+
+def create_tables(endpoint_url: str) -> None:
+    """
+    Create the table of every service on the local moto server.
+    """
+    ddb = boto3.resource('dynamodb', endpoint_url=endpoint_url,
+        region_name=AWS_ENVIRONMENT['AWS_DEFAULT_REGION'],
+        aws_access_key_id=AWS_ENVIRONMENT['AWS_ACCESS_KEY_ID'],
+        aws_secret_access_key=AWS_ENVIRONMENT['AWS_SECRET_ACCESS_KEY'])
+    for service in SERVICES.values():
+        ddb.create_table(
+            TableName=service['environment']['DYNAMODB_TABLE_NAME'],
+            KeySchema=[{ 'AttributeName': name, 'KeyType': key_type } for name, key_type in service['key_schema']],
+            AttributeDefinitions=[{ 'AttributeName': name, 'AttributeType': 'S' } for name, _ in service['key_schema']],
+            BillingMode='PAY_PER_REQUEST'
+        )
+
+
+def cold_start(service_name: str, endpoint_url: str) -> Dict[str, float]:
+    """
+    Import a handler and invoke it once in a fresh python process.
+
+    Returns:
+    dict: The import and first invocation times in milliseconds.
+    """
+    service = SERVICES[service_name]
+    environment = dict(os.environ, **service['environment'], **AWS_ENVIRONMENT,
+        AWS_ENDPOINT_URL=endpoint_url,
+        LOG_LEVEL='WARNING',
+        LOG_SAMPLE_RATE='0')
+    output = subprocess.run(
+        [sys.executable, '-c', COLD_START, os.path.join(RUNTIMES, service_name), COMMON_LAYER, json.dumps(service['event'])],
+        env=environment, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=10, help='cold starts per handler')
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail if any p99 of import + first invocation exceeds this')
+    parser.add_argument('--services', nargs='+', default=list(SERVICES), choices=list(SERVICES))
+    args = parser.parse_args(argv)
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    try:
+        host, port = server.get_host_and_port()
+        endpoint_url = f'http://{host}:{port}'
+        create_tables(endpoint_url)
+
+        over_budget = []
+        print(f"{'handler':<10}{'import p50':>12}{'import p99':>12}{'invoke p50':>12}{'invoke p99':>12}{'total p99':>12}")
+        for service_name in args.services:
+            samples = [cold_start(service_name, endpoint_url) for _ in range(args.samples)]
+            imports = [sample['import_ms'] for sample in samples]
+            invocations = [sample['first_invocation_ms'] for sample in samples]
+            totals = [sample['import_ms'] + sample['first_invocation_ms'] for sample in samples]
+            total_p99 = percentile(totals, 99)
+            print(f"{service_name:<10}{percentile(imports, 50):>10.1f}ms{percentile(imports, 99):>10.1f}ms"
+                  f"{percentile(invocations, 50):>10.1f}ms{percentile(invocations, 99):>10.1f}ms{total_p99:>10.1f}ms")
+            if args.budget_ms is not None and total_p99 > args.budget_ms:
+                over_budget.append(service_name)
+    finally:
+        server.stop()
+
+    if over_budget:
+        print(f"cold start p99 over the {args.budget_ms}ms budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Synthetic products, baskets and orders for the benchmarks.
+
+Every item is derived from its index alone, so the generators stream any number
+of items without holding them in memory, and a benchmark can pick an existing
+product id or user name at random without keeping a list of them.
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterator
+
+import random
+
+CATEGORIES = ['Phone', 'Tablet', 'Laptop', 'Watch', 'Headphones', 'Camera', 'Speaker', 'Monitor']
+COLORS = ['Black', 'White', 'Silver', 'Blue', 'Red']
+FIRST_ORDER_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def product_id(index: int) -> str:
+    """
+    Returns:
+    str: The id of the product at an index, shaped like the uuids the product service assigns.
+    """
+    return f'{index:08x}-0000-4000-8000-{index:012x}'
+
+
+def user_name(index: int) -> str:
+    """
+    Returns:
+    str: The name of the user at an index.
+    """
+    return f'user{index:08d}'
+
+
+def price(index: int) -> Decimal:
+    """
+    Returns:
+    Decimal: The price of the product at an index, between 1.00 and 2000.00.
+    """
+    return Decimal(random.Random(index).randint(100, 200000)) / 100
+
+
+def product(index: int) -> Dict[str, Any]:
+    return {
+        'id': product_id(index),
+        'name': f'Product {index}',
+        'description': f'A representative description of product {index}, a few dozen words long. ' * 2,
+        'category': CATEGORIES[index % len(CATEGORIES)],
+        'price': price(index),
+        'imageFile': f'product-{index}.png',
+        'version': 1
+    }
+
+
+def order_date(user_index: int, order_index: int) -> datetime:
+    """
+    Returns:
+    datetime: When a user placed an order: each user orders once a day from FIRST_ORDER_DATE.
+    """
+    return FIRST_ORDER_DATE + timedelta(hours=order_index * 24 + user_index % 24)
+
+
+def basket_item(product_index: int) -> Dict[str, Any]:
+    return {
+        'productId': product_id(product_index),
+        'productName': f'Product {product_index}',
+        'color': COLORS[product_index % len(COLORS)],
+        'quantity': 1,
+        'price': price(product_index)
+    }
+
+
+def basket(index: int, item_count: int, product_count: int) -> Dict[str, Any]:
+    rng = random.Random(index)
+    items = [basket_item(product_index) for product_index in rng.sample(range(product_count), min(item_count, product_count))]
+    return {
+        'userName': user_name(index),
+        'items': items,
+        'totalPrice': sum(item['price'] for item in items),
+        'productIds': { item['productId'] for item in items }
+    }
+
+
+def order(user_index: int, order_index: int, item_count: int, product_count: int) -> Dict[str, Any]:
+    payload = basket(user_index * 1000 + order_index, item_count, product_count)
+    payload.pop('productIds')
+    ordered_at = order_date(user_index, order_index)
+    payload.update({
+        'userName': user_name(user_index),
+        'orderDate': ordered_at.isoformat(),
+        'orderDay': ordered_at.date().isoformat(),
+        'firstName': 'Jane',
+        'lastName': 'Doe',
+        'email': f'{user_name(user_index)}@example.com',
+        'address': '1 Main Street',
+        'paymentMethod': 1,
+        'cardInfo': '**** **** **** 4242'
+    })
+    return payload
+
+
+def products(count: int) -> Iterator[Dict[str, Any]]:
+    return (product(index) for index in range(count))
+
+
+def baskets(count: int, item_count: int, product_count: int) -> Iterator[Dict[str, Any]]:
+    return (basket(index, item_count, product_count) for index in range(count))
+
+
+def orders(user_count: int, orders_per_user: int, item_count: int, product_count: int) -> Iterator[Dict[str, Any]]:
+    return (
+        order(user_index, order_index, item_count, product_count)
+        for user_index in range(user_count)
+        for order_index in range(orders_per_user)
+    )
@@ -0,0 +1,291 @@
+"""
+Local HTTP gateway serving the product, basket and order handlers.
+
+Translates HTTP requests into the API Gateway proxy events the handlers expect, and
+their responses back into HTTP, so that standard HTTP load tools can be run against
+the real handler code:
+
+    python -m tests.benchmarks.gateway --workers 4 --port 3000 --products 10000 --users 1000
+    hey -z 30s -c 16 http://localhost:3000/product?category=Phone
+
+The routes are read from MssApiGateway's resource tree, so a path the deployed APIs
+do not serve is answered 403, as API Gateway answers it. Each worker process loads
+every handler and, like a lambda container, invokes one request at a time; the
+workers share the listening socket, so --workers sets the concurrency.
+
+By default the tables are served by a moto server in this process and seeded from
+tests.benchmarks.data. With --endpoint-url the handlers use that endpoint instead,
+e.g. DynamoDB Local, whose tables must exist. Checkouts write to the outbox table,
+but no stream delivers them to the order handler here. Export ASYNC_IO=true, with
+aiobotocore installed, to serve the routes that have one by their asyncio variant.
+"""
+from fnmatch import fnmatch
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import argparse
+import base64
+import http.server
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import uuid
+
+from tests.benchmarks.cold_start import AWS_ENVIRONMENT, COMMON_LAYER
+
+import simplejson as json
+
+# The services behind the APIs, with the attribute of MssApiGateway holding each API
+API_SERVICES = { 'product': 'productApi', 'basket': 'basketApi', 'order': 'orderApi' }
+
+# API Gateway's answers when no route matches and when the handler fails
+MISSING_ROUTE = (403, { 'message': 'Missing Authentication Token' })
+HANDLER_ERROR = (502, { 'message': 'Internal server error' })
+
+
+def api_routes() -> List[Tuple[str, str, str]]:
+    """
+    Build MssApiGateway with stand-in functions and walk the resource tree of its APIs.
+
+    Returns:
+    list: The (method, resource path, service) of every method of the APIs.
+    """
+    import aws_cdk as cdk
+    from aws_cdk import aws_apigateway as apigateway, aws_lambda as _lambda
+    from src.api_gateway.infrastructure import MssApiGateway
+
+    stack = cdk.Stack(cdk.App(), 'LocalGateway')
+    functions = {
+        f'{service}Function': _lambda.Function(stack, service,
+            runtime=_lambda.Runtime.PYTHON_3_10,
+            handler='index.handler',
+            code=_lambda.Code.from_inline('# served locally'))
+        for service in API_SERVICES
+    }
+    gateway = MssApiGateway(stack, 'ApiGateway', **functions)
+
+    return [
+        (construct.http_method, construct.resource.path, service)
+        for service, api_name in API_SERVICES.items()
+        for construct in getattr(gateway, api_name).node.find_all()
+        if isinstance(construct, apigateway.Method)
+    ]
+
+
+def proxy_event(method: str, target: str, headers: List[Tuple[str, str]], body: bytes,
+        binary_media_types: List[str], client_ip: str) -> Dict[str, Any]:
+    """
+    Returns:
+    dict: The API Gateway proxy event of an HTTP request, without its resource and path parameters.
+    """
+    url = urlsplit(target)
+    query = parse_qs(url.query, keep_blank_values=True)
+    multi_value_headers: Dict[str, List[str]] = {}
+    for name, value in headers:
+        multi_value_headers.setdefault(name, []).append(value)
+
+    content_type = next((value for name, value in headers if name.lower() == 'content-type'), '')
+    is_binary = bool(body) and any(fnmatch(content_type.split(';')[0].strip(), media_type) for media_type in binary_media_types)
+    return {
+        'httpMethod': method,
+        'path': url.path,
+        'queryStringParameters': { name: values[-1] for name, values in query.items() } or None,
+        'multiValueQueryStringParameters': query or None,
+        'headers': { name: values[-1] for name, values in multi_value_headers.items() } or None,
+        'multiValueHeaders': multi_value_headers or None,
+        'pathParameters': None,
+        'body': (base64.b64encode(body).decode('ascii') if is_binary else body.decode('utf-8')) if body else None,
+        'isBase64Encoded': is_binary,
+        'requestContext': {
+            'httpMethod': method,
+            'path': url.path,
+            'stage': 'local',
+            'requestId': str(uuid.uuid4()),
+            'identity': { 'sourceIp': client_ip }
+        }
+    }
+
+
+class Worker:
+    """
+    The handlers and route table of one worker process, invoking one request at a time.
+    """
+
+    def __init__(self, routes: List[Tuple[str, str, str]], binary_media_types: List[str]) -> None:
+        from tests.benchmarks.load import load_handler
+        from routing import Route, Router
+
+        handlers = { service: load_handler(service).handler for service in API_SERVICES }
+        self.router = Router([Route(method, template, handlers[service]) for method, template, service in routes])
+        self.services = { (method, template): service for method, template, service in routes }
+        self.binary_media_types = binary_media_types
+        self.lock = threading.Lock()
+
+    def invoke(self, event: Dict[str, Any]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """
+        Returns:
+        tuple: The status, headers and body of the HTTP response to an event.
+        """
+        try:
+            route, event = self.router.match(event)
+        except ValueError:
+            return self.error(MISSING_ROUTE)
+
+        service = self.services[(route.method, route.template)]
+        event = { **event, 'pathParameters': event.get('pathParameters') or None }
+        event['requestContext']['resourcePath'] = route.template
+        context = SimpleNamespace(aws_request_id=event['requestContext']['requestId'], function_name=f'{service}Function')
+
+        try:
+            with self.lock:
+                response = route.function(event, context)
+            status = int(response.get('statusCode', 200))
+            body = response.get('body') or ''
+            body = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+        except Exception as e:
+            logging.exception('%s %s failed: %s', route.method, route.template, e)
+            return self.error(HANDLER_ERROR)
+
+        headers = [(name, str(value)) for name, value in (response.get('headers') or {}).items()]
+        headers += [(name, str(value)) for name, values in (response.get('multiValueHeaders') or {}).items() for value in values]
+        if not any(name.lower() == 'content-type' for name, _ in headers):
+            headers.append(('Content-Type', 'application/json'))
+        return status, headers, body
+
+    def error(self, answer: Tuple[int, Dict[str, Any]]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        status, body = answer
+        return status, [('Content-Type', 'application/json')], json.dumps(body).encode('utf-8')
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    worker: Optional[Worker] = None
+
+    def handle_one_request(self) -> None:
+        self.raw_requestline = self.rfile.readline(65537)
+        if not self.raw_requestline:
+            self.close_connection = True
+            return
+        if not self.parse_request():
+            return
+
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        event = proxy_event(self.command, self.path, list(self.headers.items()), body,
+            self.worker.binary_media_types, self.client_address[0])
+        status, headers, response_body = self.worker.invoke(event)
+
+        self.send_response(status)
+        for name, value in headers:
+            if name.lower() not in ('content-length', 'connection'):
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(response_body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(response_body)
+        self.wfile.flush()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def serve(listener: socket.socket, routes: List[Tuple[str, str, str]], binary_media_types: List[str]) -> None:
+    """
+    Run one worker process: load the handlers, then serve requests from the shared listening socket.
+    """
+    sys.path.insert(0, COMMON_LAYER)
+    RequestHandler.worker = Worker(routes, binary_media_types)
+
+    server = http.server.ThreadingHTTPServer(listener.getsockname()[:2], RequestHandler, bind_and_activate=False)
+    server.socket.close()
+    # the workers race to accept each connection; the losers' accept fails rather than blocks
+    listener.setblocking(False)
+    server.socket = listener
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def start_moto(args: argparse.Namespace) -> Any:
+    """
+    Start a moto server in this process, create the tables and seed them.
+
+    Returns:
+    ThreadedMotoServer: The running server.
+    """
+    from moto.server import ThreadedMotoServer
+    from tests.benchmarks import data
+    from tests.benchmarks.load import create_tables, seed
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    os.environ['AWS_ENDPOINT_URL'] = f'http://{host}:{port}'
+
+    create_tables()
+    seeded = {
+        'product': seed('product', data.products(args.products)),
+        'basket': seed('basket', data.baskets(args.users, args.basket_items, args.products)),
+        'order': seed('order', data.orders(args.users, args.orders_per_user, args.basket_items, args.products))
+    }
+    print(f"seeded {', '.join(f'{count:,} {name}s' for name, count in seeded.items())} into moto at {os.environ['AWS_ENDPOINT_URL']}")
+    return server
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes, each invoking one request at a time')
+    parser.add_argument('--endpoint-url', default=None, help='serve the tables from this endpoint rather than a seeded moto server')
+    parser.add_argument('--products', type=int, default=1000, help='products to seed into moto')
+    parser.add_argument('--users', type=int, default=100, help='users to seed baskets and orders for')
+    parser.add_argument('--orders-per-user', type=int, default=5)
+    parser.add_argument('--basket-items', type=int, default=5, help='items in each seeded basket and order')
+    args = parser.parse_args(argv)
+
+    for name, value in AWS_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    # export LOG_LEVEL=INFO or METRICS_ENABLED=true to see the handlers' logs and metric records
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('LOG_SAMPLE_RATE', '0')
+    os.environ.setdefault('METRICS_ENABLED', 'false')
+
+    from src.api_gateway.infrastructure import BINARY_MEDIA_TYPES
+    routes = api_routes()
+
+    moto_server = None
+    if args.endpoint_url:
+        os.environ['AWS_ENDPOINT_URL'] = args.endpoint_url
+    else:
+        moto_server = start_moto(args)
+
+    listener = socket.create_server((args.host, args.port), backlog=1024)
+    # spawned rather than forked, so that no worker inherits the moto server's threads
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=serve, args=(listener, routes, BINARY_MEDIA_TYPES), daemon=True) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    print(f"serving {len(routes)} routes at http://{args.host}:{listener.getsockname()[1]} with {args.workers} workers")
+
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        listener.close()
+        if moto_server:
+            moto_server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
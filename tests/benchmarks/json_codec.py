@@ -0,0 +1,132 @@
+"""
+Microbenchmark of the json codec shared by the handlers, comparing the orjson
+and simplejson backends on representative product, basket and order payloads:
+
+    python -m tests.benchmarks.json_codec --items 1000 --repeat 20
+
+Every payload is also round-tripped through each backend to check that Decimals
+and DynamoDB sets survive unchanged. loads() parses with simplejson under either
+backend, since orjson cannot read floats as Decimals.
+"""
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                'src', 'lambda_layers', 'common'))
+import codec
+
+CATEGORIES = ['Phone', 'Tablet', 'Laptop', 'Watch', 'Headphones']
+
+
+def product(index: int) -> Dict[str, Any]:
+    return {
+        'id': f'{index:08d}-4c1e-8d3a-{index:012d}',
+        'name': f'Product {index}',
+        'description': 'A representative product description of a few dozen words. ' * 3,
+        'category': CATEGORIES[index % len(CATEGORIES)],
+        'price': Decimal(random.randint(100, 200000)) / 100,
+        'imageFile': f'product-{index}.png',
+        'tags': {'new', 'sale', f'tag{index % 7}'},
+        'version': Decimal(index % 5 + 1)
+    }
+
+
+def basket(index: int, item_count: int) -> Dict[str, Any]:
+    return {
+        'userName': f'user{index}',
+        'items': [
+            {
+                'productId': product(item)['id'],
+                'productName': f'Product {item}',
+                'color': 'Black',
+                'quantity': Decimal(random.randint(1, 5)),
+                'price': Decimal(random.randint(100, 200000)) / 100
+            }
+            for item in range(item_count)
+        ]
+    }
+
+
+def order(index: int) -> Dict[str, Any]:
+    payload = basket(index, 5)
+    payload.update({
+        'orderDate': f'2024-01-{index % 28 + 1:02d}T12:00:00.000000+00:00',
+        'totalPrice': sum(item['price'] for item in payload['items']),
+        'firstName': 'Jane',
+        'lastName': 'Doe',
+        'email': f'user{index}@example.com',
+        'address': '1 Main Street',
+        'paymentMethod': Decimal(1),
+        'cardInfo': '**** **** **** 4242'
+    })
+    return payload
+
+
+def payloads(items: int) -> Dict[str, Any]:
+    return {
+        'product list': [product(index) for index in range(items)],
+        'basket': basket(0, 100),
+        'order list': [order(index) for index in range(items)]
+    }
+
+
+def check_round_trip(payload: Any) -> None:
+    """
+    Raise if a payload does not survive dumps/loads with Decimals intact.
+    Sets come back as sorted lists.
+    """
+    def normalize(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(item) for item in value]
+        if isinstance(value, (set, frozenset)):
+            return sorted(value)
+        return value
+
+    decoded = codec.loads(codec.dumps(payload))
+    if decoded != normalize(payload):
+        raise AssertionError(f'{codec.BACKEND} does not round-trip the payload')
+
+
+def time_call(call: Callable[[], Any], repeat: int) -> float:
+    """
+    Returns:
+    float: The best time of one call in milliseconds.
+    """
+    return min(timeit.repeat(call, number=1, repeat=repeat)) * 1000
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=1000, help='items in the product and order lists')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per measurement; the best is reported')
+    args = parser.parse_args(argv)
+
+    backends = ['simplejson'] + (['orjson'] if codec.orjson else [])
+    random.seed(0)
+    data = payloads(args.items)
+
+    print(f"{'payload':<14}{'backend':<12}{'dumps':>10}{'loads':>10}{'size':>12}")
+    for name, payload in data.items():
+        for backend in backends:
+            codec.BACKEND = backend
+            check_round_trip(payload)
+            encoded = codec.dumps(payload)
+            dumps_ms = time_call(lambda: codec.dumps(payload), args.repeat)
+            loads_ms = time_call(lambda: codec.loads(encoded), args.repeat)
+            print(f"{name:<14}{backend:<12}{dumps_ms:>8.2f}ms{loads_ms:>8.2f}ms{len(encoded):>12,}")
+
+    if 'orjson' not in backends:
+        print('orjson (with Fragment support) is not installed; only simplejson was measured')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
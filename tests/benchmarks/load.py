@@ -0,0 +1,440 @@
+"""
+Load and latency benchmark of the product, basket, order and outbox handlers.
+
+The handlers run in this process against moto's in-memory DynamoDB and EventBridge;
+SQS and DynamoDB stream deliveries are built as lambda events directly. Tables are
+seeded straight into moto's backend from the generators in tests.benchmarks.data,
+so large seeds do not pay for an api call per item:
+
+    python -m tests.benchmarks.load --products 100000 --users 10000 --requests 5000
+    python -m tests.benchmarks.load --mix product-get=80,product-ids=20 --requests 20000
+
+For each operation in the request mix it reports throughput, p50/p95/p99 latency,
+the part of that latency spent outside aws calls, the aws api calls per request and
+the DynamoDB capacity each request consumed, as the handlers' metric records report
+it. The run fails if a request did not emit exactly one metric record.
+
+moto's scans and queries read the whole table, so 'aws' time grows with the seed
+while time outside aws calls and api calls per request do not; compare those across
+changes to the handlers. Time spent in parallel aws calls is subtracted in full.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import argparse
+import importlib
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+
+from tests.benchmarks import data
+from tests.benchmarks.cold_start import AWS_ENVIRONMENT, COMMON_LAYER, RUNTIMES, percentile
+
+import simplejson as json
+
+EVENT_BUS_NAME = 'MssEventBus'
+
+TABLES = {
+    'product': {
+        'key_schema': [('id', 'HASH', 'S')],
+        'indexes': {
+            'categoryNameIndex': [('category', 'HASH', 'S'), ('name', 'RANGE', 'S')],
+            'categoryPriceIndex': [('category', 'HASH', 'S'), ('price', 'RANGE', 'N')]
+        }
+    },
+    'basket': { 'key_schema': [('userName', 'HASH', 'S')] },
+    'order': {
+        'key_schema': [('userName', 'HASH', 'S'), ('orderDate', 'RANGE', 'S')],
+        'indexes': {
+            'orderDayIndex': [('orderDay', 'HASH', 'S'), ('orderDate', 'RANGE', 'S')]
+        }
+    },
+    'orderSummary': { 'key_schema': [('userName', 'HASH', 'S')] },
+    'outbox': { 'key_schema': [('id', 'HASH', 'S')] },
+    'idempotency': { 'key_schema': [('idempotencyKey', 'HASH', 'S')] }
+}
+
+SERVICES = {
+    'product': {
+        'DYNAMODB_TABLE_NAME': 'product',
+        'PRIMARY_KEY': 'id',
+        'CATEGORY_NAME_INDEX': 'categoryNameIndex',
+        'CATEGORY_PRICE_INDEX': 'categoryPriceIndex'
+    },
+    'basket': { 'DYNAMODB_TABLE_NAME': 'basket', 'PRIMARY_KEY': 'userName', 'OUTBOX_TABLE_NAME': 'outbox' },
+    'order': {
+        'DYNAMODB_TABLE_NAME': 'order',
+        'PARTITION_KEY': 'userName',
+        'SORT_KEY': 'orderDate',
+        'ORDER_SUMMARY_TABLE_NAME': 'orderSummary',
+        'ORDER_DAY_INDEX': 'orderDayIndex',
+        'IDEMPOTENCY_TABLE_NAME': 'idempotency'
+    },
+    'outbox': {
+        'EVENT_BUSNAME': EVENT_BUS_NAME,
+        'EVENT_SOURCE': 'com.swn.basket.checkoutbasket',
+        'DETAIL_TYPE': 'CheckoutBasket'
+    }
+}
+
+# Modules each service keeps beside its handler, under the same names in every service
+SERVICE_MODULES = ('index', 'ddb_client', 'event_bridge_client')
+
+DEFAULT_MIX = ('product-get=40,product-ids=10,product-category=10,basket-get=10,basket-add-item=10,'
+               'basket-checkout=5,order-get=5,order-summary=5,order-sqs=5,outbox-publish=5')
+
+
+class ApiCalls:
+    """
+    Counts the aws api calls made by any botocore client, and the time spent in them.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def install(self) -> None:
+        from botocore.client import BaseClient
+        make_api_call = BaseClient._make_api_call
+        api_calls = self
+
+        def counted(client: Any, operation_name: str, api_params: Dict[str, Any]) -> Any:
+            started = time.perf_counter()
+            try:
+                return make_api_call(client, operation_name, api_params)
+            finally:
+                elapsed = time.perf_counter() - started
+                with api_calls._lock:
+                    api_calls.count += 1
+                    api_calls.seconds += elapsed
+
+        BaseClient._make_api_call = counted
+
+    def snapshot(self) -> Tuple[int, float]:
+        with self._lock:
+            return self.count, self.seconds
+
+
+def serialize_transactions() -> None:
+    """
+    Run moto's TransactWriteItems one at a time. moto copies the tables a transaction
+    touches while other threads may write them, as the order handler's parallel
+    transactions do; DynamoDB itself needs no such care.
+    """
+    from moto.dynamodb.models import DynamoDBBackend
+    transact_write_items = DynamoDBBackend.transact_write_items
+    if getattr(transact_write_items, 'serialized', False):
+        return
+    lock = threading.Lock()
+
+    def serialized(backend: Any, transact_items: List[Dict[str, Any]]) -> None:
+        with lock:
+            return transact_write_items(backend, transact_items)
+
+    serialized.serialized = True
+    DynamoDBBackend.transact_write_items = serialized
+
+
+def create_tables() -> None:
+    import boto3
+    ddb = boto3.client('dynamodb')
+    for table_name, table in TABLES.items():
+        attributes = dict(
+            (name, attribute_type)
+            for key_schema in [table['key_schema'], *table.get('indexes', {}).values()]
+            for name, _, attribute_type in key_schema
+        )
+        params = {
+            'TableName': table_name,
+            'KeySchema': [{ 'AttributeName': name, 'KeyType': key_type } for name, key_type, _ in table['key_schema']],
+            'AttributeDefinitions': [{ 'AttributeName': name, 'AttributeType': attribute_type } for name, attribute_type in attributes.items()],
+            'BillingMode': 'PAY_PER_REQUEST'
+        }
+        if table.get('indexes'):
+            params['GlobalSecondaryIndexes'] = [
+                {
+                    'IndexName': index_name,
+                    'KeySchema': [{ 'AttributeName': name, 'KeyType': key_type } for name, key_type, _ in key_schema],
+                    'Projection': { 'ProjectionType': 'ALL' }
+                }
+                for index_name, key_schema in table['indexes'].items()
+            ]
+        ddb.create_table(**params)
+    boto3.client('events').create_event_bus(Name=EVENT_BUS_NAME)
+
+
+def seed(table_name: str, items: Iterable[Dict[str, Any]]) -> int:
+    """
+    Write items straight into moto's DynamoDB backend, bypassing the api.
+
+    Returns:
+    int: The number of items written.
+    """
+    from boto3.dynamodb.types import TypeSerializer
+    from moto.core import DEFAULT_ACCOUNT_ID
+    from moto.dynamodb.models import dynamodb_backends
+
+    backend = dynamodb_backends[DEFAULT_ACCOUNT_ID][AWS_ENVIRONMENT['AWS_DEFAULT_REGION']]
+    serializer = TypeSerializer()
+    count = 0
+    for item in items:
+        backend.put_item(table_name, { name: serializer.serialize(value) for name, value in item.items() })
+        count += 1
+    return count
+
+
+def load_handler(service_name: str) -> Any:
+    """
+    Import the handler of a service under its own environment, connecting its clients
+    while that environment is set, so that the handlers of every service can be
+    loaded into one process side by side.
+
+    Returns:
+    module: The service's index module.
+    """
+    service_path = os.path.join(RUNTIMES, service_name)
+    os.environ.update(SERVICES[service_name])
+    sys.path.insert(0, service_path)
+    try:
+        for name in SERVICE_MODULES:
+            sys.modules.pop(name, None)
+        module = importlib.import_module('index')
+        for name in SERVICE_MODULES[1:]:
+            client_module = sys.modules.get(name)
+            for attribute in getattr(client_module, '_lazy_attributes', {}):
+                getattr(client_module, attribute)
+    finally:
+        sys.path.remove(service_path)
+        for name in SERVICE_MODULES:
+            sys.modules.pop(name, None)
+    return module
+
+
+class RequestMix:
+    """
+    Builds the lambda event of each operation in the mix, against the seeded data.
+    """
+
+    def __init__(self, args: argparse.Namespace, rng: random.Random) -> None:
+        self.args = args
+        self.rng = rng
+        self.fresh = itertools.count(args.products)
+        self.checkout_users = itertools.count()
+        self.delivered_order_batch: List[Dict[str, Any]] = []
+        self.operations: Dict[str, Tuple[str, Callable[[], Dict[str, Any]]]] = {
+            'product-get': ('product', self.product_get),
+            'product-ids': ('product', self.product_ids),
+            'product-category': ('product', self.product_category),
+            'product-page': ('product', self.product_page),
+            'product-update': ('product', self.product_update),
+            'basket-get': ('basket', self.basket_get),
+            'basket-add-item': ('basket', self.basket_add_item),
+            'basket-checkout': ('basket', self.basket_checkout),
+            'order-get': ('order', self.order_get),
+            'order-summary': ('order', self.order_summary),
+            'order-recent': ('order', self.order_recent),
+            'order-sqs': ('order', self.order_sqs),
+            'order-redelivery': ('order', self.order_sqs_redelivery),
+            'outbox-publish': ('outbox', self.outbox_publish)
+        }
+
+    def random_product(self) -> int:
+        return self.rng.randrange(self.args.products)
+
+    def random_user(self) -> int:
+        return self.rng.randrange(self.args.users)
+
+    def product_get(self) -> Dict[str, Any]:
+        product_id = data.product_id(self.random_product())
+        return { 'httpMethod': 'GET', 'path': f'/product/{product_id}', 'pathParameters': { 'id': product_id } }
+
+    def product_ids(self) -> Dict[str, Any]:
+        ids = ','.join(data.product_id(self.random_product()) for _ in range(20))
+        return { 'httpMethod': 'GET', 'path': '/product', 'queryStringParameters': { 'ids': ids } }
+
+    def product_category(self) -> Dict[str, Any]:
+        query = { 'category': self.rng.choice(data.CATEGORIES), 'sortBy': 'price', 'limit': '20' }
+        return { 'httpMethod': 'GET', 'path': '/product', 'queryStringParameters': query }
+
+    def product_page(self) -> Dict[str, Any]:
+        return { 'httpMethod': 'GET', 'path': '/product', 'queryStringParameters': { 'limit': '100' } }
+
+    def product_update(self) -> Dict[str, Any]:
+        product_index = self.random_product()
+        body = { 'price': data.price(product_index + self.rng.randrange(100)) }
+        return { 'httpMethod': 'PUT', 'path': f'/product/{data.product_id(product_index)}',
+                 'pathParameters': { 'id': data.product_id(product_index) }, 'body': json.dumps(body) }
+
+    def basket_get(self) -> Dict[str, Any]:
+        user_name = data.user_name(self.random_user())
+        return { 'httpMethod': 'GET', 'path': f'/basket/{user_name}', 'pathParameters': { 'userName': user_name } }
+
+    def basket_add_item(self) -> Dict[str, Any]:
+        user_name = data.user_name(self.random_user())
+        item = data.basket_item(next(self.fresh))
+        return { 'httpMethod': 'POST', 'path': f'/basket/{user_name}/items',
+                 'pathParameters': { 'userName': user_name }, 'body': json.dumps(item) }
+
+    def basket_checkout(self) -> Dict[str, Any]:
+        # Every checkout empties a basket, so users are checked out in turn
+        body = { 'userName': data.user_name(next(self.checkout_users) % self.args.users), 'address': '1 Main Street' }
+        return { 'httpMethod': 'POST', 'path': '/basket/checkout', 'body': json.dumps(body) }
+
+    def order_get(self) -> Dict[str, Any]:
+        user_name = data.user_name(self.random_user())
+        return { 'httpMethod': 'GET', 'path': f'/order/{user_name}', 'pathParameters': { 'userName': user_name } }
+
+    def order_summary(self) -> Dict[str, Any]:
+        user_name = data.user_name(self.random_user())
+        return { 'httpMethod': 'GET', 'path': f'/order/{user_name}/summary', 'pathParameters': { 'userName': user_name } }
+
+    def order_recent(self) -> Dict[str, Any]:
+        # the last two days of seeded orders
+        until = data.order_date(23, self.args.orders_per_user - 1)
+        query = { 'since': (until - timedelta(days=2)).isoformat(), 'until': until.isoformat(), 'limit': '50' }
+        return { 'httpMethod': 'GET', 'path': '/order', 'queryStringParameters': query }
+
+    def order_sqs(self) -> Dict[str, Any]:
+        records = []
+        for _ in range(self.args.batch_size):
+            detail = data.basket(self.random_user(), self.args.basket_items, self.args.products)
+            detail.pop('productIds')
+            detail['idempotencyKey'] = str(next(self.fresh))
+            records.append({ 'eventSource': 'aws:sqs', 'messageId': str(next(self.fresh)), 'body': json.dumps({ 'detail': detail }) })
+        self.delivered_order_batch = records
+        return { 'Records': records }
+
+    def order_sqs_redelivery(self) -> Dict[str, Any]:
+        # the last batch of checkout events again, as SQS redelivers them
+        return { 'Records': self.delivered_order_batch or self.order_sqs()['Records'] }
+
+    def outbox_publish(self) -> Dict[str, Any]:
+        records = []
+        for _ in range(self.args.batch_size):
+            detail = data.basket(self.random_user(), self.args.basket_items, self.args.products)
+            detail.pop('productIds')
+            records.append({
+                'eventSource': 'aws:dynamodb',
+                'eventName': 'INSERT',
+                'dynamodb': { 'SequenceNumber': str(next(self.fresh)), 'NewImage': { 'detail': { 'S': json.dumps(detail) } } }
+            })
+        return { 'Records': records }
+
+
+def is_success(response: Any) -> bool:
+    if not isinstance(response, dict):
+        return False
+    if 'statusCode' in response:
+        return response['statusCode'] == 200
+    return not response.get('batchItemFailures')
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=10000, help='products to seed')
+    parser.add_argument('--users', type=int, default=1000, help='users to seed a basket for')
+    parser.add_argument('--orders-per-user', type=int, default=5, help='orders to seed per user')
+    parser.add_argument('--basket-items', type=int, default=5, help='items in each seeded basket and order')
+    parser.add_argument('--requests', type=int, default=2000, help='requests to send, after the warm-up')
+    parser.add_argument('--warmup', type=int, default=100, help='requests to send before measuring')
+    parser.add_argument('--batch-size', type=int, default=10, help='records in each sqs and stream event')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='comma-separated operation=weight pairs')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random request sequence')
+    args = parser.parse_args(argv)
+
+    os.environ.update(AWS_ENVIRONMENT, LOG_LEVEL='WARNING', LOG_SAMPLE_RATE='0')
+    sys.path.insert(0, COMMON_LAYER)
+
+    import metrics
+    metric_records = metrics.MemorySink()
+    metrics.set_sink(metric_records)
+
+    from moto import mock_aws
+    with mock_aws():
+        api_calls = ApiCalls()
+        api_calls.install()
+        serialize_transactions()
+        create_tables()
+
+        started = time.perf_counter()
+        seeded = {
+            'product': seed('product', data.products(args.products)),
+            'basket': seed('basket', data.baskets(args.users, args.basket_items, args.products)),
+            'order': seed('order', data.orders(args.users, args.orders_per_user, args.basket_items, args.products))
+        }
+        seed_seconds = time.perf_counter() - started
+        print(f"seeded {', '.join(f'{count:,} {name}s' for name, count in seeded.items())} in {seed_seconds:.1f}s")
+
+        handlers = { service_name: load_handler(service_name) for service_name in SERVICES }
+        request_mix = RequestMix(args, random.Random(args.seed))
+        weights = parse_mix(args.mix)
+        unknown = set(weights) - set(request_mix.operations)
+        if unknown:
+            parser.error(f"unknown operations {sorted(unknown)}; choose from {sorted(request_mix.operations)}")
+        names = list(weights)
+        sequence = request_mix.rng.choices(names, weights=[weights[name] for name in names], k=args.warmup + args.requests)
+
+        latencies = defaultdict(list)
+        outside_aws = defaultdict(list)
+        calls = defaultdict(int)
+        capacity = defaultdict(float)
+        errors = defaultdict(int)
+        measured_seconds = 0.0
+
+        for position, name in enumerate(sequence):
+            service_name, build_event = request_mix.operations[name]
+            event = build_event()
+            records_before = len(metric_records.records)
+            calls_before, aws_before = api_calls.snapshot()
+            request_started = time.perf_counter()
+            response = handlers[service_name].handler(event, None)
+            elapsed = time.perf_counter() - request_started
+            calls_after, aws_after = api_calls.snapshot()
+
+            records = metric_records.records[records_before:]
+            if len(records) != 1 or records[0]['service'] != service_name:
+                print(f"{name} emitted {len(records)} metric records instead of one for {service_name}")
+                return 1
+
+            if position < args.warmup:
+                continue
+            measured_seconds += elapsed
+            latencies[name].append(elapsed * 1000)
+            outside_aws[name].append(max(0.0, elapsed - (aws_after - aws_before)) * 1000)
+            calls[name] += calls_after - calls_before
+            capacity[name] += records[0]['ConsumedCapacity']
+            errors[name] += not is_success(response)
+
+    print(f"{'operation':<18}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}"
+          f"{'p50 non-aws':>13}{'p99 non-aws':>13}{'calls/req':>11}{'capacity/req':>14}")
+    for name in names:
+        samples = latencies[name]
+        if not samples:
+            continue
+        print(f"{name:<18}{len(samples):>9}{errors[name]:>8}{len(samples) / (sum(samples) / 1000):>9.0f}"
+              f"{percentile(samples, 50):>8.2f}ms{percentile(samples, 95):>8.2f}ms{percentile(samples, 99):>8.2f}ms"
+              f"{percentile(outside_aws[name], 50):>11.2f}ms{percentile(outside_aws[name], 99):>11.2f}ms"
+              f"{calls[name] / len(samples):>11.2f}{capacity[name] / len(samples):>14.2f}")
+
+    samples = [sample for name in names for sample in latencies[name]]
+    print(f"{'all':<18}{len(samples):>9}{sum(errors.values()):>8}{len(samples) / measured_seconds:>9.0f}"
+          f"{percentile(samples, 50):>8.2f}ms{percentile(samples, 95):>8.2f}ms{percentile(samples, 99):>8.2f}ms"
+          f"{'':>26}{sum(calls.values()) / len(samples):>11.2f}{sum(capacity.values()) / len(samples):>14.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
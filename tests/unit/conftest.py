@@ -0,0 +1,39 @@
+"""
+Fixtures shared by the unit tests: the common layer on the import path, and the
+handler of each service loaded against moto's in-memory aws.
+"""
+from typing import Any, Callable
+
+import os
+import sys
+
+import pytest
+
+from tests.benchmarks.cold_start import AWS_ENVIRONMENT, COMMON_LAYER
+
+os.environ.update(AWS_ENVIRONMENT, LOG_LEVEL='WARNING', LOG_SAMPLE_RATE='0', METRICS_ENABLED='false')
+sys.path.insert(0, COMMON_LAYER)
+
+
+@pytest.fixture
+def aws() -> Any:
+    """
+    Serve DynamoDB and EventBridge from moto, with the tables of the stack created.
+    """
+    from moto import mock_aws
+    from tests.benchmarks.load import create_tables, serialize_transactions
+
+    serialize_transactions()
+    with mock_aws():
+        create_tables()
+        yield
+
+
+@pytest.fixture
+def load_service(aws: Any) -> Callable[[str], Any]:
+    """
+    Returns:
+    callable: Imports the index module of a service, e.g. load_service('order'), under its own environment.
+    """
+    from tests.benchmarks.load import load_handler
+    return load_handler
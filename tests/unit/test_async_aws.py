@@ -0,0 +1,100 @@
+"""
+The async path, run against moto's server mode, since aiobotocore does not go through
+the botocore stubs that mock_aws patches.
+"""
+from contextlib import AsyncExitStack
+from decimal import Decimal
+from urllib.request import Request, urlopen
+
+import pytest
+
+pytest.importorskip('aiobotocore')
+
+import async_aws
+import batch_get
+import parallel_scan
+import transactions
+from routing import Route, Router
+
+
+@pytest.fixture
+def table(monkeypatch):
+    import boto3
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    monkeypatch.setenv('AWS_ENDPOINT_URL', f'http://{host}:{port}')
+    for name, value in (('_loop', None), ('_clients', {}), ('_client_lock', None), ('_exit_stack', AsyncExitStack())):
+        monkeypatch.setattr(async_aws, name, value)
+
+    boto3.client('dynamodb').create_table(
+        TableName='product',
+        KeySchema=[{ 'AttributeName': 'id', 'KeyType': 'HASH' }],
+        AttributeDefinitions=[{ 'AttributeName': 'id', 'AttributeType': 'S' }],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    try:
+        yield 'product'
+    finally:
+        async_aws.run(async_aws._exit_stack.aclose())
+        async_aws._loop.close()
+        # the backends of the server are shared by the process
+        urlopen(Request(f'http://{host}:{port}/moto-api/reset', method='POST'))
+        server.stop()
+
+
+def put_products(table, count):
+    async_aws.run(transactions.transact_write_async([
+        { 'Put': { 'TableName': table, 'Item': { 'id': f'p{index}', 'price': Decimal('9.99'), 'tags': { 'a', 'b' } } } }
+        for index in range(count)
+    ]))
+
+
+def test_transactions_write_plain_python_values(table):
+    put_products(table, 2)
+
+    async def get(product_id):
+        client = await async_aws.client('dynamodb')
+        return (await client.get_item(TableName=table, Key={ 'id': product_id }))['Item']
+
+    assert async_aws.run(get('p1')) == { 'id': 'p1', 'price': Decimal('9.99'), 'tags': { 'a', 'b' } }
+
+
+def test_batch_get_reads_every_chunk_concurrently(table):
+    for start in range(0, 150, 50):
+        async_aws.run(transactions.transact_write_async([
+            { 'Put': { 'TableName': table, 'Item': { 'id': f'p{index}' } } } for index in range(start, start + 50)
+        ]))
+
+    keys = [{ 'id': f'p{index}' } for index in range(250)]
+    items = async_aws.run(batch_get.batch_get_items_async(table, keys, consistent_read=True))
+
+    assert sorted(item['id'] for item in items) == sorted(f'p{index}' for index in range(150))
+
+
+def test_segmented_scan_pages_through_the_table(table):
+    put_products(table, 30)
+
+    page, scanned = parallel_scan.ExportPage(3, dict.fromkeys(range(3)), 12), []
+    while True:
+        pages, next_keys = async_aws.run(parallel_scan.scan_segments_async(table, page))
+        scanned.extend(item['id'] for items in pages for item in items)
+        if not next_keys:
+            break
+        page = page._replace(start_keys=next_keys)
+
+    assert sorted(scanned) == sorted(f'p{index}' for index in range(30))
+
+
+def test_routes_run_their_async_variant_when_enabled(monkeypatch):
+    async def both(event):
+        return await async_aws.gather(async_aws.sleep(0), async_aws.sleep(0))
+
+    route, event = Router([Route('GET', '/product', lambda event: 'sync', async_function=both)]).match({ 'httpMethod': 'GET', 'path': '/product' })
+    assert route.invoke(event) == 'sync'
+
+    monkeypatch.setattr(async_aws, 'ASYNC_IO', True)
+    monkeypatch.setattr(async_aws, '_loop', None)
+    assert route.invoke(event) == [None, None]
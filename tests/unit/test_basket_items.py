@@ -0,0 +1,169 @@
+from botocore.exceptions import ClientError
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+
+
+@pytest.fixture
+def basket(load_service):
+    return load_service('basket')
+
+
+def create_basket_event(items):
+    return { 'httpMethod': 'POST', 'path': '/basket', 'body': json.dumps({ 'userName': 'swn', 'items': items }) }
+
+
+def test_create_basket_keeps_its_totals(basket):
+    response = basket.handler(create_basket_event([
+        { 'productId': 'p1', 'price': Decimal('9.99') },
+        { 'productId': 'p2', 'price': 5 }
+    ]), None)
+
+    assert response['statusCode'] == 200
+    stored = basket.get_basket('swn')
+    assert (stored['totalPrice'], stored['productIds']) == (Decimal('14.99'), { 'p1', 'p2' })
+
+
+@pytest.mark.parametrize('items, error', [
+    ([{ 'productId': 'p1' }], 'productId and price should exist in item'),
+    ([{ 'price': 5 }], 'productId and price should exist in item'),
+    (['p1'], 'productId and price should exist in item'),
+    ([{ 'productId': 'p1', 'price': 'free' }], 'price should be a number in item'),
+    ([{ 'productId': 'p1', 'price': 'NaN' }], 'price should be a number in item'),
+    ({ 'productId': 'p1', 'price': 5 }, 'items should be a list'),
+    ([{ 'productId': 'p1', 'price': 5 }, { 'productId': 'p2', 'price': 1 }, { 'productId': 'p1', 'price': 5 }],
+     'Products should appear in a basket once: "p1"')
+])
+def test_create_basket_rejects_bad_items(basket, items, error):
+    response = basket.handler(create_basket_event(items), None)
+
+    assert response['statusCode'] == 400
+    assert json.loads(response['body'])['errorMsg'].startswith(error)
+    assert basket.db.basket_table.scan()['Items'] == []
+
+
+def test_add_basket_item_rejects_bad_items(basket):
+    with pytest.raises(ValueError, match='productId and price should exist in item'):
+        basket.add_basket_item('swn', { 'body': json.dumps({ 'productId': 'p1' }) })
+    with pytest.raises(ValueError, match='price should be a number in item'):
+        basket.add_basket_item('swn', { 'body': json.dumps({ 'productId': 'p1', 'price': 'free' }) })
+
+
+def add_item(basket, product_id, price):
+    return basket.add_basket_item('swn', { 'body': json.dumps({ 'productId': product_id, 'price': price }) })
+
+
+def stored(basket):
+    item = basket.get_basket('swn', consistent_read=True)
+    return [basket_item['productId'] for basket_item in item.get('items', [])], item.get('totalPrice'), item.get('productIds')
+
+
+def test_items_are_added_and_removed_with_their_totals(basket):
+    add_item(basket, 'p1', Decimal('9.99'))
+    add_item(basket, 'p2', 5)
+    assert stored(basket) == (['p1', 'p2'], Decimal('14.99'), { 'p1', 'p2' })
+
+    basket.remove_basket_item('swn', 'p1')
+    assert stored(basket) == (['p2'], 5, { 'p2' })
+
+    basket.remove_basket_item('swn', 'p2')
+    assert stored(basket) == ([], 0, None)
+
+    add_item(basket, 'p1', 2)
+    assert stored(basket) == (['p1'], 2, { 'p1' })
+
+
+def test_an_item_already_in_the_basket_is_rejected(basket):
+    add_item(basket, 'p1', 2)
+
+    response = basket.handler({
+        'httpMethod': 'POST', 'path': '/basket/swn/items', 'body': json.dumps({ 'productId': 'p1', 'price': 2 })
+    }, None)
+
+    assert response['statusCode'] == 400
+    assert json.loads(response['body'])['errorMsg'] == 'Product "p1" is already in the basket of user "swn"'
+    assert stored(basket) == (['p1'], 2, { 'p1' })
+
+
+def test_removing_an_item_not_in_the_basket_is_rejected(basket):
+    add_item(basket, 'p1', 2)
+
+    with pytest.raises(ValueError, match='is not in the basket'):
+        basket.remove_basket_item('swn', 'p2')
+
+
+class ConcurrentWrites:
+    """
+    Stands in for the basket table, running a concurrent write before each of the first update_item calls.
+    """
+
+    def __init__(self, table, *writes):
+        self.table = table
+        self.writes = list(writes)
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def update_item(self, **params):
+        if self.writes:
+            self.writes.pop(0)()
+        return self.table.update_item(**params)
+
+
+def test_remove_is_retried_when_the_basket_changed(basket, monkeypatch):
+    add_item(basket, 'p1', 1)
+    add_item(basket, 'p2', 2)
+    monkeypatch.setattr(basket.db, 'basket_table', ConcurrentWrites(basket.db.basket_table, lambda: add_item(basket, 'p3', 3)))
+
+    basket.remove_basket_item('swn', 'p1')
+
+    assert stored(basket) == (['p2', 'p3'], 5, { 'p2', 'p3' })
+
+
+def test_add_gives_up_when_the_basket_keeps_changing(basket, monkeypatch):
+    def conflict(**params):
+        raise ClientError({ 'Error': { 'Code': 'ConditionalCheckFailedException', 'Message': 'The conditional request failed' } }, 'UpdateItem')
+    table = ConcurrentWrites(basket.db.basket_table)
+    table.update_item = conflict
+    monkeypatch.setattr(basket.db, 'basket_table', table)
+
+    with pytest.raises(ValueError, match='was changed while adding an item'):
+        add_item(basket, 'p1', 1)
+
+
+def put_older_basket(basket, *product_ids, **attributes):
+    basket.db.basket_table.put_item(Item={
+        'userName': 'swn', 'items': [{ 'productId': product_id, 'price': 1 } for product_id in product_ids], **attributes
+    })
+
+
+def test_older_baskets_have_their_totals_filled_in_on_add(basket):
+    put_older_basket(basket, 'p1', 'p2')
+
+    with pytest.raises(ValueError, match='already in the basket'):
+        add_item(basket, 'p1', 1)
+    add_item(basket, 'p3', 1)
+
+    assert stored(basket) == (['p1', 'p2', 'p3'], 3, { 'p1', 'p2', 'p3' })
+
+
+def test_older_baskets_have_their_totals_filled_in_on_remove(basket):
+    put_older_basket(basket, 'p1', 'p2')
+
+    basket.remove_basket_item('swn', 'p1')
+    assert stored(basket) == (['p2'], 1, { 'p2' })
+
+    with pytest.raises(ValueError, match='already in the basket'):
+        add_item(basket, 'p2', 1)
+    assert stored(basket) == (['p2'], 1, { 'p2' })
+
+
+def test_baskets_that_lost_their_product_ids_get_them_back(basket):
+    put_older_basket(basket, 'p1', 'p2', totalPrice=2)
+
+    with pytest.raises(ValueError, match='already in the basket'):
+        add_item(basket, 'p1', 1)
+    add_item(basket, 'p3', 1)
+
+    assert stored(basket) == (['p1', 'p2', 'p3'], 3, { 'p1', 'p2', 'p3' })
@@ -0,0 +1,83 @@
+import pytest
+
+import aws_clients
+import batch_get
+
+
+class PartialBatchGet:
+    """
+    Stands in for the DynamoDB resource, answering each BatchGetItem in reverse order and leaving
+    every other key unprocessed for the first rounds calls, and the stuck keys unprocessed always.
+    """
+
+    def __init__(self, items, rounds=1, stuck=()):
+        self.items = { item['id']: item for item in items }
+        self.rounds = rounds
+        self.stuck = set(stuck)
+        self.calls = []
+
+    def batch_get_item(self, RequestItems):
+        (table_name, request), = RequestItems.items()
+        keys = request['Keys']
+        self.calls.append([key['id'] for key in keys])
+
+        unprocessed = [key for index, key in enumerate(keys)
+                       if key['id'] in self.stuck or (self.rounds > 0 and index % 2)]
+        self.rounds -= 1
+        processed = [key for key in keys if key not in unprocessed]
+        response = { 'Responses': { table_name: [self.items[key['id']] for key in reversed(processed) if key['id'] in self.items] } }
+        if unprocessed:
+            response['UnprocessedKeys'] = { table_name: { **request, 'Keys': unprocessed } }
+        return response
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    def install(*args, **kwargs):
+        resource = PartialBatchGet(*args, **kwargs)
+        monkeypatch.setattr(aws_clients, 'resource', lambda service_name: resource)
+        return resource
+    monkeypatch.setattr(batch_get.time, 'sleep', lambda seconds: None)
+    return install
+
+
+def keys(*ids):
+    return [{ 'id': product_id } for product_id in ids]
+
+
+def test_unprocessed_keys_are_retried_until_none_are_left(stub):
+    resource = stub([{ 'id': f'p{index}' } for index in range(4)], rounds=2)
+
+    items = batch_get.batch_get_items('product', keys('p0', 'p1', 'p2', 'p3'))
+
+    assert resource.calls == [['p0', 'p1', 'p2', 'p3'], ['p1', 'p3'], ['p3']]
+    assert sorted(item['id'] for item in items) == ['p0', 'p1', 'p2', 'p3']
+
+
+def test_keys_still_unprocessed_after_every_retry_fail(stub):
+    resource = stub([{ 'id': 'p0' }, { 'id': 'p1' }], rounds=0, stuck=['p1'])
+
+    with pytest.raises(RuntimeError, match='still unprocessed'):
+        batch_get.batch_get_items('product', keys('p0', 'p1'))
+    assert resource.calls == [['p0', 'p1']] + [['p1']] * batch_get.BATCH_GET_MAX_RETRIES
+
+
+def test_keys_are_read_in_chunks(stub):
+    resource = stub([], rounds=0)
+
+    batch_get.batch_get_items('product', keys(*(f'p{index}' for index in range(250))))
+
+    assert [len(call) for call in resource.calls] == [100, 100, 50]
+
+
+def test_products_come_back_in_the_order_requested(load_service, stub):
+    product = load_service('product')
+    resource = stub([{ 'id': f'p{index}', 'name': f'Product {index}' } for index in range(5)], rounds=1)
+    product.product_cache.put(('product', 'p2'), { 'id': 'p2', 'name': 'Cached' })
+
+    products = product.get_products_by_ids('p4, p0,missing,p2,p3,p0,p1')
+
+    assert [item['id'] for item in products] == ['p4', 'p0', 'p2', 'p3', 'p1']
+    assert products[2]['name'] == 'Cached'
+    assert resource.calls[0] == ['p4', 'p0', 'missing', 'p3', 'p1']
+    assert product.product_cache.get(('product', 'missing')) == {}
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+
+
+@pytest.fixture
+def basket(load_service):
+    basket = load_service('basket')
+    for user_name in ('valid', 'changed'):
+        basket.db.basket_table.put_item(Item={
+            'userName': user_name,
+            'items': [{ 'productId': 'p1', 'price': Decimal('9.99') }],
+            'totalPrice': Decimal('9.99'),
+            'productIds': { 'p1' }
+        })
+    return basket
+
+
+def bulk_checkout_event(*user_names):
+    return {
+        'httpMethod': 'POST',
+        'path': '/basket/checkout/bulk',
+        'body': json.dumps({ 'checkouts': [{ 'userName': user_name } for user_name in user_names] })
+    }
+
+
+def test_each_basket_reports_its_own_status(basket, monkeypatch):
+    batch_get_items = basket.batch_get_items
+
+    def read_then_change(*args, **kwargs):
+        # the basket changes after it is read, before its checkout transaction
+        baskets = batch_get_items(*args, **kwargs)
+        basket.add_basket_item('changed', { 'body': json.dumps({ 'productId': 'p2', 'price': 1 }) })
+        return baskets
+    monkeypatch.setattr(basket, 'batch_get_items', read_then_change)
+
+    response = basket.handler(bulk_checkout_event('valid', 'missing', 'changed'), None)
+
+    assert response['statusCode'] == 200
+    results = json.loads(response['body'])['body']
+    assert [(result['userName'], result['status']) for result in results] == [
+        ('valid', 'checkedOut'), ('missing', 'failed'), ('changed', 'failed')
+    ]
+    assert set(results[0]) == { 'userName', 'status', 'outboxEntryId' }
+    assert results[1]['errorMsg'] == 'No basket found for user "missing"'
+    assert results[2]['errorMsg'] == 'Basket for user "changed" was changed or checked out during checkout'
+
+    outbox_entry, = basket.db.ddb_resource.Table(basket.db.outbox_table_name).scan()['Items']
+    assert outbox_entry['id'] == results[0]['outboxEntryId']
+    assert basket.get_basket('valid') == {}
+    assert len(basket.get_basket('changed')['items']) == 2
+
+
+@pytest.mark.parametrize('checkouts', [[], [{ 'userName': 'valid' }, { 'userName': 'valid' }], [{}]])
+def test_bad_bulk_requests_are_rejected(basket, checkouts):
+    response = basket.handler({ **bulk_checkout_event(), 'body': json.dumps({ 'checkouts': checkouts }) }, None)
+
+    assert response['statusCode'] == 400
+    assert basket.get_basket('valid')['items']
@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+import uuid
+
+import pytest
+import simplejson as json
+
+import event_publisher
+
+
+@pytest.fixture
+def basket(load_service):
+    basket = load_service('basket')
+    for user_name in ('swn', 'other'):
+        basket.db.basket_table.put_item(Item={
+            'userName': user_name,
+            'items': [{ 'productId': 'p1', 'price': Decimal('9.99') }],
+            'totalPrice': Decimal('9.99'),
+            'productIds': { 'p1' }
+        })
+    return basket
+
+
+def checkout(basket, user_name):
+    return basket.checkout_basket({ 'body': json.dumps({ 'userName': user_name }) })
+
+
+def outbox_entries(basket):
+    return basket.db.ddb_resource.Table(basket.db.outbox_table_name).scan()['Items']
+
+
+def test_checkout_deletes_the_basket_and_writes_the_outbox_entry(basket):
+    response = checkout(basket, 'swn')
+
+    assert basket.get_basket('swn', consistent_read=True) == {}
+    entry, = outbox_entries(basket)
+    detail = json.loads(entry['detail'], use_decimal=True)
+    assert entry['id'] == response['outboxEntryId'] == detail['idempotencyKey']
+    assert (detail['userName'], detail['totalPrice'], detail['items']) == ('swn', Decimal('9.99'), [{ 'productId': 'p1', 'price': Decimal('9.99') }])
+    assert 'productIds' not in detail
+    assert entry['expiresAt'] > 0
+
+
+def test_a_changed_basket_cancels_the_checkout(basket):
+    stale = basket.get_basket('swn', consistent_read=True)
+    basket.add_basket_item('swn', { 'body': json.dumps({ 'productId': 'p2', 'price': 1 }) })
+
+    with pytest.raises(ValueError, match='was changed or checked out during checkout'):
+        basket.publish_checkout_basket_event(basket.prepare_order_payload({ 'userName': 'swn' }, dict(stale)), stale)
+
+    assert [item['productId'] for item in basket.get_basket('swn', consistent_read=True)['items']] == ['p1', 'p2']
+    assert outbox_entries(basket) == []
+
+
+def test_a_basket_checked_out_twice_is_rejected(basket):
+    stale = basket.get_basket('swn', consistent_read=True)
+    checkout(basket, 'swn')
+
+    with pytest.raises(ValueError, match='was changed or checked out during checkout'):
+        basket.publish_checkout_basket_event(basket.prepare_order_payload({ 'userName': 'swn' }, dict(stale)), stale)
+
+    assert len(outbox_entries(basket)) == 1
+
+
+def test_a_repeated_idempotency_key_is_rejected(basket, monkeypatch):
+    key = uuid.uuid4()
+    monkeypatch.setattr(basket.uuid, 'uuid4', lambda: key)
+    checkout(basket, 'swn')
+
+    with pytest.raises(ValueError, match='repeats an idempotencyKey already in the outbox'):
+        checkout(basket, 'other')
+
+    assert basket.get_basket('other', consistent_read=True)['userName'] == 'other'
+    entry, = outbox_entries(basket)
+    assert json.loads(entry['detail'])['userName'] == 'swn'
+
+
+class EventBridge:
+    """
+    Stands in for the EventBridge client, failing every attempt to publish the details in fail.
+    """
+
+    def __init__(self, *fail):
+        self.fail = set(fail)
+        self.published = []
+
+    def put_events(self, Entries):
+        results = [{ 'ErrorCode': 'InternalFailure' } if entry['Detail'] in self.fail else { 'EventId': entry['Detail'] } for entry in Entries]
+        self.published.extend(entry['Detail'] for entry in Entries if entry['Detail'] not in self.fail)
+        return { 'FailedEntryCount': sum('ErrorCode' in result for result in results), 'Entries': results }
+
+
+def stream_event(*records):
+    return {
+        'Records': [
+            { 'eventName': event_name, 'dynamodb': { 'SequenceNumber': str(index), 'NewImage': { 'detail': { 'S': detail } } } }
+            for index, (event_name, detail) in enumerate(records, start=100)
+        ]
+    }
+
+
+@pytest.fixture
+def outbox(load_service, monkeypatch):
+    monkeypatch.setattr(event_publisher.time, 'sleep', lambda seconds: None)
+    return load_service('outbox')
+
+
+def test_outbox_entries_are_published(outbox, monkeypatch):
+    client = EventBridge()
+    monkeypatch.setattr(outbox.eb, 'client', client)
+
+    response = outbox.handler(stream_event(('INSERT', 'a'), ('REMOVE', 'expired'), ('INSERT', 'b')), None)
+
+    assert response == { 'batchItemFailures': [] }
+    assert client.published == ['a', 'b']
+
+
+def test_partly_failed_batches_report_the_first_unpublished_record(outbox, monkeypatch):
+    client = EventBridge('b', 'd')
+    monkeypatch.setattr(outbox.eb, 'client', client)
+
+    response = outbox.handler(stream_event(('INSERT', 'a'), ('INSERT', 'b'), ('INSERT', 'c'), ('INSERT', 'd')), None)
+
+    assert response == { 'batchItemFailures': [{ 'itemIdentifier': '101' }] }
+    assert client.published == ['a', 'c']
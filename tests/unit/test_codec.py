@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import pytest
+
+import codec
+
+BACKENDS = ['simplejson', pytest.param('orjson', marks=pytest.mark.skipif(not codec.orjson, reason='orjson >= 3.9 is not installed'))]
+
+DOCUMENT = {
+    'id': 'p1',
+    'name': 'Café crème ☕',
+    'price': Decimal('9.99'),
+    'exact': Decimal('0.1000000000000000000000000000000000001'),
+    'quantity': 3,
+    'categories': { 'b', 'a' },
+    'flag': True,
+    'missing': None,
+    'items': [{ 'price': Decimal('-1E+2') }]
+}
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setattr(codec, 'BACKEND', request.param)
+    return request.param
+
+
+def test_round_trip(backend):
+    assert codec.loads(codec.dumps(DOCUMENT)) == { **DOCUMENT, 'categories': ['a', 'b'] }
+
+
+def test_both_backends_write_the_same_document(backend, monkeypatch):
+    written = codec.dumps(DOCUMENT, sort_keys=True)
+    monkeypatch.setattr(codec, 'BACKEND', 'simplejson')
+
+    assert written == codec.dumps(DOCUMENT, sort_keys=True)
+    assert '"Café crème ☕"' in written and '"exact":0.1000000000000000000000000000000000001' in written
+
+
+@pytest.mark.parametrize('number', [2 ** 64, -2 ** 63 - 1, 10 ** 37 + 1, Decimal(10 ** 38 - 1)])
+def test_integers_beyond_64_bits(backend, number):
+    written = codec.dumps({ 'big': number, 'name': 'é' })
+
+    assert written == f'{{"big":{number},"name":"é"}}'
+    assert codec.loads(written)['big'] == number
+
+
+def test_default_converts_other_types(backend):
+    class Point:
+        x, y = 1, 2
+
+    assert codec.dumps({ 'at': Point() }, default=lambda point: [point.x, point.y]) == '{"at":[1,2]}'
+    with pytest.raises(TypeError):
+        codec.dumps({ 'at': Point() })
+
+
+def test_loads_reads_non_integers_as_decimals():
+    assert codec.loads('{"price":9.99,"quantity":3}') == { 'price': Decimal('9.99'), 'quantity': 3 }
+    assert isinstance(codec.loads('9.99'), Decimal)
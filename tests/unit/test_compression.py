@@ -0,0 +1,47 @@
+import base64
+import gzip
+
+import pytest
+
+import compression
+
+# brotli is preferred when installed; without it, br falls back to gzip or nothing
+BR = 'br' if 'br' in compression.ENCODERS else 'gzip'
+BR_ONLY = 'br' if 'br' in compression.ENCODERS else None
+
+
+@pytest.mark.parametrize('accept_encoding, encoding', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('GZIP', 'gzip'),
+    ('deflate, gzip;q=0.5', 'gzip'),
+    ('gzip;q=0', None),
+    ('gzip;q=0.0, *', BR_ONLY),
+    ('*', BR),
+    ('*;q=0', None),
+    ('gzip;q=0.5, br;q=0.9', BR),
+    ('gzip;q=1.0, br;q=0.9', 'gzip'),
+    ('br;q=1, gzip;q=0', BR_ONLY),
+    ('gzip;q=high', None),
+    (' gzip ; q=0.8 , deflate', 'gzip')
+])
+def test_accepted_encoding(accept_encoding, encoding):
+    assert compression.accepted_encoding(accept_encoding) == encoding
+
+
+def test_small_or_unaccepted_responses_are_not_compressed():
+    response = { 'statusCode': 200, 'body': 'x' * (compression.COMPRESSION_MIN_SIZE - 1) }
+    assert compression.compress_response({ 'headers': { 'Accept-Encoding': 'gzip' } }, response) is response
+
+    response = { 'statusCode': 200, 'body': 'x' * compression.COMPRESSION_MIN_SIZE }
+    assert compression.compress_response({ 'headers': { 'Accept-Encoding': 'identity' } }, response) is response
+
+
+def test_large_responses_are_compressed():
+    body = 'x' * compression.COMPRESSION_MIN_SIZE
+    response = compression.compress_response({ 'headers': { 'accept-encoding': 'gzip' } }, { 'statusCode': 200, 'body': body })
+
+    assert response['isBase64Encoded'] and response['headers']['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(base64.b64decode(response['body'])).decode('utf-8') == body
@@ -0,0 +1,84 @@
+import pytest
+
+import event_publisher
+
+
+class EventBridge:
+    """
+    Stands in for the EventBridge client, failing the entries named in fail on the first calls.
+    """
+
+    def __init__(self, fail=None):
+        self.fail = fail or {}
+        self.calls = []
+
+    def put_events(self, Entries):
+        self.calls.append([entry['Detail'] for entry in Entries])
+        results = []
+        for entry in Entries:
+            if self.fail.get(entry['Detail'], 0) > 0:
+                self.fail[entry['Detail']] -= 1
+                results.append({ 'ErrorCode': 'ThrottlingException', 'ErrorMessage': 'Rate exceeded' })
+            else:
+                results.append({ 'EventId': entry['Detail'] })
+        return { 'FailedEntryCount': sum('ErrorCode' in result for result in results), 'Entries': results }
+
+
+def entry(detail, size=0):
+    return { 'Source': 'test', 'DetailType': 'Test', 'Detail': detail + ' ' * size }
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(event_publisher.time, 'sleep', lambda seconds: None)
+
+
+def test_only_failed_entries_are_retried():
+    client = EventBridge(fail={ 'b': 1, 'd': 2 })
+    publisher = event_publisher.BufferedEventPublisher(client)
+    for detail in 'abcd':
+        publisher.add(detail, entry(detail))
+    publisher.flush()
+
+    assert client.calls == [['a', 'b', 'c', 'd'], ['b', 'd'], ['d']]
+    assert publisher.calls == 3
+    assert publisher.failures == {}
+
+
+def test_entries_failing_every_attempt_are_reported():
+    client = EventBridge(fail={ 'b': 10 })
+    publisher = event_publisher.BufferedEventPublisher(client, max_retries=2)
+    for detail in 'ab':
+        publisher.add(detail, entry(detail))
+    publisher.flush()
+
+    assert client.calls == [['a', 'b'], ['b'], ['b']]
+    assert publisher.failures == { 'b': 'ThrottlingException: Rate exceeded' }
+
+
+def test_calls_are_packed_up_to_the_limits():
+    client = EventBridge()
+    publisher = event_publisher.BufferedEventPublisher(client)
+    for index in range(25):
+        publisher.add(index, entry(str(index)))
+    publisher.flush()
+
+    assert [len(call) for call in client.calls] == [10, 10, 5]
+
+    client.calls.clear()
+    half = event_publisher.MAX_BYTES_PER_CALL // 2
+    for detail in 'abc':
+        publisher.add(detail, entry(detail, half - 20))
+    publisher.flush()
+
+    assert [len(call) for call in client.calls] == [2, 1]
+
+
+def test_oversized_entries_are_not_sent():
+    client = EventBridge()
+    publisher = event_publisher.BufferedEventPublisher(client)
+    publisher.add('big', entry('big', event_publisher.MAX_BYTES_PER_CALL))
+    publisher.flush()
+
+    assert client.calls == []
+    assert 'exceeds' in publisher.failures['big']
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+
+
+@pytest.fixture
+def product(load_service):
+    product = load_service('product')
+    with product.db.product_table.batch_writer() as writer:
+        for index in range(250):
+            writer.put_item(Item={ 'id': f'p{index}', 'name': f'Product {index}', 'price': Decimal('9.99') })
+    return product
+
+
+def export_event(**query_params):
+    return { 'httpMethod': 'GET', 'path': '/product/export', 'queryStringParameters': query_params }
+
+
+def test_export_pages_through_the_whole_table(product):
+    exported, pages, query_params = [], 0, { 'segments': '4', 'limit': '40' }
+    while True:
+        response = product.export_products(export_event(**query_params))
+        lines = [json.loads(line) for line in response['body'].splitlines()]
+        assert len(lines) <= 40
+        exported.extend(item['id'] for item in lines)
+        pages += 1
+        if 'X-Next-Cursor' not in response['headers']:
+            break
+        query_params = { 'limit': '40', 'cursor': response['headers']['X-Next-Cursor'] }
+
+    assert sorted(exported) == sorted(f'p{index}' for index in range(250))
+    assert pages > 250 // 40
+
+
+@pytest.mark.parametrize('query_params', [
+    { 'segments': '0' },
+    { 'segments': '1000' },
+    { 'cursor': 'not-a-cursor' },
+    { 'cursor': 'eyJ0b3RhbFNlZ21lbnRzIjo0fQ' }
+])
+def test_export_rejects_bad_parameters(product, query_params):
+    with pytest.raises(ValueError):
+        product.export_products(export_event(**query_params))
+
+
+def test_segments_are_capped_at_the_connection_pool(load_service):
+    import aws_clients
+    import parallel_scan
+    assert parallel_scan.MAX_TOTAL_SEGMENTS == aws_clients.client_config_options()['max_pool_connections']
+
+
+def test_export_pages_are_not_cached(product):
+    response = product.handler({ **export_event(limit='10'), 'headers': { 'If-None-Match': '*' } }, None)
+
+    assert response['statusCode'] == 200
+    assert response['headers']['Cache-Control'] == 'no-store'
+    assert 'ETag' not in response['headers']
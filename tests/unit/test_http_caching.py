@@ -0,0 +1,48 @@
+import pytest
+
+import http_caching
+
+TAG = http_caching.etag('{"message":"ok"}')
+
+
+def test_etag_is_weak_and_stable():
+    assert TAG.startswith('W/"') and TAG.endswith('"')
+    assert http_caching.etag('{"message":"ok"}') == TAG
+    assert http_caching.etag('{"message":"other"}') != TAG
+
+
+@pytest.mark.parametrize('if_none_match, matched', [
+    (TAG, True),
+    (TAG[2:], True),
+    ('*', True),
+    (f'W/"other", {TAG}', True),
+    (f'"other" ,{TAG[2:]} ', True),
+    ('W/"other"', False),
+    ('"other", W/"another"', False),
+    (TAG[3:-1], False)
+])
+def test_matches(if_none_match, matched):
+    assert http_caching.matches(if_none_match, TAG) == matched
+
+
+def handler(event, context):
+    return { 'statusCode': 200, 'body': '{"message":"ok"}' }
+
+
+def test_conditional_get():
+    conditional = http_caching.conditional_get(60)(handler)
+
+    response = conditional({ 'httpMethod': 'GET' }, None)
+    assert response['headers'] == { 'ETag': TAG, 'Cache-Control': 'public, max-age=60' }
+
+    response = conditional({ 'httpMethod': 'GET', 'headers': { 'If-None-Match': TAG } }, None)
+    assert (response['statusCode'], response['body']) == (304, '')
+
+    assert conditional({ 'httpMethod': 'PUT', 'headers': { 'If-None-Match': TAG } }, None) == handler(None, None)
+
+
+def test_responses_with_their_own_cache_control_are_left_alone():
+    response = { 'statusCode': 200, 'headers': { 'cache-control': 'no-store' }, 'body': '{"id":"p1"}\n' }
+    conditional = http_caching.conditional_get(60)(lambda event, context: response)
+
+    assert conditional({ 'httpMethod': 'GET', 'headers': { 'If-None-Match': '*' } }, None) is response
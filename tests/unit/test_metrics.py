@@ -0,0 +1,129 @@
+import pytest
+import simplejson as json
+
+import metrics
+
+
+@pytest.fixture
+def records(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', True)
+    sink = metrics.MemorySink()
+    monkeypatch.setattr(metrics, 'sink', sink)
+    return sink.records
+
+
+def test_record_is_in_embedded_metric_format(monkeypatch):
+    monkeypatch.setattr(metrics.time, 'time', lambda: 1700000000.5)
+    invocation = metrics.Invocation('product', 'GET /product/{id}')
+    invocation.add_call('DynamoDB', 4.0, { 'TableName': 'product', 'CapacityUnits': 0.5 })
+    invocation.add_call('DynamoDB', 6.0, [{ 'TableName': 'product', 'CapacityUnits': 1 }, { 'TableName': 'outbox', 'CapacityUnits': 2 }])
+    invocation.add_call('DynamoDB', 1.0, None)
+
+    record = invocation.record(12.5, error=False)
+
+    assert record['_aws'] == {
+        'Timestamp': 1700000000500,
+        'CloudWatchMetrics': [{
+            'Namespace': metrics.METRICS_NAMESPACE,
+            'Dimensions': [['service', 'route']],
+            'Metrics': [
+                { 'Name': 'Duration', 'Unit': 'Milliseconds' },
+                { 'Name': 'Errors', 'Unit': 'Count' },
+                { 'Name': 'ConsumedCapacity', 'Unit': 'Count' },
+                { 'Name': 'DynamoDBCalls', 'Unit': 'Count' },
+                { 'Name': 'DynamoDBDuration', 'Unit': 'Milliseconds' },
+                { 'Name': 'EventBridgeCalls', 'Unit': 'Count' }
+            ]
+        }]
+    }
+    assert { name: value for name, value in record.items() if name != '_aws' } == {
+        'service': 'product',
+        'route': 'GET /product/{id}',
+        'consumedCapacityByTable': { 'product': 1.5, 'outbox': 2.0 },
+        'Duration': 12.5,
+        'Errors': 0,
+        'ConsumedCapacity': 3.5,
+        'DynamoDBCalls': 3,
+        'DynamoDBDuration': [4.0, 6.0, 1.0],
+        'EventBridgeCalls': 0
+    }
+
+
+def test_durations_are_capped_per_record():
+    invocation = metrics.Invocation('order', 'sqs')
+    for index in range(metrics.MAX_VALUES_PER_METRIC + 5):
+        invocation.add_call('DynamoDB', float(index), None)
+
+    record = invocation.record(1.0, error=False)
+
+    assert record['DynamoDBCalls'] == metrics.MAX_VALUES_PER_METRIC + 5
+    assert len(record['DynamoDBDuration']) == metrics.MAX_VALUES_PER_METRIC
+
+
+@pytest.mark.parametrize('event, route', [
+    ({ 'httpMethod': 'GET', 'resource': '/product/{id}', 'path': '/product/p1' }, 'GET /product/{id}'),
+    ({ 'httpMethod': 'DELETE', 'path': '/basket/swn/items/p1', 'pathParameters': { 'userName': 'swn', 'productId': 'p1' } },
+     'DELETE /basket/{userName}/items/{productId}'),
+    ({ 'Records': [{ 'eventSource': 'aws:sqs' }] }, 'sqs'),
+    ({ 'Records': [{ 'eventSource': 'aws:dynamodb' }] }, 'dynamodb-stream'),
+    ({ 'Records': [] }, 'records'),
+    ({ 'detail-type': 'CheckoutBasket' }, 'eventbridge')
+])
+def test_route_of(event, route):
+    assert metrics.route_of(event) == route
+
+
+def test_each_invocation_emits_one_record(records):
+    handler = metrics.instrument('product')(lambda event, context: { 'statusCode': 200 })
+    failing = metrics.instrument('product')(lambda event, context: { 'statusCode': 500 })
+
+    handler({ 'httpMethod': 'GET', 'path': '/product' }, None)
+    failing({ 'httpMethod': 'GET', 'path': '/product' }, None)
+
+    assert [(record['service'], record['route'], record['Errors']) for record in records] == [
+        ('product', 'GET /product', 0), ('product', 'GET /product', 1)
+    ]
+
+
+def test_raising_invocations_count_as_errors(records):
+    def handler(event, context):
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        metrics.instrument('order')(handler)({ 'Records': [{ 'eventSource': 'aws:sqs' }] }, None)
+
+    assert (records[0]['route'], records[0]['Errors']) == ('sqs', 1)
+
+
+def test_dynamodb_calls_return_their_consumed_capacity(aws, records):
+    import boto3
+
+    client = boto3.client('dynamodb')
+    metrics.instrument_client(client)
+    requests = []
+    client.meta.events.register('before-call.dynamodb', lambda params, model, **kwargs: requests.append((model.name, json.loads(params['body']))))
+
+    def handler(event, context):
+        client.get_item(TableName='product', Key={ 'id': { 'S': 'p1' } })
+        client.get_item(TableName='product', Key={ 'id': { 'S': 'p1' } }, ReturnConsumedCapacity='NONE')
+        client.describe_table(TableName='product')
+        return { 'statusCode': 200 }
+    metrics.instrument('product')(handler)({ 'httpMethod': 'GET', 'path': '/product/p1', 'pathParameters': { 'id': 'p1' } }, None)
+
+    assert [(name, body.get('ReturnConsumedCapacity')) for name, body in requests] == [
+        ('GetItem', 'TOTAL'), ('GetItem', 'NONE'), ('DescribeTable', None)
+    ]
+    record, = records
+    assert (record['route'], record['DynamoDBCalls'], len(record['DynamoDBDuration'])) == ('GET /product/{id}', 3, 3)
+    assert record['ConsumedCapacity'] == record['consumedCapacityByTable']['product'] > 0
+
+
+def test_clients_of_other_services_are_not_instrumented(aws, records):
+    import boto3
+
+    client = boto3.client('sqs')
+    metrics.instrument_client(client)
+
+    metrics.instrument('order')(lambda event, context: client.list_queues() and None)({ 'Records': [] }, None)
+
+    assert (records[0]['DynamoDBCalls'], records[0]['EventBridgeCalls']) == (0, 0)
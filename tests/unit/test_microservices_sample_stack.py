@@ -13,3 +13,57 @@ def test_sqs_queue_created():
 #     template.has_resource_properties("AWS::SQS::Queue", {
 #         "VisibilityTimeout": 300
 #     })
+
+
+def synthesize(**context):
+    # the lambda assets are not bundled, so no docker is needed
+    app = core.App(context={ "aws:cdk:bundling-stacks": [], **context })
+    return assertions.Template.from_stack(MicroservicesSampleStack(app, "microservices-sample"))
+
+
+def test_order_queue_outlasts_retries_of_the_order_function():
+    template = synthesize()
+    order_function, = template.find_resources("AWS::Lambda::Function", {
+        "Properties": { "FunctionName": "OrderFunction" }
+    }).values()
+    order_queue, = template.find_resources("AWS::SQS::Queue", {
+        "Properties": { "QueueName": "OrderQueue" }
+    }).values()
+
+    assert order_function["Properties"]["Timeout"] > 3
+    assert order_queue["Properties"]["VisibilityTimeout"] >= 6 * order_function["Properties"]["Timeout"]
+
+
+def test_failed_outbox_batches_are_kept_in_a_dead_letter_queue():
+    template = synthesize()
+    dead_letter_queue_id, = template.find_resources("AWS::SQS::Queue", {
+        "Properties": { "QueueName": "OutboxDeadLetterQueue" }
+    })
+
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {
+        "BisectBatchOnFunctionError": True,
+        "DestinationConfig": { "OnFailure": { "Destination": { "Fn::GetAtt": [dead_letter_queue_id, "Arn"] } } }
+    })
+
+
+def layer_names(function):
+    return [layer["Ref"] for layer in function["Properties"].get("Layers", [])]
+
+
+def test_async_io_is_opt_in():
+    template = synthesize()
+    assert not template.find_resources("AWS::Lambda::LayerVersion", {
+        "Properties": { "LayerName": "AsyncLayer" }
+    })
+    for function in template.find_resources("AWS::Lambda::Function", { "Properties": { "Handler": "index.handler" } }).values():
+        assert function["Properties"]["Environment"]["Variables"]["ASYNC_IO"] == "false"
+
+    template = synthesize(asyncIo="true")
+    async_layer_id, = template.find_resources("AWS::Lambda::LayerVersion", {
+        "Properties": { "LayerName": "AsyncLayer" }
+    })
+    functions = template.find_resources("AWS::Lambda::Function", { "Properties": { "Handler": "index.handler" } }).values()
+    assert functions
+    for function in functions:
+        assert function["Properties"]["Environment"]["Variables"]["ASYNC_IO"] == "true"
+        assert async_layer_id in layer_names(function)
@@ -0,0 +1,106 @@
+from botocore.exceptions import ClientError
+
+import time
+
+import pytest
+import simplejson as json
+
+
+@pytest.fixture
+def order(load_service):
+    return load_service('order')
+
+
+def sqs_event(*keys):
+    return {
+        'Records': [
+            {
+                'messageId': f'm{index}',
+                'eventSource': 'aws:sqs',
+                'body': json.dumps({ 'detail': { 'userName': f'user{index}', 'totalPrice': 10, 'idempotencyKey': key } })
+            }
+            for index, key in enumerate(keys)
+        ]
+    }
+
+
+def failed_message_ids(response):
+    return [failure['itemIdentifier'] for failure in response['batchItemFailures']]
+
+
+def order_keys(order):
+    return sorted(item['idempotencyKey'] for item in order.db.order_table.scan()['Items'])
+
+
+def recorded_keys(order):
+    return sorted(item['idempotencyKey'] for item in order.db.idempotency_table.scan()['Items'])
+
+
+def new_container(order):
+    order.recent_idempotency_keys._entries.clear()
+
+
+def test_duplicates_within_a_batch_are_written_once(order):
+    response = order.sqs_invocation(sqs_event('k1', 'k2', 'k1'))
+
+    assert failed_message_ids(response) == []
+    assert order_keys(order) == ['k1', 'k2']
+    assert recorded_keys(order) == ['k1', 'k2']
+
+
+def test_redelivery_is_dropped(order):
+    order.sqs_invocation(sqs_event('k1'))
+    new_container(order)
+
+    response = order.sqs_invocation(sqs_event('k1', 'k2'))
+
+    assert failed_message_ids(response) == []
+    assert order_keys(order) == ['k1', 'k2']
+
+
+def test_expired_key_is_claimed_again(order):
+    order.db.idempotency_table.put_item(Item={ 'idempotencyKey': 'k1', 'expiresAt': int(time.time()) - 1 })
+
+    order.sqs_invocation(sqs_event('k1'))
+
+    assert order_keys(order) == ['k1']
+
+
+def test_failed_write_records_no_key(order, monkeypatch):
+    def transact_write(actions):
+        raise ClientError({ 'Error': { 'Code': 'InternalServerError', 'Message': 'Internal server error' } }, 'TransactWriteItems')
+    with monkeypatch.context() as patch:
+        patch.setattr(order, 'transact_write', transact_write)
+        response = order.sqs_invocation(sqs_event('k1'))
+
+    assert failed_message_ids(response) == ['m0']
+    assert order_keys(order) == [] and recorded_keys(order) == []
+
+    response = order.sqs_invocation(sqs_event('k1'))
+
+    assert failed_message_ids(response) == []
+    assert order_keys(order) == ['k1']
+
+
+def test_crash_during_write_loses_no_order(order, monkeypatch):
+    # e.g. the function timing out while the transaction is in flight
+    def transact_write(actions):
+        raise TimeoutError('Task timed out')
+    with monkeypatch.context() as patch:
+        patch.setattr(order, 'transact_write', transact_write)
+        with pytest.raises(TimeoutError):
+            order.sqs_invocation(sqs_event('k1', 'k2'))
+    new_container(order)
+
+    response = order.sqs_invocation(sqs_event('k1', 'k2'))
+
+    assert failed_message_ids(response) == []
+    assert order_keys(order) == ['k1', 'k2']
+
+
+def test_create_order_is_idempotent(order):
+    order.create_order({ 'userName': 'swn', 'totalPrice': 10, 'idempotencyKey': 'k1' })
+    new_container(order)
+
+    assert order.create_order({ 'userName': 'swn', 'totalPrice': 10, 'idempotencyKey': 'k1' }) == {}
+    assert order_keys(order) == ['k1']
@@ -0,0 +1,66 @@
+import pytest
+
+ORDER_DATES = [
+    '2024-12-30T23:59:59.999999+00:00',
+    '2024-12-31T00:00:00+00:00',
+    '2024-12-31T10:00:00.123456+00:00',
+    '2025-01-01T00:00:00.000001+00:00'
+]
+
+
+@pytest.fixture
+def order(load_service):
+    order = load_service('order')
+    for order_date in ORDER_DATES:
+        order.db.order_table.put_item(Item={ 'userName': 'swn', 'orderDate': order_date, 'orderDay': order_date[:10] })
+    return order
+
+
+def order_dates(order_service, **query_params):
+    page = order_service.get_order({ 'pathParameters': { 'userName': 'swn' }, 'queryStringParameters': query_params })
+    return [item['orderDate'] for item in page.items]
+
+
+@pytest.mark.parametrize('value, end_of_day, bound', [
+    ('2024-12-31', False, '2024-12-31T00:00:00+00:00'),
+    ('2024-12-31', True, '2024-12-31T23:59:59.999999+00:00'),
+    ('2024-12-31T10:00:00Z', True, '2024-12-31T10:00:00+00:00'),
+    ('2024-12-31T10:00:00', False, '2024-12-31T10:00:00+00:00'),
+    ('2024-12-31T12:00:00+02:00', False, '2024-12-31T10:00:00+00:00')
+])
+def test_order_date_bound_is_stored_format(load_service, value, end_of_day, bound):
+    assert load_service('order').order_date_bound(value, end_of_day) == bound
+
+
+def test_order_date_bound_rejects_other_formats(load_service):
+    with pytest.raises(ValueError):
+        load_service('order').order_date_bound('yesterday')
+
+
+def test_date_only_to_includes_the_whole_day(order):
+    assert order_dates(order, **{ 'to': '2024-12-31', 'order': 'asc' }) == ORDER_DATES[:3]
+    assert order_dates(order, **{ 'from': '2024-12-31', 'to': '2024-12-31' }) == ORDER_DATES[2:0:-1]
+
+
+def test_time_bounds_are_compared_in_utc(order):
+    assert order_dates(order, **{ 'from': '2024-12-31T12:00:00.123456+02:00', 'to': '2025-01-01T00:00:00Z' }) == [ORDER_DATES[2]]
+
+
+def recent_order_dates(order_service, **query_params):
+    return [item['orderDate'] for item in order_service.get_recent_orders({ 'queryStringParameters': query_params })]
+
+
+def test_date_only_until_includes_the_whole_day(order):
+    assert recent_order_dates(order, since='2024-12-30', until='2024-12-31') == ORDER_DATES[2::-1]
+
+
+def test_z_suffixed_since_is_compared_in_utc(order):
+    assert recent_order_dates(order, since='2024-12-31T00:00:00Z', until='2025-01-01') == ORDER_DATES[:0:-1]
+    assert recent_order_dates(order, since='2024-12-31T12:00:00+02:00', until='2024-12-31') == [ORDER_DATES[2]]
+
+
+def test_recent_orders_window_is_checked(order):
+    with pytest.raises(ValueError):
+        order.get_recent_orders({ 'queryStringParameters': { 'since': '2025-01-01', 'until': '2024-12-31' } })
+    with pytest.raises(ValueError):
+        order.get_recent_orders({ 'queryStringParameters': { 'since': '2024-01-01', 'until': '2024-12-31' } })
@@ -0,0 +1,71 @@
+from botocore.exceptions import ClientError
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+
+
+@pytest.fixture
+def order(load_service):
+    return load_service('order')
+
+
+def sqs_event(*details):
+    return {
+        'Records': [
+            { 'messageId': f'm{index}', 'eventSource': 'aws:sqs', 'body': json.dumps({ 'detail': detail }) }
+            for index, detail in enumerate(details)
+        ]
+    }
+
+
+def summary(order, user_name):
+    return order.db.summary_table.get_item(Key={ 'userName': user_name }).get('Item')
+
+
+def test_summary_is_kept_with_the_orders(order):
+    order.sqs_invocation(sqs_event(
+        { 'userName': 'a', 'totalPrice': Decimal('10.5'), 'idempotencyKey': 'k1' },
+        { 'userName': 'b', 'totalPrice': 7, 'idempotencyKey': 'k2' },
+        { 'userName': 'a', 'totalPrice': 2, 'idempotencyKey': 'k3' },
+        { 'userName': 'a', 'totalPrice': 1 }
+    ))
+
+    orders = order.db.order_table.query(KeyConditionExpression='userName = :a', ExpressionAttributeValues={ ':a': 'a' })['Items']
+    a = summary(order, 'a')
+    assert (a['orderCount'], a['totalSpend']) == (3, Decimal('13.5'))
+    assert (a['firstOrderDate'], a['lastOrderDate']) == (orders[0]['orderDate'], orders[-1]['orderDate'])
+    assert (summary(order, 'b')['orderCount'], summary(order, 'b')['totalSpend']) == (1, 7)
+
+
+def test_redelivery_is_not_counted_twice(order):
+    order.sqs_invocation(sqs_event({ 'userName': 'a', 'totalPrice': 10, 'idempotencyKey': 'k1' }))
+    order.recent_idempotency_keys._entries.clear()
+
+    order.sqs_invocation(sqs_event({ 'userName': 'a', 'totalPrice': 10, 'idempotencyKey': 'k1' }))
+
+    assert summary(order, 'a')['orderCount'] == 1
+
+
+def test_failed_write_changes_no_summary(order, monkeypatch):
+    def transact_write(actions):
+        raise ClientError({ 'Error': { 'Code': 'InternalServerError', 'Message': 'Internal server error' } }, 'TransactWriteItems')
+    monkeypatch.setattr(order, 'transact_write', transact_write)
+
+    response = order.sqs_invocation(sqs_event({ 'userName': 'a', 'totalPrice': 10, 'idempotencyKey': 'k1' }))
+
+    assert response['batchItemFailures'] == [{ 'itemIdentifier': 'm0' }]
+    assert summary(order, 'a') is None
+
+
+def test_last_order_date_only_moves_forward(order):
+    order.db.summary_table.put_item(Item={
+        'userName': 'a', 'orderCount': 1, 'totalSpend': 5,
+        'firstOrderDate': '2999-01-01T00:00:00+00:00', 'lastOrderDate': '2999-01-01T00:00:00+00:00'
+    })
+
+    order.create_order({ 'userName': 'a', 'totalPrice': 10, 'idempotencyKey': 'k1' })
+
+    a = summary(order, 'a')
+    assert (a['orderCount'], a['totalSpend'], a['lastOrderDate']) == (2, 15, '2999-01-01T00:00:00+00:00')
+    assert len(order.db.order_table.scan()['Items']) == 1
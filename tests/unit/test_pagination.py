@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import base64
+
+import pytest
+
+import pagination
+
+
+@pytest.mark.parametrize('key', [
+    { 'id': 'p1' },
+    { 'userName': 'swn', 'orderDate': '2024-12-31T10:00:00+00:00' },
+    { 'id': 'ü/+?&=', 'price': Decimal('10.5') }
+])
+def test_cursor_round_trip(key):
+    cursor = pagination.encode_cursor(key)
+
+    assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+    assert pagination.decode_cursor(cursor) == key
+
+
+def test_no_last_evaluated_key_has_no_cursor():
+    assert pagination.encode_cursor(None) is None
+    assert pagination.encode_cursor({}) is None
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor',
+    base64.urlsafe_b64encode(b'{"id": ').decode('ascii'),
+    base64.urlsafe_b64encode(b'["p1"]').decode('ascii'),
+    base64.urlsafe_b64encode(b'{}').decode('ascii'),
+    base64.urlsafe_b64encode(b'"p1"').decode('ascii')
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        pagination.decode_cursor(cursor)
+
+
+def test_page_params():
+    cursor = pagination.encode_cursor({ 'id': 'p1' })
+
+    assert pagination.page_params({}) == { 'Limit': pagination.DEFAULT_PAGE_SIZE }
+    assert pagination.page_params({ 'queryStringParameters': { 'limit': '10', 'cursor': cursor } }) == { 'Limit': 10, 'ExclusiveStartKey': { 'id': 'p1' } }
+    assert pagination.page_params({ 'queryStringParameters': { 'limit': str(pagination.MAX_PAGE_SIZE + 1) } }) == { 'Limit': pagination.MAX_PAGE_SIZE }
+
+
+@pytest.mark.parametrize('limit', ['ten', '0', '-1'])
+def test_invalid_limits_are_rejected(limit):
+    with pytest.raises(ValueError, match='limit must be'):
+        pagination.page_params({ 'queryStringParameters': { 'limit': limit } })
+
+
+def test_page_body():
+    page = pagination.read_page({ 'Items': [{ 'id': 'p1' }, { 'id': 'p2' }], 'LastEvaluatedKey': { 'id': 'p2' } })
+
+    assert pagination.codec.loads(pagination.encode_page_body('ok', page)) == {
+        'message': 'ok', 'body': [{ 'id': 'p1' }, { 'id': 'p2' }], 'nextCursor': page.next_cursor
+    }
+    assert pagination.decode_cursor(page.next_cursor) == { 'id': 'p2' }
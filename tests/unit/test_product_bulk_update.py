@@ -0,0 +1,142 @@
+from botocore.exceptions import ClientError
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+
+
+@pytest.fixture
+def product(load_service):
+    product = load_service('product')
+    with product.db.product_table.batch_writer() as writer:
+        for index in range(150):
+            writer.put_item(Item={ 'id': f'p{index}', 'name': f'Product {index}', 'price': Decimal('9.99') })
+    return product
+
+
+def bulk_update_event(updates):
+    return { 'httpMethod': 'PUT', 'path': '/product/bulk', 'body': json.dumps({ 'updates': updates }) }
+
+
+def versions(product):
+    return { item['id']: item.get('version') for item in product.db.product_table.scan()['Items'] }
+
+
+@pytest.mark.parametrize('bad_update', [
+    { 'id': 'bad', 'version': 1 },
+    { 'id': 'bad', 'version': 'one', 'price': 1 },
+    { 'id': 'bad', 'version': -1, 'price': 1 },
+    { 'id': 'bad', 'version': True, 'price': 1 }
+])
+def test_bad_update_fails_the_request_before_any_transaction(product, bad_update):
+    updates = [{ 'id': f'p{index}', 'version': 0, 'price': 19 } for index in range(150)] + [bad_update]
+    transactions = []
+    product.transact_write = transactions.append
+
+    with pytest.raises(ValueError):
+        product.bulk_update_products(bulk_update_event(updates))
+
+    assert transactions == []
+    assert set(versions(product).values()) == { None }
+
+
+def test_bulk_update_reports_each_update(product):
+    product.product_cache.put(('product', 'p0'), { 'id': 'p0', 'price': Decimal('9.99') })
+
+    results = product.bulk_update_products(bulk_update_event(
+        [{ 'id': f'p{index}', 'version': 0, 'price': 19 } for index in range(120)] + [{ 'id': 'p120', 'version': 3, 'price': 19 }]
+    ))
+
+    assert [result['status'] for result in results] == ['updated'] * 120 + ['conflict']
+    assert results[0]['version'] == 1
+    assert versions(product)['p0'] == 1
+    assert product.product_cache.get(('product', 'p0')) is None
+
+
+def test_cancellation_reasons_map_to_item_statuses(product):
+    calls = []
+
+    def transact_write(actions):
+        calls.append([action['Update']['Key']['id'] for action in actions])
+        if len(calls) == 1:
+            raise ClientError({
+                'Error': { 'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled' },
+                'CancellationReasons': [
+                    { 'Code': 'None' },
+                    { 'Code': 'ConditionalCheckFailed' },
+                    { 'Code': 'ValidationError', 'Message': 'Item size has exceeded the maximum allowed size' },
+                    { 'Code': 'TransactionConflict' }
+                ]
+            }, 'TransactWriteItems')
+        return {}
+    product.transact_write = transact_write
+
+    results = product.transact_product_updates([{ 'id': f'p{index}', 'version': 1, 'price': 19 } for index in range(4)])
+
+    assert calls == [['p0', 'p1', 'p2', 'p3'], ['p0', 'p3']]
+    assert [result['status'] for result in results] == ['updated', 'conflict', 'failed', 'updated']
+    assert results[2]['errorMsg'] == 'Item size has exceeded the maximum allowed size'
+    assert results[3]['version'] == 2
+
+
+def test_update_that_cannot_be_built_fails_alone(product):
+    product.transact_write = lambda actions: {}
+
+    results = product.transact_product_updates([{ 'id': 'p0', 'version': 0, 'price': 19 }, { 'id': 'p1', 'version': 0 }])
+
+    assert [result['status'] for result in results] == ['updated', 'failed']
+
+
+def cancelled(*codes):
+    return ClientError({
+        'Error': { 'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled' },
+        'CancellationReasons': [{ 'Code': code } for code in codes]
+    }, 'TransactWriteItems')
+
+
+@pytest.fixture
+def sleeps(product, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(product.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def test_contended_updates_are_retried_after_a_backoff(product, sleeps):
+    cancellations = [cancelled('TransactionConflict', 'None'), cancelled('None', 'ThrottlingError')]
+
+    def transact_write(actions):
+        if cancellations:
+            raise cancellations.pop(0)
+        return {}
+    product.transact_write = transact_write
+
+    results = product.transact_product_updates([{ 'id': f'p{index}', 'version': 0, 'price': 19 } for index in range(2)])
+
+    assert [result['status'] for result in results] == ['updated', 'updated']
+    assert len(sleeps) == 2 and 0 <= sleeps[0] <= 0.1 and 0 <= sleeps[1] <= 0.2
+
+
+def test_updates_cancelled_by_others_are_retried_at_once(product, sleeps):
+    cancellations = [cancelled('None', 'ConditionalCheckFailed')]
+
+    def transact_write(actions):
+        if cancellations:
+            raise cancellations.pop(0)
+        return {}
+    product.transact_write = transact_write
+
+    results = product.transact_product_updates([{ 'id': f'p{index}', 'version': 0, 'price': 19 } for index in range(2)])
+
+    assert [result['status'] for result in results] == ['updated', 'conflict']
+    assert sleeps == []
+
+
+def test_updates_contended_on_every_attempt_fail(product, sleeps):
+    def transact_write(actions):
+        raise cancelled('TransactionConflict')
+    product.transact_write = transact_write
+
+    results = product.transact_product_updates([{ 'id': 'p0', 'version': 0, 'price': 19 }])
+
+    assert results == [{ 'id': 'p0', 'status': 'failed', 'errorMsg': 'Transaction was cancelled repeatedly' }]
+    assert len(sleeps) == product.BULK_UPDATE_MAX_ATTEMPTS - 1
@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+
+
+@pytest.fixture
+def product(load_service):
+    product = load_service('product')
+    for index in range(3):
+        product.db.product_table.put_item(Item={ 'id': f'p{index}', 'name': f'Product {index}', 'price': Decimal('9.99'), 'version': 1 })
+    return product
+
+
+def page_ids(product):
+    return sorted(item['id'] for item in product.get_all_products({}).items)
+
+
+def change_behind_the_cache(product, product_id, price):
+    product.db.product_table.update_item(Key={ 'id': product_id }, UpdateExpression='SET price = :price', ExpressionAttributeValues={ ':price': price })
+
+
+def test_reads_are_served_from_the_cache(product):
+    assert product.get_product('p0')['price'] == Decimal('9.99')
+    change_behind_the_cache(product, 'p0', 1)
+
+    assert product.get_product('p0')['price'] == Decimal('9.99')
+    assert product.get_products_by_ids('p0,p1')[0]['price'] == Decimal('9.99')
+    assert product.product_cache.hits >= 2
+
+
+def test_create_invalidates_cached_pages(product):
+    assert page_ids(product) == ['p0', 'p1', 'p2']
+
+    product.create_product({ 'body': json.dumps({ 'name': 'New', 'price': 1 }) })
+
+    assert len(page_ids(product)) == 4
+
+
+def test_update_invalidates_the_product_and_cached_pages(product):
+    product.get_product('p0')
+    page_ids(product)
+
+    product.update_product({ 'pathParameters': { 'id': 'p0' }, 'body': json.dumps({ 'price': 5, 'version': 1 }) })
+
+    assert product.get_product('p0')['price'] == 5
+    assert next(item for item in product.get_all_products({}).items if item['id'] == 'p0')['price'] == 5
+
+
+def test_delete_invalidates_the_product_and_cached_pages(product):
+    product.get_product('p1')
+    page_ids(product)
+
+    product.delete_product('p1')
+
+    assert product.get_product('p1') == {}
+    assert page_ids(product) == ['p0', 'p2']
+
+
+def test_writes_leave_other_products_cached(product):
+    product.get_product('p0')
+    change_behind_the_cache(product, 'p0', 1)
+
+    product.delete_product('p1')
+
+    assert product.get_product('p0')['price'] == Decimal('9.99')
+
+
+def test_bulk_update_invalidates_every_product(product):
+    product.get_product('p0')
+    product.get_product('p2')
+
+    product.bulk_update_products({ 'body': json.dumps({ 'updates': [
+        { 'id': 'p0', 'version': 1, 'price': 3 }, { 'id': 'p2', 'version': 1, 'price': 4 }
+    ] }) })
+
+    assert (product.get_product('p0')['price'], product.get_product('p2')['price']) == (3, 4)
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+import simplejson as json
+
+PRODUCTS = [
+    ('p0', 'Phone B', 'Phone', '300'),
+    ('p1', 'Phone A', 'Phone', '500'),
+    ('p2', 'Phone C', 'Phone', '100'),
+    ('p3', 'Desk Phone', 'LandlinePhone', '50'),
+    ('p4', 'Camera', 'Camera', '400')
+]
+
+
+class RecordedTable:
+    """
+    Stands in for the product table, recording the operations called on it.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.operations = []
+
+    def __getattr__(self, name):
+        self.operations.append(name)
+        return getattr(self.table, name)
+
+
+@pytest.fixture
+def product(load_service, monkeypatch):
+    product = load_service('product')
+    for product_id, name, category, price in PRODUCTS:
+        product.db.product_table.put_item(Item={ 'id': product_id, 'name': name, 'category': category, 'price': Decimal(price) })
+    monkeypatch.setattr(product.db, 'product_table', RecordedTable(product.db.product_table))
+    return product
+
+
+def category_ids(product, **query_params):
+    page = product.get_product_by_category({ 'queryStringParameters': query_params })
+    return [item['id'] for item in page.items]
+
+
+def test_exact_category_is_queried_on_its_index(product):
+    assert category_ids(product, category='Phone') == ['p1', 'p0', 'p2']
+    assert category_ids(product, category='Phone', sortBy='price') == ['p2', 'p0', 'p1']
+    assert category_ids(product, category='Phone', sortBy='price', order='desc') == ['p1', 'p0', 'p2']
+    assert product.db.product_table.operations == ['query'] * 3
+
+
+def test_category_pages_follow_the_cursor(product):
+    page = product.get_product_by_category({ 'queryStringParameters': { 'category': 'Phone', 'sortBy': 'price', 'limit': '2' } })
+    assert [item['id'] for item in page.items] == ['p2', 'p0']
+
+    assert category_ids(product, category='Phone', sortBy='price', limit='2', cursor=page.next_cursor) == ['p1']
+
+
+def test_empty_category_has_no_products(product):
+    page = product.get_product_by_category({ 'queryStringParameters': { 'category': 'Laptop' } })
+
+    assert (page.items, page.next_cursor) == ([], None)
+    assert product.db.product_table.operations == ['query']
+
+
+def test_contains_match_falls_back_to_a_filtered_scan(product):
+    assert sorted(category_ids(product, category='Phone', match='contains')) == ['p0', 'p1', 'p2', 'p3']
+    assert product.db.product_table.operations == ['scan']
+
+
+def test_category_is_routed_from_the_product_list(product):
+    response = product.handler({ 'httpMethod': 'GET', 'path': '/product', 'queryStringParameters': { 'category': 'Camera' } }, None)
+
+    assert [item['id'] for item in json.loads(response['body'])['body']] == ['p4']
+
+
+@pytest.mark.parametrize('query_params', [{}, { 'category': 'Phone', 'sortBy': 'rating' }])
+def test_bad_category_requests_are_rejected(product, query_params):
+    with pytest.raises(ValueError):
+        product.get_product_by_category({ 'queryStringParameters': query_params })
@@ -0,0 +1,66 @@
+from routing import Route, Router
+
+import pytest
+
+
+def route_of(name):
+    return lambda event: name
+
+
+ROUTER = Router([
+    Route('GET', '/product', route_of('list')),
+    Route('GET', '/product/{id}', route_of('get')),
+    Route('GET', '/product/export', route_of('export'), raw=True),
+    Route('PUT', '/product/{id}', route_of('update')),
+    Route('PUT', '/product/bulk', route_of('bulk')),
+    Route('GET', '/basket/{userName}/{anything}', route_of('anything')),
+    Route('GET', '/basket/{userName}/items', route_of('items'))
+])
+
+
+def matched(method, path, **event):
+    route, matched_event = ROUTER.match({ 'httpMethod': method, 'path': path, **event })
+    return route.function(matched_event), matched_event.get('pathParameters')
+
+
+def test_resource_is_looked_up_directly():
+    assert matched('GET', '/product/export', resource='/product/{id}') == ('get', None)
+
+
+def test_static_routes_match_before_templates():
+    assert matched('GET', '/product/export') == ('export', None)
+    assert matched('GET', '/product/export/') == ('export', None)
+    assert matched('PUT', '/product/bulk') == ('bulk', None)
+    assert matched('GET', '/product') == ('list', None)
+
+
+def test_templates_match_with_their_path_parameters():
+    assert matched('GET', '/product/p1') == ('get', { 'id': 'p1' })
+    assert matched('PUT', '/product/p1/') == ('update', { 'id': 'p1' })
+    assert matched('GET', '/basket/swn/items') == ('items', { 'userName': 'swn' })
+    assert matched('GET', '/basket/swn/other') == ('anything', { 'userName': 'swn', 'anything': 'other' })
+
+
+def test_matched_event_names_the_template():
+    route, event = ROUTER.match({ 'httpMethod': 'GET', 'path': '/product/p1', 'pathParameters': { 'other': 'x' } })
+    assert event['resource'] == '/product/{id}'
+    assert event['pathParameters'] == { 'other': 'x', 'id': 'p1' }
+
+
+def test_path_parameters_are_unquoted():
+    assert matched('GET', '/product/a%20b%2Fc') == ('get', { 'id': 'a b/c' })
+
+
+@pytest.mark.parametrize('method, path', [
+    ('DELETE', '/product/p1'),
+    ('GET', '/product/p1/extra'),
+    ('GET', '/order'),
+    (None, '/product')
+])
+def test_unsupported_routes_are_rejected(method, path):
+    with pytest.raises(ValueError, match='Unsupported route'):
+        ROUTER.match({ 'httpMethod': method, 'path': path })
+
+
+def test_templates_can_be_listed_by_prefix():
+    assert ROUTER.templates('/basket') == [('GET', '/basket/{userName}/{anything}'), ('GET', '/basket/{userName}/items')]
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import logging
+
+import pytest
+import simplejson as json
+
+import structured_logging
+from structured_logging import JsonFormatter, LazyJson
+
+
+@pytest.fixture(autouse=True)
+def invocation(monkeypatch):
+    monkeypatch.setitem(structured_logging._invocation, 'requestId', None)
+    monkeypatch.setitem(structured_logging._invocation, 'sampled', False)
+    root = logging.getLogger()
+    level = root.level
+    yield structured_logging._invocation
+    root.setLevel(level)
+
+
+def test_payloads_are_cut_off_unless_sampled(invocation, monkeypatch):
+    monkeypatch.setattr(structured_logging, 'LOG_MAX_PAYLOAD', 10)
+    payload = { 'name': 'x' * 20 }
+    encoded = json.dumps(payload, separators=(',', ':'))
+
+    assert str(LazyJson(payload)) == f'{encoded[:10]}...<{len(encoded) - 10} more characters>'
+    assert str(LazyJson({ 'a': 1 })) == '{"a":1}'
+
+    invocation['sampled'] = True
+    assert str(LazyJson(payload)) == encoded
+
+
+def test_payloads_are_only_encoded_when_logged():
+    encoded = []
+
+    class Payload:
+        def __str__(self):
+            encoded.append(1)
+            return 'payload'
+
+    logger = logging.getLogger('test_structured_logging')
+    logger.setLevel(logging.INFO)
+    logger.debug('request: %s', LazyJson({ 'value': Payload() }))
+    assert encoded == []
+
+    assert logging.LogRecord('test', logging.INFO, '', 0, 'request: %s', (LazyJson({ 'value': Payload() }),), None).getMessage() == 'request: {"value":"payload"}'
+    assert encoded == [1]
+
+
+@pytest.mark.parametrize('draw, sampled, level', [(0.001, True, logging.DEBUG), (0.5, False, logging.WARNING)])
+def test_invocations_are_sampled_at_the_sample_rate(invocation, monkeypatch, draw, sampled, level):
+    monkeypatch.setattr(structured_logging, 'LOG_SAMPLE_RATE', 0.01)
+    monkeypatch.setattr(structured_logging, 'LOG_LEVEL', 'WARNING')
+    monkeypatch.setattr(structured_logging.random, 'random', lambda: draw)
+
+    structured_logging.start_invocation(SimpleNamespace(aws_request_id='r1'))
+
+    assert invocation == { 'requestId': 'r1', 'sampled': sampled }
+    assert logging.getLogger().level == level
+
+
+def test_records_are_formatted_as_json_lines(invocation, monkeypatch):
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'ProductFunction')
+    invocation.update(requestId='r1', sampled=True)
+    record = logging.LogRecord('test', logging.ERROR, '', 0, 'failed: %s', (LazyJson({ 'id': 'p1' }),), None)
+
+    line = json.loads(JsonFormatter().format(record))
+
+    assert line.pop('timestamp').endswith('+00:00')
+    assert line == {
+        'level': 'ERROR', 'service': 'ProductFunction', 'requestId': 'r1', 'sampled': True, 'message': 'failed: {"id":"p1"}'
+    }
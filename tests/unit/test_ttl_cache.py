@@ -0,0 +1,70 @@
+import pytest
+
+import ttl_cache
+from ttl_cache import TtlCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = TtlCache(max_size=10, ttl=30)
+    cache.put('a', 1)
+
+    clock[0] += 29.9
+    assert cache.get('a') == 1
+    clock[0] += 0.1
+    assert cache.get('a') is None
+    assert cache.stats() == { 'size': 1, 'maxSize': 10, 'hits': 1, 'misses': 1, 'evictions': 0 }
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = TtlCache(max_size=2, ttl=30)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    assert cache.evictions == 1
+
+
+def test_get_or_load_loads_once_until_expiry(clock):
+    cache, loads = TtlCache(max_size=10, ttl=30), []
+
+    def load():
+        loads.append(1)
+        return len(loads)
+
+    assert [cache.get_or_load('a', load) for _ in range(3)] == [1, 1, 1]
+    clock[0] += 30
+    assert cache.get_or_load('a', load) == 2
+
+
+def test_falsy_values_are_cached():
+    cache = TtlCache(max_size=10, ttl=30)
+    cache.put('missing', {})
+
+    assert cache.get_or_load('missing', lambda: pytest.fail('loaded again')) == {}
+
+
+def test_invalidate_drops_matching_keys():
+    cache = TtlCache(max_size=10, ttl=30)
+    for key in (('product', 'p1'), ('product', 'p2'), ('page', 10, 'null')):
+        cache.put(key, key)
+
+    cache.invalidate(lambda key: key[0] == 'page' or key == ('product', 'p1'))
+
+    assert [cache.get(key) for key in (('product', 'p1'), ('product', 'p2'), ('page', 10, 'null'))] == [None, ('product', 'p2'), None]
+
+
+@pytest.mark.parametrize('max_size, ttl', [(0, 30), (10, 0)])
+def test_disabled_cache_keeps_nothing(max_size, ttl):
+    cache = TtlCache(max_size=max_size, ttl=ttl)
+    cache.put('a', 1)
+
+    assert cache.get('a') is None